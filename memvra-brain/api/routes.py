@@ -1,37 +1,94 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
-from typing import List, Dict
+import os
+import time
+from typing import Callable, List, Dict, Optional, Tuple
 
-from api.schemas import FactInput, DreamInput
+from api.schemas import FactInput, BatchFactInput, DreamInput
+from api.ingest import iter_ndjson_batches, IngestStreamingResponse
 # Import core modules - assuming they are still in the root core/ for now
 from core.user_profile import UserProfile
 from core.bdh_graph import BDHGraph
 from core.trm_compressor import TRMCompressor
-from core.llama_service import LlamaService
+from core.incremental_dream import IncrementalDreamer
+from core.llama_service import AsyncLlamaService
+from core.llm_cache import LLMResultCache
 from core.confidence_manager import ConfidenceManager
 from core.linguistic_profiler import LinguisticProfiler
 from core.predictive_engine import PredictiveEngine
 from core.bidirectional_learner import BidirectionalLearner
 from core.temporal_tracker import TemporalTracker
+from core.persistence import BrainPersistence
+from core.memory_store import MemoryStore
+from core.execution import ExecutionLayer
+from core.query_enhancer import LocalQueryEnhancer, stem
+from core.stream_verifier import StreamingVerifier
+from core.citation_verifier import CitationVerifier
 
 router = APIRouter()
 
 # Initialize Brain Components (Singletons)
 # In a real app, these might be dependencies
-bdh_graph = BDHGraph()
+# MEMVRA_EMBEDDING_DIR: keep embeddings in memory-mapped files instead of RAM
+bdh_graph = BDHGraph(embedding_store_dir=os.environ.get("MEMVRA_EMBEDDING_DIR") or None)
 trm_compressor = TRMCompressor()
-llama_service = LlamaService()
+dreamer = IncrementalDreamer(trm_compressor)
+# Memoized enhance / verify answers (MEMVRA_LLM_CACHE_ENTRIES=0 disables,
+# MEMVRA_LLM_CACHE_PATH persists them across restarts)
+LLM_CACHE_ENTRIES = int(os.environ.get("MEMVRA_LLM_CACHE_ENTRIES", 4096))
+llm_cache = LLMResultCache(
+    max_entries=LLM_CACHE_ENTRIES,
+    ttl_seconds=float(os.environ["MEMVRA_LLM_CACHE_TTL"]) if os.environ.get("MEMVRA_LLM_CACHE_TTL") else None,
+    persist_path=os.environ.get("MEMVRA_LLM_CACHE_PATH") or None
+) if LLM_CACHE_ENTRIES > 0 else None
+llama_service = AsyncLlamaService(cache=llm_cache)  # OLLAMA_HOST selects the server
+query_enhancer = LocalQueryEnhancer()
+citation_verifier = CitationVerifier(bdh_graph.encoder)  # decides most claims without the LLM judge
 confidence_manager = ConfidenceManager()
 linguistic_profiler = LinguisticProfiler()
 predictive_engine = PredictiveEngine()
 bidirectional_learner = BidirectionalLearner()
 temporal_tracker = TemporalTracker()
 
+# Blocking encoder / graph / LLM work runs in per-stage pools, never on the event loop
+# MEMVRA_<STAGE>_CONCURRENCY overrides a stage limit (e.g. MEMVRA_LLM_CONCURRENCY=4)
+execution = ExecutionLayer({
+    stage: int(os.environ.get(f"MEMVRA_{stage.upper()}_CONCURRENCY", limit))
+    for stage, limit in ExecutionLayer.DEFAULT_LIMITS.items()
+})
+
+# Query enhancement engine when neither the request nor the tenant picks one: "llm" | "local"
+DEFAULT_QUERY_ENHANCER = os.environ.get("MEMVRA_QUERY_ENHANCER", "llm")
+QUERY_ENHANCERS = ("llm", "local")
+
+# How long a response may wait for outstanding LLM verification after its
+# last token before the verdict is reported as pending
+VERIFY_BUDGET_S = float(os.environ.get("MEMVRA_VERIFY_BUDGET_S", 2.0))
+
+# Recall retrieves with the raw query while the query is enhanced. Once that
+# context is ready, enhancement gets at most MEMVRA_ENHANCE_WAIT_S more before
+# recall goes on without it; its terms trigger a second retrieval only when
+# they overlap the raw query's less than ENHANCED_RETRIEVAL_OVERLAP (Jaccard)
+ENHANCE_WAIT_S = float(os.environ.get("MEMVRA_ENHANCE_WAIT_S", 1.0))
+ENHANCED_RETRIEVAL_OVERLAP = 0.5
+
 # In-memory storage (Legacy support during migration)
 user_profiles: Dict[str, UserProfile] = {}
-memory_store = []
+memory_store = MemoryStore()
+
+# MEMVRA_DATA_DIR: write-ahead log + snapshots, state is recovered on startup
+persistence = BrainPersistence(
+    os.environ["MEMVRA_DATA_DIR"], bdh_graph, memory_store, user_profiles
+) if os.environ.get("MEMVRA_DATA_DIR") else None
+if persistence is not None:
+    persistence.recover()
+# Snapshot files are serialized and written here, after the graph_write
+# capture has released the graph (one writer: snapshots never overlap)
+snapshot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
 
 # Helper Functions
 def get_user_profile(user_id: str) -> UserProfile:
@@ -40,9 +97,58 @@ def get_user_profile(user_id: str) -> UserProfile:
         user_profiles[user_id] = UserProfile(user_id=user_id)
     return user_profiles[user_id]
 
+def save_profile_counters(user_profile: UserProfile):
+    """Journal profile counter changes when persistence is enabled"""
+    if persistence is not None:
+        persistence.log_profile_counters(user_profile)
+
+def save_profile_settings(user_profile: UserProfile):
+    """Journal profile settings / linguistic profile changes when persistence is enabled"""
+    if persistence is not None:
+        persistence.log_profile_settings(user_profile)
+
+# Journal writes started from the event loop, run in the graph_write stage
+# (serialized with snapshots) without making the request wait for them
+journal_tasks: set = set()
+
+def journal_in_background(save: Callable, user_profile: UserProfile):
+    """save(user_profile) off the event loop; the request does not wait for it"""
+    if persistence is None:
+        return
+    
+    def done(task: asyncio.Task):
+        journal_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠ Warning: Journal write failed - {task.exception()}")
+    
+    task = asyncio.create_task(execution.run("graph_write", save, user_profile))
+    journal_tasks.add(task)
+    task.add_done_callback(done)
+
 def get_user_facts(user_id: str) -> List[Dict]:
-    """Get all facts for a user"""
-    return [fact for fact in memory_store if fact.get("user_id") == user_id]
+    """Get all facts for a user, in creation order (per-user index, no global scan)"""
+    return memory_store.for_user(user_id)
+
+async def release_idle_embeddings(interval_seconds: float = 60.0, idle_seconds: float = 300.0):
+    """Background loop: unmap embedding files of users idle for idle_seconds"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        released = await execution.run("graph_write", bdh_graph.release_idle_matrices, idle_seconds)
+        if released:
+            print(f"✓ Released {released} idle embedding matrices")
+
+async def snapshot_periodically(interval_seconds: float = 30.0):
+    """Background loop: snapshot once enough WAL records have accumulated"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            # graph_write: no graph op or memory_store append interleaves with the capture;
+            # recalls only wait for the copy, not for serializing and writing it
+            capture = await execution.run("graph_write", persistence.maybe_capture_snapshot)
+            if capture is not None:
+                await asyncio.get_running_loop().run_in_executor(snapshot_writer, persistence.write_snapshot, capture)
+        except Exception as e:
+            print(f"⚠ Warning: Snapshot failed - {e}")
 
 @router.get("/")
 async def root():
@@ -52,63 +158,64 @@ async def root():
         "status": "operational"
     }
 
+@router.get("/v1/metrics")
+async def get_metrics():
+    """Queue depth / in-flight / wait per execution stage, encoder batching, Ollama client, circuit breaker, LLM cache, dream state and local verification"""
+    return {
+        "stages": execution.get_stats(),
+        "encoder": bdh_graph.encoder.get_stats(),
+        "llm": llama_service.client.get_stats(),
+        "llm_breaker": llama_service.breaker.get_stats(),
+        "llm_cache": llm_cache.get_stats() if llm_cache is not None else None,
+        "dream": dreamer.get_stats(),
+        "citation_verifier": citation_verifier.get_stats(),
+        "persistence": persistence.get_stats() if persistence is not None else None
+    }
+
 @router.post("/v1/logical/recall")
-async def recall_optimized(query: str, user_id: str = "default"):
+async def recall_optimized(query: str, user_id: str = "default", mode: str = "tiered", enhancer: Optional[str] = None):
     try:
         user_profile = get_user_profile(user_id)
         user_profile.increment_query_count()
+        journal_in_background(save_profile_counters, user_profile)
         
         # Predictive Engine Hook (Phase 3)
         predictive_engine.record_query_pattern(
             user_id, query, datetime.now(), user_profile
         )
         
-        standardized_query = linguistic_profiler.understand_query(query, user_profile)
-        enhanced = llama_service.enhance_query(standardized_query, user_profile.to_dict())
-        
-        results = bdh_graph.retrieve(
-            query=enhanced["enhanced_query"],
-            user_id=user_id,
-            level=2
-        )
+        started = time.perf_counter()
+        results, enhanced, timings = await build_context(query, user_profile, enhancer, mode)
         
+        verification = None
         if results["facts"]:
-            response_text = llama_service.format_response(
-                facts=results["facts"],
-                query=query,
-                level_used=results["level"],
-                confidence=results["confidence"],
-                user_profile=user_profile.to_dict()
+            # Feature: Self-Verification Loop (Hallucination Safeguard), overlapped with generation
+            response_text, verification = await execution.run_async(
+                "llm", generate_verified, query, results, user_profile, user_id, timings, started
             )
-            
-            # Feature: Self-Verification Loop (Hallucination Safeguard)
-            verification = llama_service.verify_response(response_text, results["facts"])
-            if not verification.get("supported", True):
-                response_text += f"\n\n[System Note: Verification Warning - {verification.get('reason', 'Potential inaccuracy detected')}]"
+            if not verification["supported"]:
+                response_text += verification_note(verification)
             
             # Feature: Update Memory Scores (Reinforcement)
-            # When a fact is recalled, it's "Active Recall", so we boost its score
-            for fact in results["facts"]:
-                # Get current stats (mocked for now, would come from DB)
-                current_ease = fact.get("ease_factor", 2.5)
-                current_interval = fact.get("interval", 0)
-                
-                # Calculate new score (Quality=5 because it was successfully recalled)
-                new_stats = trm_compressor.calculate_memory_score(5, current_ease, current_interval)
-                
-                # Update fact in graph (Conceptual)
-                bdh_graph.update_fact_stats(fact["fact_id"], new_stats)
+            await execution.run("graph_write", reinforce_facts, results["facts"])
             
             response_text = linguistic_profiler.adapt_response(response_text, user_profile)
         else:
             response_text = f"I don't have any memories about '{query}' yet."
+        timings["total"] = (time.perf_counter() - started) * 1000
         
         return {
             "query": query,
             "result": response_text,
             "metadata": {
                 "facts_retrieved": len(results["facts"]),
-                "confidence": results["confidence"]
+                "confidence": results["confidence"],
+                "level_used": results["level_used"],
+                "retrieval_mode": mode,
+                "intent": enhanced["intent"],
+                "context_source": results["context_source"],
+                "verification": verification,
+                "timings_ms": timings
             }
         }
     except Exception as e:
@@ -116,164 +223,491 @@ async def recall_optimized(query: str, user_id: str = "default"):
         return {"result": f"Error: {str(e)}"}
 
 @router.post("/v1/logical/stream")
-async def stream_logic(query: str, user_id: str = "default"):
+async def stream_logic(query: str, user_id: str = "default", mode: str = "tiered", enhancer: Optional[str] = None, verify: bool = True):
     """
     Streaming Endpoint for Chat Widget
+    verify: sentences are checked while streaming; a warning (or pending)
+    note is appended after the last token when the answer is not verified
     """
     try:
         user_profile = get_user_profile(user_id)
         user_profile.increment_query_count()
+        journal_in_background(save_profile_counters, user_profile)
         
         # Predictive Engine Hook
         predictive_engine.record_query_pattern(
             user_id, query, datetime.now(), user_profile
         )
         
-        standardized_query = linguistic_profiler.understand_query(query, user_profile)
-        enhanced = llama_service.enhance_query(standardized_query, user_profile.to_dict())
+        # Retrieve context (raw query and enhancement in parallel)
+        results, _, timings = await build_context(query, user_profile, enhancer, mode)
         
-        # Retrieve context
-        results = bdh_graph.retrieve(
-            query=enhanced["enhanced_query"],
-            user_id=user_id,
-            level=2
-        )
-        
-        # Generator wrapper
-        def generate():
-            for token in llama_service.stream_response(
+        # Async generator wrapper (generations capped per model by the Ollama client)
+        async def generate():
+            verifier = StreamingVerifier(
+                llama_service, results["facts"], user_id,
+                budget_s=VERIFY_BUDGET_S, citation_verifier=citation_verifier
+            ) if verify and results["facts"] else None
+            async for token in llama_service.stream_response(
                 facts=results["facts"],
                 query=query,
-                level_used=results["level"],
+                level_used=results["level_used"],
                 confidence=results["confidence"],
                 user_profile=user_profile.to_dict()
             ):
+                if verifier is not None:
+                    verifier.feed(token)
                 yield token
+            if verifier is not None:
+                verification = await verifier.finish()
+                if verification["status"] != "verified":
+                    yield verification_note(verification)
 
-        return StreamingResponse(generate(), media_type="text/plain")
+        # Context stage timings are known before the first token: Server-Timing header
+        server_timing = ", ".join(
+            f"{stage};dur={ms:.1f}" for stage, ms in timings.items() if isinstance(ms, float)
+        )
+        return StreamingResponse(generate(), media_type="text/plain", headers={"Server-Timing": server_timing})
         
     except Exception as e:
         print(f"Error in stream: {e}")
         return StreamingResponse(iter([f"Error: {str(e)}"]), media_type="text/plain")
 
-async def store_fact(fact_input: FactInput):
+async def enhance_query(query: str, user_profile: UserProfile, enhancer: Optional[str] = None) -> Dict:
+    """Request's engine, else the tenant's, else DEFAULT_QUERY_ENHANCER ("local" skips the LLM)"""
+    engine = enhancer or user_profile.query_enhancer or DEFAULT_QUERY_ENHANCER
+    if engine == "local":
+        return query_enhancer.enhance_query(query, user_profile.to_dict())
+    if engine == "llm":
+        return await execution.run_async("llm", llama_service.enhance_query, query, user_profile.to_dict())
+    raise ValueError(f"Unknown query enhancer: {engine}")
+
+async def generate_verified(
+    query: str,
+    results: Dict,
+    user_profile: UserProfile,
+    user_id: str,
+    timings: Optional[Dict] = None,
+    started: Optional[float] = None
+) -> Tuple[str, Dict]:
+    """
+    Stream the response through a StreamingVerifier: sentences are checked
+    (CitationVerifier first, LLM judge if ambiguous) while later tokens are still generating
+    timings (ms since started) gets first_token, generated and verify_wait
+    """
+    timings = timings if timings is not None else {}
+    started = started if started is not None else time.perf_counter()
+    verifier = StreamingVerifier(
+        llama_service, results["facts"], user_id,
+        budget_s=VERIFY_BUDGET_S, citation_verifier=citation_verifier
+    )
+    tokens = []
+    async for token in llama_service.stream_response(
+        facts=results["facts"],
+        query=query,
+        level_used=results["level_used"],
+        confidence=results["confidence"],
+        user_profile=user_profile.to_dict()
+    ):
+        if not tokens:
+            timings["first_token"] = (time.perf_counter() - started) * 1000
+        tokens.append(token)
+        verifier.feed(token)
+    timings["generated"] = (time.perf_counter() - started) * 1000
+    verification = await verifier.finish()
+    timings["verify_wait"] = verification["wait_ms"]
+    return "".join(tokens), verification
+
+def verification_note(verification: Dict) -> str:
+    if verification["status"] == "pending":
+        return f"\n\n[System Note: Verification Pending - {verification['reason']}]"
+    if verification["status"] == "unverified":
+        return f"\n\n[System Note: Verification Incomplete - {verification['reason']}]"
+    return f"\n\n[System Note: Verification Warning - {verification.get('reason', 'Potential inaccuracy detected')}]"
+
+async def timed(timings: Dict, stage: str, awaitable):
+    """Await and record the stage's duration in ms"""
+    started = time.perf_counter()
     try:
-        user_profile = get_user_profile(fact_input.user_id)
-        user_profile.increment_fact_count()
-        
-        fact_id = f"fact_{datetime.now().timestamp()}_{user_profile.total_facts}"
-        
-        # Temporal Versioning
-        version_info = temporal_tracker.record_fact_version(
-            fact_input.content, fact_input.user_id, fact_id
-        )
-        
-        fact_data = {
-            "fact_id": fact_id,
-            "user_id": fact_input.user_id,
-            "content": fact_input.content,
-            "tags": fact_input.tags,
-            "created_at": datetime.now().isoformat(),
-            "metadata": {"version": version_info.get("type")}
-        }
-        memory_store.append(fact_data)
-        
-        bdh_graph.add_fact(
-            fact_id=fact_id,
-            content=fact_input.content,
-            user_id=fact_input.user_id,
-            metadata=fact_data["metadata"]
-        )
-        
-        return {"status": "success", "fact_id": fact_id}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return await awaitable
+    finally:
+        timings[stage] = (time.perf_counter() - started) * 1000
 
-@router.post("/v1/intuitive/dream")
-async def dream_cycle(dream_input: DreamInput):
+def term_overlap(query: str, enhanced: Dict) -> float:
+    """Jaccard overlap of the raw query's keyword stems and the enhancement's terms"""
+    raw = {stem(word) for word in query_enhancer.extract_keywords(query)}
+    terms = {
+        stem(word)
+        for term in enhanced.get("keywords", []) + enhanced.get("synonyms", [])
+        for word in query_enhancer.extract_keywords(str(term))
+    }
+    if not raw or not terms:
+        return 1.0
+    return len(raw & terms) / len(raw | terms)
+
+def merge_contexts(raw: Dict, enhanced: Dict) -> Dict:
     """
-    Background compression cycle (TRM)
-    - Level 0 → L1 (Reflections)
-    - Level 1 → L2 (Generalizations)
-    - Level 2 → L3 (Psychological Profile)
+    Same level: facts of both re-ranked by similarity; otherwise the more
+    confident context (tiered / level results only: spreading paths are
+    traversals and are never merged). context_source says which retrieval(s) the facts
+    came from; timings_ms keeps both retrievals, labelled
+    """
+    timings = {"raw": raw["timings_ms"], "enhanced": enhanced["timings_ms"]}
+    if raw["level_used"] != enhanced["level_used"] or not raw["facts"] or not enhanced["facts"]:
+        source = "raw" if (bool(raw["facts"]), raw["confidence"]) >= (bool(enhanced["facts"]), enhanced["confidence"]) else "enhanced"
+        chosen = raw if source == "raw" else enhanced
+        return {**chosen, "context_source": source, "timings_ms": timings}
+    
+    best: Dict[str, Dict] = {}
+    for fact in raw["facts"] + enhanced["facts"]:
+        if fact["fact_id"] not in best or fact.get("similarity", 0.0) > best[fact["fact_id"]].get("similarity", 0.0):
+            best[fact["fact_id"]] = fact
+    facts = sorted(best.values(), key=lambda fact: -fact.get("similarity", 0.0))
+    facts = facts[:max(len(raw["facts"]), len(enhanced["facts"]))]
+    
+    # Path steps of the kept facts, at their best similarity
+    steps = {}
+    for step in raw["path"] + enhanced["path"]:
+        if step["node"] not in steps or step["similarity"] > steps[step["node"]]["similarity"]:
+            steps[step["node"]] = step
+    
+    sources = {fact["fact_id"] for fact in raw["facts"]}, {fact["fact_id"] for fact in enhanced["facts"]}
+    kept = {fact["fact_id"] for fact in facts}
+    used = [name for name, ids in zip(("raw", "enhanced"), sources) if ids & kept]
+    return {
+        **raw,
+        "facts": facts,
+        "confidence": sum(fact.get("similarity", 0.0) for fact in facts) / len(facts),
+        "path": [steps[fact["fact_id"]] for fact in facts if fact["fact_id"] in steps],
+        "context_source": "+".join(used),
+        "timings_ms": timings
+    }
+
+async def build_context(query: str, user_profile: UserProfile, enhancer: Optional[str], mode: str) -> Tuple[Dict, Dict, Dict]:
     """
+    Recall DAG up to a ready context:
+    1. retrieval with the standardized query || query enhancement
+    2. once retrieval is done, wait up to ENHANCE_WAIT_S for the enhancement
+       (a late one keeps running and lands in the LLM cache)
+    3. a second retrieval with the enhanced query only if the user has
+       data, the mode is not "spreading" and its terms differ materially,
+       merged with the first
+    Returns (results with context_source, enhancement, stage timings in ms)
+    """
+    timings: Dict = {}
+    started = time.perf_counter()
+    user_id = user_profile.user_id
+    standardized_query = linguistic_profiler.understand_query(query, user_profile)
+    
+    enhance_task = asyncio.create_task(timed(timings, "enhance", enhance_query(standardized_query, user_profile, enhancer)))
+    # A late enhancement's failure must not surface as "exception never retrieved"
+    enhance_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    results = await timed(timings, "retrieve_raw", retrieve_context(standardized_query, user_id, mode))
+    results["context_source"] = "raw"
+    
     try:
-        user_profile = get_user_profile(dream_input.user_id)
-        user_facts = get_user_facts(dream_input.user_id)
+        enhanced = await asyncio.wait_for(asyncio.shield(enhance_task), ENHANCE_WAIT_S)
+    except asyncio.TimeoutError:
+        enhanced = None
+    
+    if enhanced is None:
+        results["context_source"] = "raw (enhancement late)"
+        enhanced = {"intent": query_enhancer.classify_intent(standardized_query)}
+    elif bdh_graph.count_user_nodes(user_id) == 0:
+        # Nothing stored for the user: no query can retrieve anything
+        pass
+    elif mode == "spreading":
+        # Activation already spreads past the seeds along graph links; a second
+        # traversal would only replace the real path with a merged list
+        pass
+    elif term_overlap(standardized_query, enhanced) < ENHANCED_RETRIEVAL_OVERLAP:
+        second = await timed(timings, "retrieve_enhanced", retrieve_context(enhanced["enhanced_query"], user_id, mode))
+        results = merge_contexts(results, second)
+    
+    timings["context_ready"] = (time.perf_counter() - started) * 1000
+    timings["retrieval"] = results["timings_ms"]
+    return results, enhanced, timings
+
+async def retrieve_context(query: str, user_id: str, mode: str) -> Dict:
+    """Encode (encode stage) then search (graph_read stage), timings include the encode"""
+    started = time.perf_counter()
+    query_vector = await execution.run_async("encode", bdh_graph.encoder.encode_async, query)
+    encode_ms = (time.perf_counter() - started) * 1000
+    
+    results = await execution.run(
+        "graph_read", bdh_graph.retrieve,
+        query_vector=query_vector, user_id=user_id, level=2, mode=mode
+    )
+    results["timings_ms"] = {"encode": encode_ms, **results["timings_ms"]}
+    return results
+
+def reinforce_facts(facts: List[Dict]):
+    """When a fact is recalled, it's "Active Recall", so we boost its score"""
+    for fact in facts:
+        # Get current stats (mocked for now, would come from DB)
+        current_ease = fact.get("ease_factor", 2.5)
+        current_interval = fact.get("interval", 0)
         
-        if len(user_facts) < 5:
-            return {
-                "status": "skipped",
-                "message": "Need more facts for pattern detection (minimum: 5)"
-            }
+        # Calculate new score (Quality=5 because it was successfully recalled)
+        new_stats = trm_compressor.calculate_memory_score(5, current_ease, current_interval)
         
-        # Step 1: Compress Level 0 → Level 1 (Reflections)
-        patterns = trm_compressor.generate_reflections(user_facts, dream_input.user_id)
+        # Update fact in graph (Conceptual)
+        bdh_graph.update_fact_stats(fact["fact_id"], new_stats)
+
+async def warm_embeddings(contents: List[str], batch_size: Optional[int] = None):
+    """
+    Encode in the encode stage first: the embedding cache then serves the
+    graph write, so the write lock is not held across the encoder
+    """
+    if bdh_graph.encoder.cache is not None and contents:
+        await execution.run_async("encode", bdh_graph.encoder.encode_async, contents, batch_size)
+
+def prepare_fact(fact_input: FactInput) -> Dict:
+    """Assign an id, record the version and append to memory_store"""
+    user_profile = get_user_profile(fact_input.user_id)
+    user_profile.increment_fact_count()
+    save_profile_counters(user_profile)
+    
+    fact_id = f"fact_{datetime.now().timestamp()}_{user_profile.total_facts}"
+    
+    # Temporal Versioning
+    version_info = temporal_tracker.record_fact_version(
+        fact_input.content, fact_input.user_id, fact_id
+    )
+    
+    fact_data = {
+        "fact_id": fact_id,
+        "user_id": fact_input.user_id,
+        "content": fact_input.content,
+        "tags": fact_input.tags,
+        "created_at": datetime.now().isoformat(),
+        "metadata": {"version": version_info.get("type")}
+    }
+    memory_store.append(fact_data)
+    if persistence is not None:
+        persistence.log_memory(fact_data)
+    if llm_cache is not None:
+        # Cached verifications for this user are stale now
+        llm_cache.bump_version(fact_input.user_id)
+    return fact_data
+
+@router.post("/v1/logical/store")
+async def store_fact(fact_input: FactInput):
+    try:
+        await warm_embeddings([fact_input.content])
         
-        for i, pattern in enumerate(patterns):
-            pattern_id = f"pattern_{dream_input.user_id}_{i}"
-            bdh_graph.add_pattern(
-                pattern_id=pattern_id,
-                pattern=pattern["pattern"],
-                facts_compressed=pattern["facts_compressed"],
-                confidence=pattern["confidence"],
-                user_id=dream_input.user_id
+        def store():
+            fact_data = prepare_fact(fact_input)
+            bdh_graph.add_fact(
+                fact_id=fact_data["fact_id"],
+                content=fact_input.content,
+                user_id=fact_input.user_id,
+                metadata=fact_data["metadata"]
             )
+            return fact_data
         
-        user_profile.total_patterns = len(patterns)
-        
-        # Step 2: Compress Level 1 → Level 2 (Generalizations)
-        insights = []
-        if len(patterns) >= 3:
-            insights = trm_compressor.generate_generalizations(patterns, dream_input.user_id)
-            
-            for i, insight in enumerate(insights):
-                insight_id = f"insight_{dream_input.user_id}_{i}"
-                bdh_graph.add_insight(
-                    insight_id=insight_id,
-                    insight=insight["insight"],
-                    patterns_used=insight["patterns_used"],
-                    score=insight["score"],
-                    user_id=dream_input.user_id
-                )
-            
-            user_profile.total_insights = len(insights)
-            
-            # Step 3: Level 2 → Level 3 (Psychological Profile)
-            # Theory of Mind Synthesis
-            profile_data = trm_compressor.synthesize_psychological_profile(insights, dream_input.user_id)
-            if profile_data:
-                bdh_graph.add_psychological_profile(dream_input.user_id, profile_data)
+        fact_data = await execution.run("graph_write", store)
         
+        return {"status": "success", "fact_id": fact_data["fact_id"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/v1/logical/store:batch")
+async def store_facts_batch(batch_input: BatchFactInput):
+    """
+    Bulk ingest: batched encoding, one matrix append per user
+    and one vectorized edge pass. Returns fact_ids in input order.
+    """
+    try:
+        batch_size = batch_input.batch_size or bdh_graph.encoder.max_batch_size
+        await warm_embeddings([fact_input.content for fact_input in batch_input.facts], batch_size)
         
-        # Step 4: Apply Ebbinghaus Decay (Memory Maintenance)
-        # Get all Level 0 facts
-        all_facts = [
-            {"fact_id": f["fact_id"], "stability": f.get("metadata", {}).get("stability", 0.5)} 
-            for f in user_facts
-        ]
-        
-        # Simulate 1 day passing for decay calculation
-        decayed_facts = trm_compressor.apply_ebbinghaus_decay(all_facts, days_elapsed=1.0)
+        def store_batch():
+            fact_batch = [prepare_fact(fact_input) for fact_input in batch_input.facts]
+            return bdh_graph.add_facts(fact_batch, batch_size=batch_size)
         
-        # Prune fading memories (Conceptual)
-        fading_count = sum(1 for f in decayed_facts if f["status"] == "fading")
+        results = await execution.run("graph_write", store_batch)
         
         return {
             "status": "success",
-            "summary": f"Processed {len(user_facts)} facts",
-            "patterns": [p["pattern"] for p in patterns],
-            "insights": [i["insight"] for i in insights],
-            "profile_updated": len(insights) > 0,
-            "memories_fading": fading_count,
-            "graph_stats": bdh_graph.get_stats()
+            "stored": len(results),
+            "results": results
         }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/v1/logical/store:stream")
+async def store_facts_stream(request: Request, start_offset: int = 0, batch_size: int = 256):
+    """
+    Streaming NDJSON ingest for dataset loads / backfills
+    Body: one FactInput JSON object per line.
+    Response (NDJSON): a result line per record, then a progress line per
+    micro-batch with the last acknowledged offset. To resume, re-send from
+    acknowledged_offset + 1 with start_offset set to that value.
+    """
+    async def ingest():
+        stored = failed = 0
+        acknowledged = start_offset - 1
+        try:
+            async for batch in iter_ndjson_batches(request.stream(), batch_size, start_offset):
+                fact_inputs, results = [], []
+                for offset, record in batch:
+                    try:
+                        if isinstance(record, Exception):
+                            raise record
+                        fact_inputs.append((offset, FactInput(**record)))
+                    except Exception as e:
+                        results.append({"type": "result", "offset": offset, "error": str(e)})
+                
+                await warm_embeddings([fact_input.content for _, fact_input in fact_inputs])
+                
+                def store_batch():
+                    fact_batch = []
+                    for offset, fact_input in fact_inputs:
+                        try:
+                            fact_data = prepare_fact(fact_input)
+                            fact_batch.append(fact_data)
+                            results.append({"type": "result", "offset": offset, "fact_id": fact_data["fact_id"]})
+                        except Exception as e:
+                            results.append({"type": "result", "offset": offset, "error": str(e)})
+                    if fact_batch:
+                        bdh_graph.add_facts(fact_batch)
+                    return fact_batch
+                
+                fact_batch = await execution.run("graph_write", store_batch)
+                results.sort(key=lambda result: result["offset"])
+                
+                stored += len(fact_batch)
+                failed += len(batch) - len(fact_batch)
+                acknowledged = batch[-1][0]
+                
+                for result in results:
+                    yield json.dumps(result) + "\n"
+                yield json.dumps({
+                    "type": "progress",
+                    "acknowledged_offset": acknowledged,
+                    "stored": stored,
+                    "failed": failed
+                }) + "\n"
+        except Exception as e:
+            print(f"Error in stream ingest: {e}")
+            yield json.dumps({"type": "error", "acknowledged_offset": acknowledged, "detail": str(e)}) + "\n"
+            return
         
+        yield json.dumps({
+            "type": "done",
+            "acknowledged_offset": acknowledged,
+            "stored": stored,
+            "failed": failed
+        }) + "\n"
+    
+    return IngestStreamingResponse(ingest(), media_type="application/x-ndjson")
+
+def run_dream_cycle(dream_input: DreamInput) -> Dict:
+    """
+    Background compression cycle (TRM), incremental per user
+    - Level 0 → L1 (Reflections): facts since the last cycle folded into the topic clusters
+    - Level 1 → L2 (Generalizations)
+    - Level 2 → L3 (Psychological Profile)
+    Only nodes whose content changed are re-encoded and written
+    """
+    user_id = dream_input.user_id
+    user_profile = get_user_profile(user_id)
+    user_facts = get_user_facts(user_id)
+    
+    if len(user_facts) < 5:
+        return {
+            "status": "skipped",
+            "message": "Need more facts for pattern detection (minimum: 5)"
+        }
+    
+    plan = dreamer.plan(user_id, user_facts, bdh_graph, full=bool(dream_input.full))
+    patterns, insights = plan["patterns"], plan["insights"]
+    
+    # Step 1: Compress Level 0 → Level 1 (Reflections)
+    for pattern in plan["write_patterns"]:
+        bdh_graph.add_pattern(
+            pattern_id=pattern["pattern_id"],
+            pattern=pattern["pattern"],
+            facts_compressed=pattern["facts_compressed"],
+            confidence=pattern["confidence"],
+            user_id=user_id
+        )
+    
+    # Step 2: Compress Level 1 → Level 2 (Generalizations)
+    for insight in plan["write_insights"]:
+        bdh_graph.add_insight(
+            insight_id=insight["insight_id"],
+            insight=insight["insight"],
+            patterns_used=insight["patterns_used"],
+            score=insight["score"],
+            user_id=user_id
+        )
+    
+    for node_id, level in plan["remove"]:
+        bdh_graph.remove_derived_node(node_id, level)
+    
+    # Step 3: Level 2 → Level 3 (Psychological Profile)
+    # Theory of Mind Synthesis
+    if plan["write_profile"]:
+        bdh_graph.add_psychological_profile(user_id, plan["profile"])
+    
+    dreamer.commit(user_id, plan)
+    
+    if (user_profile.total_patterns, user_profile.total_insights) != (len(patterns), len(insights)):
+        user_profile.total_patterns = len(patterns)
+        user_profile.total_insights = len(insights)
+        save_profile_counters(user_profile)
+    
+    # Refresh the user's vocabulary (feeds the local query enhancer's synonyms)
+    if plan["new_facts"]:
+        linguistic_profiler.build_profile([f["content"] for f in user_facts], user_profile)
+        save_profile_settings(user_profile)
+    
+    # Step 4: Apply Ebbinghaus Decay (Memory Maintenance)
+    # Get all Level 0 facts
+    all_facts = [
+        {"fact_id": f["fact_id"], "stability": f.get("metadata", {}).get("stability", 0.5)} 
+        for f in user_facts
+    ]
+    
+    # Simulate 1 day passing for decay calculation
+    decayed_facts = trm_compressor.apply_ebbinghaus_decay(all_facts, days_elapsed=1.0)
+    
+    # Prune fading memories (Conceptual)
+    fading_count = sum(1 for f in decayed_facts if f["status"] == "fading")
+    
+    return {
+        "status": "success",
+        "summary": f"Processed {plan['new_facts']} new facts ({len(user_facts)} total)",
+        "patterns": [p["pattern"] for p in patterns],
+        "insights": [i["insight"] for i in insights],
+        "profile_updated": plan["write_profile"],
+        "memories_fading": fading_count,
+        "work": dreamer.work_report(plan, len(user_facts)),
+        "graph_stats": bdh_graph.get_stats()
+    }
+
+@router.post("/v1/intuitive/dream")
+async def dream_cycle(dream_input: DreamInput):
+    """Dream cycle in the graph_write stage (mutates the graph, runs off the event loop)"""
+    try:
+        return await execution.run("graph_write", run_dream_cycle, dream_input)
     except Exception as e:
         print(f"Error in dream cycle: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/v1/users/{user_id}/query_enhancer")
+async def set_query_enhancer(user_id: str, engine: Optional[str] = None):
+    """Per-tenant query enhancement engine ("llm" | "local", omit to use the service default)"""
+    if engine is not None and engine not in QUERY_ENHANCERS:
+        raise HTTPException(status_code=400, detail=f"engine must be one of {QUERY_ENHANCERS}")
+    user_profile = get_user_profile(user_id)
+    user_profile.query_enhancer = engine
+    if persistence is not None:
+        await execution.run("graph_write", save_profile_settings, user_profile)
+    return {"user_id": user_id, "query_enhancer": engine or DEFAULT_QUERY_ENHANCER}
+
 @router.get("/v1/intuitive/predict/{user_id}")
 async def get_prediction(user_id: str):
     """
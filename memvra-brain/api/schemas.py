@@ -6,6 +6,11 @@ class FactInput(BaseModel):
     content: str
     tags: Optional[List[str]] = []
 
+class BatchFactInput(BaseModel):
+    facts: List[FactInput]
+    batch_size: Optional[int] = 64  # encoder forward-pass batch size (None: service default)
+
 class DreamInput(BaseModel):
     user_id: str
     facts: Optional[List[str]] = None
+    full: Optional[bool] = False  # refold every fact instead of only those since the last cycle
@@ -3,22 +3,59 @@
 
 from .user_profile import UserProfile
 from .bdh_graph import BDHGraph
+from .embedding_matrix import EmbeddingMatrix
+from .compact_graph import CompactGraph
+from .ann_index import HNSWIndex
+from .hub_tracker import HubTracker
+from .encoding_service import EncodingService
+from .embedding_cache import EmbeddingCache
+from .llm_cache import LLMResultCache
+from .embedding_store import EmbeddingStore, MappedEmbeddingMatrix
+from .persistence import BrainPersistence, WriteAheadLog
+from .memory_store import MemoryStore
+from .execution import ExecutionLayer
 from .trm_compressor import TRMCompressor
-from .llama_service import LlamaService
+from .incremental_dream import IncrementalDreamer
+from .llama_service import LlamaService, AsyncLlamaService
+from .ollama_client import AsyncOllamaClient
+from .circuit_breaker import CircuitBreaker
+from .stream_verifier import StreamingVerifier
+from .citation_verifier import CitationVerifier
 from .temporal_tracker import TemporalTracker
 from .predictive_engine import PredictiveEngine
 from .confidence_manager import ConfidenceManager
 from .bidirectional_learner import BidirectionalLearner
 from .linguistic_profiler import LinguisticProfiler
+from .query_enhancer import LocalQueryEnhancer
 
 __all__ = [
     'UserProfile',
     'BDHGraph',
+    'EmbeddingMatrix',
+    'CompactGraph',
+    'HNSWIndex',
+    'HubTracker',
+    'EncodingService',
+    'EmbeddingCache',
+    'LLMResultCache',
+    'EmbeddingStore',
+    'MappedEmbeddingMatrix',
+    'BrainPersistence',
+    'WriteAheadLog',
+    'MemoryStore',
+    'ExecutionLayer',
     'TRMCompressor',
+    'IncrementalDreamer',
     'LlamaService',
+    'AsyncLlamaService',
+    'AsyncOllamaClient',
+    'CircuitBreaker',
+    'StreamingVerifier',
+    'CitationVerifier',
     'TemporalTracker',
     'PredictiveEngine',
     'ConfidenceManager',
     'BidirectionalLearner',
-    'LinguisticProfiler'
+    'LinguisticProfiler',
+    'LocalQueryEnhancer'
 ]
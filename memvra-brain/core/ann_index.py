@@ -0,0 +1,296 @@
+"""
+ANN Index - Approximate nearest-neighbour search for BDH retrieval
+Hierarchical navigable small-world graph (HNSW-style) in pure Python/NumPy
+"""
+import heapq
+import math
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.embedding_matrix import EmbeddingMatrix
+
+
+class HNSWIndex:
+    """
+    Navigable small-world graph over the rows of an EmbeddingMatrix
+
+    - Upper layers are sparse "express lanes", layer 0 holds every node
+    - Search greedily descends from the entry point: O(log n) hops
+    - Incremental insert and delete (deleted nodes' neighbours are re-linked)
+    - Vectors are not copied; they are read from the backing matrix by id
+    """
+
+    def __init__(
+        self,
+        matrix: EmbeddingMatrix,
+        M: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        seed: int = 42
+    ):
+        self.matrix = matrix
+        self.M = M
+        self.max_links_0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1 / math.log(max(M, 2))
+        self._rng = random.Random(seed)
+
+        # layers[l][node] -> outgoing links, inbound[l][node] -> nodes linking to it
+        self.layers: List[Dict[str, List[str]]] = []
+        self.inbound: List[Dict[str, Set[str]]] = []
+        self.node_levels: Dict[str, int] = {}
+        self.entry_point: Optional[str] = None
+
+        self.stats = {"inserts": 0, "deletes": 0, "searches": 0, "distance_evals": 0}
+
+    def __len__(self) -> int:
+        return len(self.node_levels)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.node_levels
+
+    def _similarities(self, query: np.ndarray, node_ids: List[str]) -> np.ndarray:
+        self.stats["distance_evals"] += len(node_ids)
+        return self.matrix.take(node_ids) @ query
+
+    def _random_level(self) -> int:
+        return int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+
+    def _max_links(self, layer: int) -> int:
+        return self.max_links_0 if layer == 0 else self.M
+
+    def _link(self, layer: int, source: str, target: str):
+        self.layers[layer][source].append(target)
+        self.inbound[layer][target].add(source)
+
+    def _unlink(self, layer: int, source: str, target: str):
+        self.layers[layer][source].remove(target)
+        self.inbound[layer][target].discard(source)
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry_points: List[Tuple[float, str]],
+        ef: int,
+        layer: int
+    ) -> List[Tuple[float, str]]:
+        """Best-first search within one layer, returns (similarity, id) best first"""
+        visited = {node for _, node in entry_points}
+        candidates = [(-sim, node) for sim, node in entry_points]
+        heapq.heapify(candidates)
+        results = list(entry_points)
+        heapq.heapify(results)  # min-heap: worst result on top
+
+        links = self.layers[layer]
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_sim < results[0][0]:
+                break
+
+            neighbours = [n for n in links.get(node, ()) if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+
+            for neighbour, sim in zip(neighbours, self._similarities(query, neighbours)):
+                sim = float(sim)
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbour))
+                    heapq.heappush(results, (sim, neighbour))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _descend(self, query: np.ndarray, target_layer: int) -> List[Tuple[float, str]]:
+        """Greedy walk from the entry point down to target_layer"""
+        entry = self.entry_point
+        best = [(float(self._similarities(query, [entry])[0]), entry)]
+        for layer in range(self.node_levels[entry], target_layer, -1):
+            best = self._search_layer(query, best, 1, layer)[:1]
+        return best
+
+    def _select_neighbours(self, candidates: List[Tuple[float, str]], max_links: int) -> List[str]:
+        """
+        HNSW neighbour heuristic over (similarity to the base, id) pairs:
+        a candidate is kept only if it is closer to the base than to every
+        neighbour kept so far, so links also span towards other clusters
+        instead of all pointing into the base's own one
+        """
+        ordered = sorted(candidates, reverse=True)
+        vectors = self.matrix.take([node for _, node in ordered])
+        self.stats["distance_evals"] += len(ordered)
+        selected: List[int] = []
+        for i, (sim, _) in enumerate(ordered):
+            if len(selected) == max_links:
+                break
+            if not selected or float(np.max(vectors[selected] @ vectors[i])) < sim:
+                selected.append(i)
+        return [ordered[i][1] for i in selected]
+
+    def _shrink(self, node_id: str, layer: int):
+        """Re-select a node's links with the heuristic once it exceeds its link budget"""
+        links = self.layers[layer][node_id]
+        max_links = self._max_links(layer)
+        if len(links) <= max_links:
+            return
+        sims = self._similarities(self.matrix.take([node_id])[0], links)
+        keep = set(self._select_neighbours(list(zip(sims.tolist(), links)), max_links))
+        for target in [n for n in links if n not in keep]:
+            self._unlink(layer, node_id, target)
+
+    def insert(self, node_id: str):
+        """Insert a node whose vector is already in the backing matrix"""
+        if node_id in self.node_levels:
+            # Vector was overwritten -> re-link from scratch
+            self.delete(node_id)
+
+        query = self.matrix.take([node_id])[0]
+        level = self._random_level()
+        self.node_levels[node_id] = level
+        while len(self.layers) <= level:
+            self.layers.append({})
+            self.inbound.append({})
+        for layer in range(level + 1):
+            self.layers[layer][node_id] = []
+            self.inbound[layer][node_id] = set()
+        self.stats["inserts"] += 1
+
+        if self.entry_point is None:
+            self.entry_point = node_id
+            return
+
+        top = self.node_levels[self.entry_point]
+        entry = self._descend(query, min(level, top))
+        for layer in range(min(level, top), -1, -1):
+            found = [
+                (sim, n) for sim, n in self._search_layer(query, entry, self.ef_construction, layer)
+                if n != node_id
+            ]
+            for neighbour in self._select_neighbours(found, self.M):
+                self._link(layer, node_id, neighbour)
+                self._link(layer, neighbour, node_id)
+                self._shrink(neighbour, layer)
+            entry = found or entry
+
+        if level > top:
+            self.entry_point = node_id
+
+    def delete(self, node_id: str) -> bool:
+        """
+        Remove a node and re-link the nodes that pointed at it
+        Must run before the vector is removed from the backing matrix
+        """
+        level = self.node_levels.pop(node_id, None)
+        if level is None:
+            return False
+
+        for layer in range(level + 1):
+            outgoing = self.layers[layer].pop(node_id)
+            incoming = self.inbound[layer].pop(node_id)
+            for target in outgoing:
+                self.inbound[layer][target].discard(node_id)
+            for source in incoming:
+                self.layers[layer][source].remove(node_id)
+                # Repair: offer the deleted node's neighbours as replacements
+                current = self.layers[layer][source]
+                for candidate in outgoing:
+                    if candidate != source and candidate not in current:
+                        self._link(layer, source, candidate)
+                self._shrink(source, layer)
+
+        if self.entry_point == node_id:
+            self.entry_point = max(self.node_levels, key=self.node_levels.get) if self.node_levels else None
+        while self.layers and not self.layers[-1]:
+            self.layers.pop()
+            self.inbound.pop()
+
+        self.stats["deletes"] += 1
+        return True
+
+    def search(self, query_vector: np.ndarray, top_k: int = 5, ef: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Approximate top-k (id, similarity) pairs, highest first"""
+        if self.entry_point is None or top_k <= 0:
+            return []
+        self.stats["searches"] += 1
+
+        query = EmbeddingMatrix.normalize(query_vector).reshape(-1)
+        entry = self._descend(query, 0)
+        found = self._search_layer(query, entry, max(ef or self.ef_search, top_k), 0)
+        return [(node, sim) for sim, node in found[:top_k]]
+
+    def export_state(self) -> Dict:
+        """Link structure as arrays (node positions instead of ids) for snapshots"""
+        nodes = list(self.node_levels)
+        position = {node: i for i, node in enumerate(nodes)}
+        layers = []
+        for links in self.layers:
+            sources = [node for node in nodes if node in links]
+            indptr = np.zeros(len(sources) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(links[node]) for node in sources])
+            targets = [position[t] for node in sources for t in links[node]]
+            layers.append({
+                "sources": np.array([position[node] for node in sources], dtype=np.int64),
+                "indptr": indptr,
+                "targets": np.array(targets, dtype=np.int64)
+            })
+        return {
+            "nodes": nodes,
+            "levels": np.array([self.node_levels[node] for node in nodes], dtype=np.int32),
+            "entry_point": self.entry_point,
+            "layers": layers,
+            "rng_state": self._rng.getstate()
+        }
+
+    def load_state(self, state: Dict):
+        """Restore links from export_state(); vectors must already be in the matrix"""
+        nodes = state["nodes"]
+        self.node_levels = dict(zip(nodes, (int(level) for level in state["levels"])))
+        self.entry_point = state["entry_point"]
+        if state.get("rng_state"):
+            version, internal, gauss = state["rng_state"]
+            self._rng.setstate((version, tuple(internal), gauss))
+        self.layers, self.inbound = [], []
+        for layer in state["layers"]:
+            links: Dict[str, List[str]] = {}
+            inbound: Dict[str, Set[str]] = {}
+            indptr, targets = layer["indptr"], layer["targets"]
+            for i, source in enumerate(layer["sources"]):
+                node = nodes[source]
+                links[node] = [nodes[t] for t in targets[indptr[i]:indptr[i + 1]]]
+                inbound.setdefault(node, set())
+                for target in links[node]:
+                    inbound.setdefault(target, set()).add(node)
+            self.layers.append(links)
+            self.inbound.append(inbound)
+
+    def measure_recall(self, queries: np.ndarray, top_k: int = 10) -> Dict:
+        """Recall@k of this index against exact search on the backing matrix"""
+        queries = np.atleast_2d(queries)
+        if not len(queries) or not len(self):
+            return {"recall_at_k": None, "top_k": top_k, "queries": 0}
+
+        evals_before = self.stats["distance_evals"]
+        hits = total = 0
+        for query in queries:
+            exact = {node for node, _ in self.matrix.search(query, top_k)}
+            approx = {node for node, _ in self.search(query, top_k)}
+            hits += len(exact & approx)
+            total += len(exact)
+
+        return {
+            "recall_at_k": hits / total if total else None,
+            "top_k": top_k,
+            "queries": len(queries),
+            "avg_distance_evals": (self.stats["distance_evals"] - evals_before) / len(queries),
+            "size": len(self)
+        }
+
+
+# Registered ANN backends (BDHGraph(index_backend=...)), "exact" = matrix scan only
+ANN_BACKENDS = {
+    "hnsw": HNSWIndex
+}
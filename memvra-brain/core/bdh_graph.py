@@ -1,13 +1,29 @@
 """
 BDH Graph - Scale-Free Network for Memory Storage
-Implements hierarchical compression with O(log n) retrieval
+Implements hierarchical compression with O(log n) retrieval (HNSW-backed for large users)
 """
-import networkx as nx
+import heapq
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+import time
+
+from core.embedding_matrix import EmbeddingMatrix
+from core.compact_graph import CompactGraph
+from core.ann_index import ANN_BACKENDS
+from core.hub_tracker import HubTracker
+from core.encoding_service import EncodingService
+from core.embedding_cache import EmbeddingCache
+from core.embedding_store import EmbeddingStore, MappedEmbeddingMatrix
+
+
+def _detached(value):
+    """One-level copy of a record field (e.g. metadata is updated in place)"""
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
 
 
 class BDHGraph:
@@ -21,27 +37,95 @@ class BDHGraph:
     - O(log n) retrieval through hub nodes
     """
     
-    def __init__(self, embedding_model: str = "all-MiniLM-L6-v2"):
-        # Initialize graph structure
-        self.graph = nx.Graph()
+    def __init__(
+        self,
+        embedding_model: str = "all-MiniLM-L6-v2",
+        index_backend: str = "hnsw",
+        ann_min_size: int = 2000,
+        ann_params: Optional[Dict] = None,
+        encoder_batch_size: int = 64,
+        encoder_max_wait_ms: float = 2.0,
+        embedding_cache_mb: float = 64,
+        embedding_cache_ttl: Optional[float] = None,
+        embedding_cache_path: Optional[str] = None,
+        embedding_precision: str = "float32",
+        embedding_store_dir: Optional[str] = None
+    ):
+        # Initialize graph structure (array-backed adjacency, to_networkx() for debugging)
+        self.graph = CompactGraph()
         
-        # Embedding model for semantic similarity
-        self.encoder = SentenceTransformer(embedding_model)
+        # Embedding model for semantic similarity, behind a micro-batcher
+        # that coalesces concurrent encode calls into one forward pass
+        # and an LRU/TTL cache for repeated texts (embedding_cache_mb=0 disables)
+        embedding_cache = EmbeddingCache(
+            max_bytes=int(embedding_cache_mb * 1024 * 1024),
+            ttl_seconds=embedding_cache_ttl,
+            persist_path=embedding_cache_path,
+            namespace=embedding_model
+        ) if embedding_cache_mb > 0 else None
+        self.encoder = EncodingService(
+            SentenceTransformer(embedding_model),
+            max_batch_size=encoder_batch_size,
+            max_wait_ms=encoder_max_wait_ms,
+            cache=embedding_cache
+        )
         
         # Hierarchical levels (Bicameral Architecture)
         self.levels = {
-            0: {},  # Observation (Fact) -> {content, embedding, metadata}
+            0: {},  # Observation (Fact) -> {content, metadata} (embedding lives in self.matrices)
             1: {},  # Reflection (Pattern) -> {content, observations_linked, confidence}
             2: {},  # Generalization (Insight) -> {content, reflections_linked, score}
             3: {}   # Psychological Profile -> {traits, beliefs, intents, emotions}
         }
         
-        # Hub nodes (most connected)
-        self.hubs = set()
+        # Secondary index (user_id, level) -> node ids in creation order
+        # (insertion-ordered dict used as an ordered set), kept in sync by
+        # _store_record / _drop_record so per-user work never scans all users
+        self.user_nodes: Dict[Tuple[str, int], Dict[str, None]] = {}
+        
+        # Contiguous pre-normalized embeddings per (user_id, level)
+        # Retrieval scores a whole matrix with one mat-vec product
+        # float32 | float16 | int8 (per-vector scale, ~4x more facts per GB)
+        self.matrices: Dict[Tuple[str, int], EmbeddingMatrix] = {}
+        self.embedding_precision = embedding_precision
+        
+        # Optional on-disk store: matrices become memory-mapped files so
+        # idle users' vectors are paged out instead of pinned in RAM
+        self.embedding_store = EmbeddingStore(
+            embedding_store_dir, precision=embedding_precision
+        ) if embedding_store_dir else None
+        
+        # Approximate nearest-neighbour indexes, built once a (user, level)
+        # reaches ann_min_size rows; smaller users use exact matrix search
+        if index_backend != "exact" and index_backend not in ANN_BACKENDS:
+            raise ValueError(f"Unknown index backend: {index_backend}")
+        self.index_backend = index_backend
+        self.ann_min_size = ann_min_size
+        self.ann_params = ann_params or {}
+        self.ann_indexes: Dict[Tuple[str, int], object] = {}
+        
+        # Max similarity edges created per new fact (nearest above threshold)
+        # Keeps ingest sub-quadratic even when many facts are near-duplicates
+        self.edge_candidates = 32
+        
+        # Row block size for vectorized bulk edge construction
+        self.edge_block_size = 1024
+        
+        # Hub nodes (most connected), tracked incrementally per user
+        self.hub_trackers: Dict[str, HubTracker] = {}
         
         # Similarity threshold for edge creation
         self.similarity_threshold = 0.7
         
+        # Spreading-activation retrieval budget (retrieve(mode="spreading"))
+        # Expansion stops after spread_max_visits nodes or spread_max_ms
+        self.spread_max_visits = 256
+        self.spread_max_ms = 25.0
+        
+        # Mutation journal (set by BrainPersistence): journal(op, data, embeddings)
+        # is called after encoding and before the change is applied
+        self.journal = None
+        
         print("✓ BDH Graph initialized")
     
     def add_fact(self, fact_id: str, content: str, user_id: str, metadata: Dict = None) -> Dict:
@@ -51,88 +135,429 @@ class BDHGraph:
         """
         # Generate embedding
         embedding = self.encoder.encode(content)
-        
+        self._log("add_fact", {
+            "fact_id": fact_id, "content": content, "user_id": user_id, "metadata": metadata
+        }, embedding)
+        return self._apply_add_fact(fact_id, content, user_id, metadata, embedding=embedding)
+    
+    def _apply_add_fact(self, fact_id: str, content: str, user_id: str, metadata: Dict = None, embedding: np.ndarray = None) -> Dict:
         # Store in Level 0
-        self.levels[0][fact_id] = {
+        self._store_record(0, fact_id, {
             "content": content,
-            "embedding": embedding,
             "user_id": user_id,
             "metadata": metadata or {},
             "level": 0
-        }
+        })
         
         # Add node to graph
-        self.graph.add_node(
+        self._add_node(
             fact_id,
             level=0,
-            user_id=user_id,
-            content_preview=content[:50]
+            user_id=user_id
         )
         
+        self._index_embedding(fact_id, user_id, 0, embedding)
+        
         # Create edges to similar facts (scale-free network)
         self._create_edges(fact_id, embedding, user_id)
         
-        # Update hub nodes
-        self._update_hubs()
-        
         return {"fact_id": fact_id, "connections": self.graph.degree(fact_id)}
+    
+    def add_facts(self, facts: List[Dict], batch_size: Optional[int] = None) -> List[Dict]:
+        """
+        Bulk version of add_fact
+        facts: [{fact_id, content, user_id, metadata}]
+        - One batched encode call for all contents (batch_size: encoder
+          forward-pass batch, default the encoder's max_batch_size)
+        - One matrix append per user
+        - Edges for all new facts in one vectorized pass per user
+        """
+        if not facts:
+            return []
+        
+        embeddings = np.atleast_2d(self.encoder.encode(
+            [fact["content"] for fact in facts],
+            batch_size=batch_size
+        ))
+        self._log("add_facts", {"facts": facts}, embeddings)
+        return self._apply_add_facts(facts, embedding=embeddings)
+    
+    def _apply_add_facts(self, facts: List[Dict], embedding: np.ndarray = None) -> List[Dict]:
+        embeddings = embedding
+        by_user: Dict[str, List[int]] = {}
+        for i, fact in enumerate(facts):
+            fact_id, content, user_id = fact["fact_id"], fact["content"], fact["user_id"]
+            self._store_record(0, fact_id, {
+                "content": content,
+                "user_id": user_id,
+                "metadata": fact.get("metadata") or {},
+                "level": 0
+            })
+            self._add_node(
+                fact_id,
+                level=0,
+                user_id=user_id
+            )
+            by_user.setdefault(user_id, []).append(i)
+        
+        for user_id, positions in by_user.items():
+            key = (user_id, 0)
+            fact_ids = [facts[i]["fact_id"] for i in positions]
+            matrix = self._matrix(user_id, 0)
+            rows = matrix.add_many(fact_ids, embeddings[positions])
+            
+            ann = self.ann_indexes.get(key)
+            if ann is None and self.index_backend != "exact" and len(matrix) >= self.ann_min_size:
+                self._build_ann_index(key)
+            elif ann is not None:
+                for fact_id in fact_ids:
+                    ann.insert(fact_id)
+            
+            # Blocked products beat per-fact ANN probes for whole batches
+            self._add_edges(self._block_edges(matrix, np.asarray(sorted(set(rows)))))
+        
+        return [
+            {"fact_id": fact["fact_id"], "connections": self.graph.degree(fact["fact_id"])}
+            for fact in facts
+        ]
 
     def update_fact_stats(self, fact_id: str, new_stats: Dict):
         """Update fact metadata (e.g., SM-2 scores)"""
+        if fact_id in self.levels[0]:
+            self._log("update_fact_stats", {"fact_id": fact_id, "new_stats": new_stats})
+            self._apply_update_fact_stats(fact_id, new_stats)
+    
+    def _apply_update_fact_stats(self, fact_id: str, new_stats: Dict, embedding: np.ndarray = None):
         if fact_id in self.levels[0]:
             # Update Level 0 storage
             self.levels[0][fact_id]["metadata"].update(new_stats)
             
             # Update Graph Node
             if self.graph.has_node(fact_id):
-                for key, value in new_stats.items():
-                    self.graph.nodes[fact_id][key] = value
+                self.graph.set_attrs(fact_id, new_stats)
 
+    def _store_record(self, level: int, node_id: str, record: Dict):
+        """Insert (or overwrite) a level record and index it under its user"""
+        previous = self.levels[level].get(node_id)
+        if previous is not None and previous["user_id"] != record["user_id"]:
+            self._drop_record(level, node_id)
+        self.levels[level][node_id] = record
+        self.user_nodes.setdefault((record["user_id"], level), {})[node_id] = None
+    
+    def _drop_record(self, level: int, node_id: str) -> Optional[Dict]:
+        """Remove a level record and its index entry, returns the record"""
+        record = self.levels[level].pop(node_id, None)
+        if record is not None:
+            key = (record["user_id"], level)
+            ids = self.user_nodes.get(key)
+            if ids is not None:
+                ids.pop(node_id, None)
+                if not ids:
+                    del self.user_nodes[key]
+        return record
+    
+    def iter_user_nodes(self, user_id: str, level: int = 0):
+        """(node_id, record) pairs of one user's level, in creation order"""
+        records = self.levels[level]
+        for node_id in list(self.user_nodes.get((user_id, level), ())):
+            yield node_id, records[node_id]
+    
+    def count_user_nodes(self, user_id: str, level: Optional[int] = None) -> int:
+        """Nodes a user has at one level (or all levels), O(levels)"""
+        levels = self.levels if level is None else [level]
+        return sum(len(self.user_nodes.get((user_id, l), ())) for l in levels)
+    
+    def _log(self, op: str, data: Dict, embeddings: Optional[np.ndarray] = None):
+        """Journal a mutation (write-ahead) when persistence is attached"""
+        if self.journal is not None:
+            self.journal(op, data, embeddings)
+    
+    def apply(self, op: str, data: Dict, embeddings: Optional[np.ndarray] = None):
+        """Re-apply a journaled mutation with its stored embedding(s), no encoder call"""
+        return getattr(self, f"_apply_{op}")(embedding=embeddings, **data)
+    
+    def _matrix(self, user_id: str, level: int) -> EmbeddingMatrix:
+        """Get or create the embedding matrix for (user_id, level)"""
+        key = (user_id, level)
+        if key not in self.matrices:
+            if self.embedding_store is not None:
+                self.matrices[key] = self.embedding_store.open_matrix(user_id, level)
+                self._drop_orphan_rows(key)
+            else:
+                self.matrices[key] = EmbeddingMatrix(precision=self.embedding_precision)
+        return self.matrices[key]
+    
+    def _drop_orphan_rows(self, key: Tuple[str, int]) -> int:
+        """
+        Remove rows of a reopened on-disk matrix whose node is not in the level
+        (left by a previous process); rows of nodes still to be replayed from
+        the WAL are re-added with their journaled embeddings
+        """
+        matrix = self.matrices[key]
+        records = self.levels[key[1]]
+        orphans = [node_id for node_id in matrix.ids if records.get(node_id, {}).get("user_id") != key[0]]
+        for node_id in orphans:
+            matrix.remove(node_id)
+        if orphans:
+            matrix.compact_header()
+        return len(orphans)
+    
+    def release_idle_matrices(self, idle_seconds: float = 300.0) -> int:
+        """
+        Unmap on-disk matrices not touched for idle_seconds
+        They are re-mapped lazily on the next search or insert
+        """
+        cutoff = time.monotonic() - idle_seconds
+        released = 0
+        for matrix in self.matrices.values():
+            if isinstance(matrix, MappedEmbeddingMatrix) and matrix.is_mapped and matrix.last_access < cutoff:
+                matrix.release()
+                released += 1
+        return released
+    
+    def get_embedding(self, node_id: str, level: int = 0) -> Optional[np.ndarray]:
+        """Normalized float32 embedding of a node (dequantized if needed)"""
+        data = self.levels[level].get(node_id)
+        if data is None:
+            return None
+        matrix = self.matrices.get((data["user_id"], level))
+        return matrix.get(node_id) if matrix is not None else None
+    
+    def _index_embedding(self, node_id: str, user_id: str, level: int, embedding: np.ndarray):
+        """Append (or overwrite) a node's embedding in its per-user matrix and ANN index"""
+        key = (user_id, level)
+        matrix = self._matrix(user_id, level)
+        matrix.add(node_id, embedding)
+        
+        ann = self.ann_indexes.get(key)
+        if ann is not None:
+            ann.insert(node_id)
+        elif self.index_backend != "exact" and len(matrix) >= self.ann_min_size:
+            self._build_ann_index(key)
+    
+    def _unindex_embedding(self, node_id: str, user_id: str, level: int):
+        """Drop a node's embedding from its ANN index and matrix"""
+        key = (user_id, level)
+        ann = self.ann_indexes.get(key)
+        if ann is not None:
+            ann.delete(node_id)  # needs the vector, so before the matrix row goes
+        matrix = self.matrices.get(key)
+        if matrix is not None:
+            matrix.remove(node_id)
+    
+    def _build_ann_index(self, key: Tuple[str, int]):
+        """Bulk-insert an existing matrix into a fresh ANN index"""
+        matrix = self.matrices[key]
+        ann = ANN_BACKENDS[self.index_backend](matrix, **self.ann_params)
+        for node_id in list(matrix.ids):
+            ann.insert(node_id)
+        self.ann_indexes[key] = ann
+        print(f"✓ ANN index built for {key[0]} (level {key[1]}, {len(matrix)} nodes)")
+    
+    def _level_keys(self, user_id: Optional[str], level: int) -> List[Tuple[str, int]]:
+        """Keys of non-empty matrices for a level (one per user, or all users)"""
+        if user_id:
+            matrix = self.matrices.get((user_id, level))
+            return [(user_id, level)] if matrix is not None and len(matrix) else []
+        return [key for key, m in self.matrices.items() if key[1] == level and len(m)]
+    
+    def _search(self, key: Tuple[str, int], query_vector: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Top-k search on one (user, level): ANN when built, exact otherwise"""
+        ann = self.ann_indexes.get(key)
+        if ann is not None:
+            return ann.search(query_vector, top_k)
+        return self.matrices[key].search(query_vector, top_k)
+    
+    def remove_fact(self, fact_id: str) -> bool:
+        """Remove a Level 0 fact from storage, indexes and graph"""
+        if fact_id not in self.levels[0]:
+            return False
+        self._log("remove_fact", {"fact_id": fact_id})
+        return self._apply_remove_fact(fact_id)
+    
+    def _apply_remove_fact(self, fact_id: str, embedding: np.ndarray = None) -> bool:
+        data = self._drop_record(0, fact_id)
+        if data is None:
+            return False
+        self._unindex_embedding(fact_id, data["user_id"], 0)
+        self._remove_node(fact_id)
+        return True
+    
+    def remove_derived_node(self, node_id: str, level: int) -> bool:
+        """Remove a Level 1-3 node (stale pattern, insight or profile) from storage, indexes and graph"""
+        if node_id not in self.levels[level]:
+            return False
+        self._log("remove_derived_node", {"node_id": node_id, "level": level})
+        return self._apply_remove_derived_node(node_id, level)
+    
+    def _apply_remove_derived_node(self, node_id: str, level: int, embedding: np.ndarray = None) -> bool:
+        data = self._drop_record(level, node_id)
+        if data is None:
+            return False
+        self._unindex_embedding(node_id, data["user_id"], level)
+        self._remove_node(node_id)
+        return True
+    
+    def ann_metrics(self, sample_size: int = 50, top_k: int = 10) -> Dict:
+        """
+        Recall@k of each ANN index against exact search
+        Queries are a random sample of the indexed vectors themselves
+        """
+        metrics = {}
+        rng = np.random.default_rng(0)
+        for (user_id, level), ann in self.ann_indexes.items():
+            matrix = self.matrices[(user_id, level)]
+            rows = rng.choice(len(matrix), size=min(sample_size, len(matrix)), replace=False)
+            report = ann.measure_recall(matrix.rows(rows), top_k)
+            report["stats"] = dict(ann.stats)
+            metrics[f"{user_id}:L{level}"] = report
+        return metrics
     
     def _create_edges(self, fact_id: str, embedding: np.ndarray, user_id: str):
         """
         Connect fact to similar facts (same user only)
         Creates scale-free network structure
         """
-        connections = 0
+        candidates = self._edge_candidates(fact_id, embedding, user_id)
+        
+        self._add_edges(
+            (fact_id, other_id, similarity) for other_id, similarity in candidates
+        )
         
-        # Only connect to facts from same user
-        user_facts = [
-            (fid, data) for fid, data in self.levels[0].items()
-            if data["user_id"] == user_id and fid != fact_id
+        return len(candidates)
+    
+    def _edge_candidates(self, fact_id: str, embedding: np.ndarray, user_id: str) -> List[Tuple[str, float]]:
+        """
+        Candidate generation for edges: nearest same-user facts above
+        similarity_threshold, at most edge_candidates of them
+        """
+        key = (user_id, 0)
+        ann = self.ann_indexes.get(key)
+        if ann is not None:
+            # Only the ANN neighbourhood is scored
+            neighbours = ann.search(embedding, self.edge_candidates + 1)
+        else:
+            matrix = self.matrices.get(key)
+            if matrix is None or not len(matrix):
+                return []
+            # One mat-vec over the user's facts, keep only rows above threshold
+            sims = matrix.scores(embedding)
+            above = np.flatnonzero(sims > self.similarity_threshold)
+            if len(above) > self.edge_candidates + 1:
+                above = above[np.argpartition(-sims[above], self.edge_candidates)[:self.edge_candidates + 1]]
+            neighbours = [(matrix.ids[row], float(sims[row])) for row in above]
+        
+        neighbours = [
+            (other_id, similarity) for other_id, similarity in neighbours
+            if other_id != fact_id and similarity > self.similarity_threshold
+            and self.graph.has_node(other_id)
         ]
+        neighbours.sort(key=lambda x: x[1], reverse=True)
+        return neighbours[:self.edge_candidates]
+    
+    def rebuild_edges(self, user_id: str) -> int:
+        """
+        Bulk mode: rebuild a user's whole Level 0 similarity graph
+        Scores facts in row blocks (block x N matrix products) and keeps each
+        fact's nearest neighbours above similarity_threshold
+        """
+        self._log("rebuild_edges", {"user_id": user_id})
+        return self._apply_rebuild_edges(user_id)
+    
+    def _apply_rebuild_edges(self, user_id: str, embedding: np.ndarray = None) -> int:
+        matrix = self.matrices.get((user_id, 0))
+        if matrix is None or not len(matrix):
+            return 0
         
-        for other_id, other_data in user_facts:
-            # Calculate similarity
-            similarity = cosine_similarity(
-                [embedding],
-                [other_data["embedding"]]
-            )[0][0]
-            
-            # Create edge if similar enough
-            if similarity > self.similarity_threshold:
-                self.graph.add_edge(
-                    fact_id,
-                    other_id,
-                    weight=float(similarity)
-                )
-                connections += 1
-        
-        return connections
-    
-    def _update_hubs(self):
-        """Identify hub nodes (highly connected)"""
-        if len(self.graph) == 0:
-            return
+        # Drop existing fact-to-fact edges for this user
+        user_facts = set(matrix.ids)
+        self._remove_edges([
+            (u, v) for u, v in self.graph.edges(matrix.ids)
+            if u in user_facts and v in user_facts
+        ])
         
-        degrees = dict(self.graph.degree())
-        avg_degree = sum(degrees.values()) / len(degrees)
+        edges = self._block_edges(matrix, np.arange(len(matrix)))
+        self._add_edges(edges)
         
-        # Hubs are nodes with degree > 2x average
-        self.hubs = {
-            node for node, degree in degrees.items()
-            if degree > avg_degree * 2
-        }
+        return len({frozenset(edge[:2]) for edge in edges})
+    
+    def _block_edges(self, matrix: EmbeddingMatrix, rows: np.ndarray) -> List[Tuple[str, str, float]]:
+        """
+        Nearest neighbours above similarity_threshold for the given matrix rows,
+        scored against the whole matrix in (block x N) matrix products
+        """
+        k = min(self.edge_candidates, len(matrix) - 1)
+        if k <= 0 or not len(rows):
+            return []
+        
+        edges = []
+        for start in range(0, len(rows), self.edge_block_size):
+            block = rows[start:start + self.edge_block_size]
+            sims = matrix.scores_many(matrix.rows(block))
+            sims[np.arange(len(block)), block] = -np.inf  # no self-loops
+            
+            # Nearest k per row, then threshold
+            cols = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            block_sims = np.take_along_axis(sims, cols, axis=1)
+            hits, picks = np.nonzero(block_sims > self.similarity_threshold)
+            edges.extend(
+                (matrix.ids[block[h]], matrix.ids[c], float(w))
+                for h, c, w in zip(hits, cols[hits, picks], block_sims[hits, picks])
+                if self.graph.has_node(matrix.ids[c])
+            )
+        
+        return edges
+    
+    def _hub_tracker(self, node_id: str) -> HubTracker:
+        """Hub tracker of the user owning a node"""
+        user_id = self.graph.user_of(node_id)
+        if user_id not in self.hub_trackers:
+            self.hub_trackers[user_id] = HubTracker()
+        return self.hub_trackers[user_id]
+    
+    def _add_node(self, node_id: str, level: int, user_id: str, kind: Optional[str] = None):
+        """Add (or update) a graph node and register it with its user's hub tracker"""
+        previous_user = self.graph.user_of(node_id) if self.graph.has_node(node_id) else None
+        if previous_user is not None and previous_user != user_id:
+            self._remove_node(node_id)
+        if self.graph.add_node(node_id, level, user_id, kind):
+            self._hub_tracker(node_id).add_node(node_id)
+    
+    def _add_edges(self, edges, kind: Optional[str] = None):
+        """Add weighted (u, v, weight) edges, updating hub degrees only for new edges"""
+        for u, v, weight in edges:
+            if u == v:
+                continue
+            if self.graph.add_edge(u, v, float(weight), kind):
+                self._hub_tracker(u).change_degree(u, 1)
+                self._hub_tracker(v).change_degree(v, 1)
+    
+    def _remove_edges(self, edges):
+        """Remove (u, v) edges, updating hub degrees"""
+        for u, v in edges:
+            if self.graph.remove_edge(u, v):
+                self._hub_tracker(u).change_degree(u, -1)
+                self._hub_tracker(v).change_degree(v, -1)
+    
+    def _remove_node(self, node_id: str):
+        """Remove a node and its edges from the graph and hub tracker"""
+        if not self.graph.has_node(node_id):
+            return
+        self._remove_edges(list(self.graph.edges([node_id])))
+        self._hub_tracker(node_id).remove_node(node_id)
+        self.graph.remove_node(node_id)
+    
+    @property
+    def hubs(self) -> set:
+        """All hub nodes across users (prefer is_hub / hub_trackers per user)"""
+        return set().union(*(tracker.hubs for tracker in self.hub_trackers.values()))
+    
+    def is_hub(self, node_id: str) -> bool:
+        """Check hub membership in the owning user's hub set"""
+        if not self.graph.has_node(node_id):
+            return False
+        tracker = self.hub_trackers.get(self.graph.user_of(node_id))
+        return tracker is not None and node_id in tracker.hubs
     
     def retrieve(
         self,
@@ -140,85 +565,102 @@ class BDHGraph:
         query_vector: np.ndarray = None,
         user_id: str = None,
         level: int = 2,
-        top_k: int = 5
+        top_k: int = 5,
+        mode: str = "tiered"
     ) -> Dict:
         """
         Multi-level retrieval with automatic fallback
+        (mode="spreading" delegates to spread_retrieve)
         1. Try Level 2 (insights) first - fastest
         2. Fall back to Level 1 (patterns) if confidence < 0.7
         3. Fall back to Level 0 (facts) if confidence < 0.5
         
-        Returns: {facts, level_used, confidence, path}
+        Every level that the fallback can reach is scored once, up front;
+        the thresholds are then applied to the precomputed results
+        
+        Returns: {facts, level_used, confidence, path, timings_ms}
         """
+        if mode == "spreading":
+            return self.spread_retrieve(query=query, query_vector=query_vector, user_id=user_id, top_k=top_k)
+        if mode != "tiered":
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        
+        started = time.perf_counter()
+        timings_ms: Dict[str, float] = {}
+        
         # Generate query embedding if needed
         if query_vector is None and query:
             query_vector = self.encoder.encode(query)
+            timings_ms["encode"] = (time.perf_counter() - started) * 1000
         
-        # Filter to user's data only
-        user_nodes = [
-            node for node in self.graph.nodes()
-            if self.graph.nodes[node].get("user_id") == user_id
-        ] if user_id else list(self.graph.nodes())
+        # Check the user has any data (secondary index, no scan over users)
+        has_data = self.count_user_nodes(user_id) > 0 if user_id else any(self.levels.values())
         
-        if not user_nodes:
+        if not has_data:
             return {
                 "facts": [],
                 "level_used": level,
                 "confidence": 0.0,
-                "path": []
+                "path": [],
+                "timings_ms": timings_ms
             }
         
-        # Try retrieval at requested level
-        results = self._retrieve_at_level(query_vector, user_nodes, level, top_k)
+        query_vector = EmbeddingMatrix.normalize(query_vector).reshape(-1)
         
-        # Automatic fallback
-        if results["confidence"] < 0.7 and level > 1:
-            results = self._retrieve_at_level(query_vector, user_nodes, 1, top_k)
+        # Fused pass: top-k of each reachable level (L0 is also the stand-in for empty levels)
+        scored: Dict[int, Optional[List[Tuple]]] = {}
+        for candidate in sorted({level, min(level, 1), 0}, reverse=True):
+            level_started = time.perf_counter()
+            scored[candidate] = self._score_level(query_vector, user_id, candidate, top_k)
+            timings_ms[f"L{candidate}"] = (time.perf_counter() - level_started) * 1000
         
+        def at_level(candidate: int) -> Dict:
+            # Empty level -> Level 0 results (as the sequential fallback did)
+            if scored[candidate] is None:
+                candidate = 0
+            return self._format_results(candidate, scored[candidate] or [])
+        
+        # Automatic fallback on the precomputed results
+        results = at_level(level)
+        if results["confidence"] < 0.7 and level > 1:
+            results = at_level(1)
         if results["confidence"] < 0.5 and level > 0:
-            results = self._retrieve_at_level(query_vector, user_nodes, 0, top_k)
+            results = at_level(0)
         
+        timings_ms["total"] = (time.perf_counter() - started) * 1000
+        results["timings_ms"] = timings_ms
         return results
     
-    def _retrieve_at_level(
+    def _score_level(
         self,
         query_vector: np.ndarray,
-        user_nodes: List[str],
+        user_id: Optional[str],
         level: int,
         top_k: int
-    ) -> Dict:
-        """Retrieve from specific level"""
-        # Get nodes at this level
-        level_nodes = [
-            node for node in user_nodes
-            if self.graph.nodes[node].get("level", 0) == level
-        ]
+    ) -> Optional[List[Tuple[str, float, Dict]]]:
+        """
+        Top-k (node_id, similarity, data) at one level (ANN index or one
+        mat-vec + argpartition per user); None if the level has no data
+        """
+        keys = self._level_keys(user_id, level)
+        if not keys:
+            return None
         
-        if not level_nodes:
-            # No data at this level, use Level 0
-            level_nodes = [
-                node for node in user_nodes
-                if self.graph.nodes[node].get("level", 0) == 0
-            ]
-            level = 0
-        
-        # Calculate similarities
-        similarities = []
-        for node_id in level_nodes:
-            data = self.levels[level].get(node_id)
-            if data and "embedding" in data:
-                sim = cosine_similarity(
-                    [query_vector],
-                    [data["embedding"]]
-                )[0][0]
-                similarities.append((node_id, sim, data))
-        
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        
-        # Get top k
-        top_results = similarities[:top_k]
+        # Score each (user, level) and merge the per-user top-k
+        candidates = []
+        for key in keys:
+            candidates.extend(self._search(key, query_vector, top_k))
+        candidates.sort(key=lambda x: x[1], reverse=True)
         
+        records = self.levels[level]
+        return [
+            (node_id, sim, records[node_id])
+            for node_id, sim in candidates[:top_k]
+            if node_id in records
+        ]
+    
+    def _format_results(self, level: int, top_results: List[Tuple[str, float, Dict]]) -> Dict:
+        """Retrieval response for one level's scored results"""
         if not top_results:
             return {
                 "facts": [],
@@ -245,6 +687,149 @@ class BDHGraph:
             "path": self._get_retrieval_path(top_results)
         }
     
+    def spread_retrieve(
+        self,
+        query: str = None,
+        query_vector: np.ndarray = None,
+        user_id: str = None,
+        top_k: int = 5,
+        seeds_per_level: int = 4,
+        max_visits: Optional[int] = None,
+        max_ms: Optional[float] = None,
+        decay: float = 0.85,
+        fan_out: int = 8,
+        min_activation: float = 0.2
+    ) -> Dict:
+        """
+        Spreading-activation retrieval over the graph (Feature 5)
+        1. Seed with the top ANN hits of every level (activation = similarity)
+        2. Expand the most active node first (priority queue) along hierarchy
+           links (L2 patterns_used -> L1 facts_compressed -> L0) and weighted
+           edges (L3 profile links, L0 similarity); hubs expand 2x fan_out
+        3. Stop after max_visits nodes or max_ms, whichever comes first
+        
+        Facts are ranked by max(own similarity, activation received), so a
+        fact reached through a relevant pattern can outrank a weak direct hit
+        
+        Returns: {facts, level_used, confidence, path, visited, budget_exhausted, timings_ms}
+        path is the traversal in visit order: {node, level, type, via, link, activation}
+        """
+        max_visits = self.spread_max_visits if max_visits is None else max_visits
+        max_ms = self.spread_max_ms if max_ms is None else max_ms
+        started = time.perf_counter()
+        timings_ms: Dict[str, float] = {}
+        
+        if query_vector is None and query:
+            query_vector = self.encoder.encode(query)
+            timings_ms["encode"] = (time.perf_counter() - started) * 1000
+        
+        result = {
+            "facts": [],
+            "level_used": 0,
+            "confidence": 0.0,
+            "path": [],
+            "visited": 0,
+            "budget_exhausted": None,
+            "timings_ms": timings_ms
+        }
+        has_data = self.count_user_nodes(user_id) > 0 if user_id else any(self.levels.values())
+        if not has_data:
+            return result
+        
+        query_vector = EmbeddingMatrix.normalize(query_vector).reshape(-1)
+        
+        # Seeds: (-activation, tiebreak, node_id, level, via, link)
+        seeding_started = time.perf_counter()
+        queue: List[Tuple] = []
+        best: Dict[str, float] = {}
+        for level in (3, 2, 1, 0):
+            for node_id, sim, _ in self._score_level(query_vector, user_id, level, seeds_per_level) or []:
+                if sim > best.get(node_id, -1.0):
+                    best[node_id] = sim
+                    heapq.heappush(queue, (-sim, len(best), node_id, level, None, "seed"))
+        timings_ms["seed"] = (time.perf_counter() - seeding_started) * 1000
+        
+        spreading_started = time.perf_counter()
+        deadline = started + max_ms / 1000
+        visited = set()
+        path = []
+        fact_scores: Dict[str, float] = {}
+        pushes = len(queue)
+        while queue:
+            if len(path) >= max_visits:
+                result["budget_exhausted"] = "visits"
+                break
+            if time.perf_counter() >= deadline:
+                result["budget_exhausted"] = "latency"
+                break
+            
+            negative_activation, _, node_id, level, via, link = heapq.heappop(queue)
+            if node_id in visited:
+                continue
+            record = self.levels[level].get(node_id)
+            if record is None:
+                continue
+            visited.add(node_id)
+            activation = -negative_activation
+            hub = self.is_hub(node_id)
+            path.append({
+                "node": node_id,
+                "level": level,
+                "type": "hub" if hub else "regular",
+                "via": via,
+                "link": link,
+                "activation": float(activation)
+            })
+            
+            if level == 0:
+                embedding = self.get_embedding(node_id, 0)
+                similarity = float(embedding @ query_vector) if embedding is not None else 0.0
+                fact_scores[node_id] = max(similarity, activation)
+            
+            for neighbour, neighbour_level, weight, neighbour_link in self._spread_links(
+                node_id, level, record, fan_out * 2 if hub else fan_out
+            ):
+                spread = activation * weight * decay
+                if spread < min_activation or neighbour in visited or spread <= best.get(neighbour, -1.0):
+                    continue
+                best[neighbour] = spread
+                pushes += 1
+                heapq.heappush(queue, (-spread, pushes, neighbour, neighbour_level, node_id, neighbour_link))
+        timings_ms["spread"] = (time.perf_counter() - spreading_started) * 1000
+        
+        ranked = sorted(fact_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+        if ranked:
+            result.update(self._format_results(0, [
+                (node_id, score, self.levels[0][node_id]) for node_id, score in ranked
+            ]))
+        result["path"] = path
+        result["visited"] = len(path)
+        timings_ms["total"] = (time.perf_counter() - started) * 1000
+        return result
+    
+    def _spread_links(self, node_id: str, level: int, record: Dict, fan_out: int) -> List[Tuple[str, int, float, str]]:
+        """Outgoing (node_id, level, weight, link) for spreading activation"""
+        links = []
+        
+        # Hierarchy: an insight activates its patterns, a pattern its facts
+        if level in (1, 2):
+            field = "facts_compressed" if level == 1 else "patterns_used"
+            children = self.levels[level - 1]
+            links.extend(
+                (child, level - 1, 1.0, field)
+                for child in record.get(field, ())
+                if isinstance(child, str) and child in children
+            )
+        
+        # Weighted graph edges (similarity, profile links), strongest first
+        if node_id in self.graph:
+            edges = sorted(self.graph.neighbours(node_id), key=lambda x: x[1], reverse=True)[:fan_out]
+            links.extend(
+                (neighbour, self.graph.node(neighbour).level, float(weight), "edge")
+                for neighbour, weight in edges
+            )
+        return links
+    
     def _get_retrieval_path(self, results: List[Tuple]) -> List[Dict]:
         """Generate explanation path for retrieval (Feature 5)"""
         if not results:
@@ -253,7 +838,7 @@ class BDHGraph:
         path = []
         for node_id, similarity, _ in results:
             # Get path through graph
-            if node_id in self.hubs:
+            if self.is_hub(node_id):
                 path.append({
                     "node": node_id,
                     "type": "hub",
@@ -271,98 +856,267 @@ class BDHGraph:
     def add_pattern(self, pattern_id: str, pattern: str, facts_compressed: List[str], confidence: float, user_id: str):
         """Add compressed pattern to Level 1 (TRM output)"""
         embedding = self.encoder.encode(pattern)
-        
-        self.levels[1][pattern_id] = {
+        self._log("add_pattern", {
+            "pattern_id": pattern_id, "pattern": pattern, "facts_compressed": facts_compressed,
+            "confidence": confidence, "user_id": user_id
+        }, embedding)
+        self._apply_add_pattern(pattern_id, pattern, facts_compressed, confidence, user_id, embedding=embedding)
+    
+    def _apply_add_pattern(self, pattern_id: str, pattern: str, facts_compressed: List[str], confidence: float, user_id: str, embedding: np.ndarray = None):
+        self._store_record(1, pattern_id, {
             "content": pattern,
-            "embedding": embedding,
             "facts_compressed": facts_compressed,
             "confidence": confidence,
             "user_id": user_id,
             "level": 1
-        }
+        })
+        self._index_embedding(pattern_id, user_id, 1, embedding)
         
-        self.graph.add_node(
+        self._add_node(
             pattern_id,
             level=1,
-            user_id=user_id,
-            content_preview=pattern[:50]
+            user_id=user_id
         )
     
     def add_insight(self, insight_id: str, insight: str, patterns_used: List[str], score: float, user_id: str):
         """Add meta-insight to Level 2 (TRM synthesis)"""
         embedding = self.encoder.encode(insight)
-        
-        self.levels[2][insight_id] = {
+        self._log("add_insight", {
+            "insight_id": insight_id, "insight": insight, "patterns_used": patterns_used,
+            "score": score, "user_id": user_id
+        }, embedding)
+        self._apply_add_insight(insight_id, insight, patterns_used, score, user_id, embedding=embedding)
+    
+    def _apply_add_insight(self, insight_id: str, insight: str, patterns_used: List[str], score: float, user_id: str, embedding: np.ndarray = None):
+        self._store_record(2, insight_id, {
             "content": insight,
-            "embedding": embedding,
             "patterns_used": patterns_used,
             "score": score,
             "user_id": user_id,
             "level": 2
-        }
+        })
+        self._index_embedding(insight_id, user_id, 2, embedding)
         
-        self.graph.add_node(
+        self._add_node(
             insight_id,
             level=2,
-            user_id=user_id,
-            content_preview=insight[:50]
+            user_id=user_id
         )
     def add_psychological_profile(self, user_id: str, profile_data: Dict):
         """
         Add/Update Psychological Profile (Level 3)
         Theory of Mind modeling: Beliefs, Intents, Emotions
         """
-        profile_id = f"profile_{user_id}"
-        
-        # Create rich content representation for embedding
+        embedding = self.encoder.encode(self._profile_content(profile_data))
+        self._log("add_psychological_profile", {"user_id": user_id, "profile_data": profile_data}, embedding)
+        self._apply_add_psychological_profile(user_id, profile_data, embedding=embedding)
+    
+    @staticmethod
+    def _profile_content(profile_data: Dict) -> str:
+        """Rich content representation of a profile for embedding"""
         content_repr = f"User Traits: {', '.join(profile_data.get('traits', []))}. "
         content_repr += f"Beliefs: {', '.join(profile_data.get('beliefs', []))}. "
         content_repr += f"Intents: {', '.join(profile_data.get('intents', []))}."
+        return content_repr
+    
+    def _apply_add_psychological_profile(self, user_id: str, profile_data: Dict, embedding: np.ndarray = None):
+        profile_id = f"profile_{user_id}"
+        content_repr = self._profile_content(profile_data)
         
-        embedding = self.encoder.encode(content_repr)
-        
-        self.levels[3][profile_id] = {
+        self._store_record(3, profile_id, {
             "content": content_repr,
             "raw_data": profile_data,
-            "embedding": embedding,
             "user_id": user_id,
             "level": 3,
             "last_updated": "now" # TODO: Use actual timestamp
-        }
+        })
+        self._index_embedding(profile_id, user_id, 3, embedding)
         
         # Add to graph and connect to User node (conceptual)
-        self.graph.add_node(
+        self._add_node(
             profile_id,
             level=3,
             user_id=user_id,
-            type="psychological_profile",
-            content_preview=content_repr[:50]
+            kind="psychological_profile"
         )
         
         # Connect to top generalizations (Level 2)
         # This links the "Who" (Profile) to the "What" (Generalizations)
-        user_generalizations = [
-            n for n in self.graph.nodes() 
-            if self.graph.nodes[n].get("level") == 2 and self.graph.nodes[n].get("user_id") == user_id
-        ]
+        generalizations = self.matrices.get((user_id, 2))
+        if generalizations is not None and len(generalizations):
+            # Calculate relevance against all generalizations at once
+            sims = generalizations.scores(embedding)
+            self._add_edges(
+                ((profile_id, generalizations.ids[row], sims[row]) for row in np.flatnonzero(sims > 0.6)),
+                kind="profile_link"
+            )
+    
+    def snapshot_state(self) -> Tuple[Dict, Dict[str, np.ndarray]]:
+        """
+        Columnar dump of the whole graph for BrainPersistence snapshots
+        Returns (columns, arrays): JSON-serializable metadata columns and
+        NumPy arrays (vectors, edges, ANN links); nothing is pickled
+        Both are copies detached from the live graph, so they can be
+        serialized after the graph_write lock is released
+        """
+        users: Dict[str, int] = {}
         
-        for gen_id in user_generalizations:
-            # Calculate relevance
-            gen_data = self.levels[2].get(gen_id)
-            if gen_data:
-                sim = cosine_similarity([embedding], [gen_data["embedding"]])[0][0]
-                if sim > 0.6:
-                    self.graph.add_edge(profile_id, gen_id, weight=float(sim), type="profile_link")
+        def user_code(user_id: str) -> int:
+            return users.setdefault(user_id, len(users))
+        
+        columns: Dict = {"levels": {}, "matrices": [], "ann": []}
+        arrays: Dict[str, np.ndarray] = {}
+        
+        for level, records in self.levels.items():
+            ids = list(records)
+            arrays[f"level_{level}_users"] = np.array([user_code(records[i]["user_id"]) for i in ids], dtype=np.int32)
+            columns["levels"][str(level)] = {
+                "ids": ids,
+                "records": [
+                    {k: _detached(v) for k, v in records[i].items() if k not in ("user_id", "level")} for i in ids
+                ]
+            }
+        
+        # Graph: CSR arrays as-is, node level/user columns, kinds and stats sparse
+        nodes, graph_arrays = self.graph.to_arrays()
+        records = [self.graph.node(node) for node in nodes]
+        columns["nodes"] = nodes
+        columns["node_kinds"] = {node: r.kind for node, r in zip(nodes, records) if r.kind is not None}
+        columns["node_extras"] = {node: dict(r.attrs) for node, r in zip(nodes, records) if r.attrs}
+        columns["edge_types"] = list(self.graph.edge_types)
+        arrays["node_levels"] = np.array([r.level for r in records], dtype=np.int8)
+        arrays["node_users"] = np.array([user_code(self.graph.users[r.user]) for r in records], dtype=np.int32)
+        arrays.update({f"graph_{name}": values for name, values in graph_arrays.items()})
+        
+        for i, ((user_id, level), matrix) in enumerate(self.matrices.items()):
+            entry = {"user": user_code(user_id), "level": level, "mapped": isinstance(matrix, MappedEmbeddingMatrix)}
+            if entry["mapped"]:
+                matrix.flush()  # vectors already live in the embedding store
+            else:
+                data, scales = matrix.export_rows()
+                entry["ids"] = list(matrix.ids)
+                arrays[f"matrix_{i}"] = data.copy()
+                if scales is not None:
+                    arrays[f"matrix_{i}_scales"] = scales.copy()
+            entry["key"] = f"matrix_{i}"
+            columns["matrices"].append(entry)
+        
+        for i, ((user_id, level), ann) in enumerate(self.ann_indexes.items()):
+            state = ann.export_state()
+            arrays[f"ann_{i}_levels"] = state["levels"]
+            for layer, links in enumerate(state["layers"]):
+                for name, values in links.items():
+                    arrays[f"ann_{i}_{layer}_{name}"] = values
+            columns["ann"].append({
+                "user": user_code(user_id),
+                "level": level,
+                "nodes": state["nodes"],
+                "entry_point": state["entry_point"],
+                "rng_state": state["rng_state"],
+                "layers": len(state["layers"]),
+                "key": f"ann_{i}"
+            })
+        
+        columns["users"] = list(users)
+        return columns, arrays
+    
+    def restore_state(self, columns: Dict, arrays) -> Dict:
+        """Rebuild the graph from snapshot_state() output (replaces current state)"""
+        users = columns["users"]
+        self.levels = {level: {} for level in self.levels}
+        self.user_nodes = {}
+        for level, column in columns["levels"].items():
+            level = int(level)
+            codes = arrays[f"level_{level}_users"]
+            for node_id, record, code in zip(column["ids"], column["records"], codes.tolist()):
+                self._store_record(level, node_id, {**record, "user_id": users[code], "level": level})
+        
+        self.matrices = {}
+        for entry in columns["matrices"]:
+            user_id, level = users[entry["user"]], entry["level"]
+            if entry["mapped"] and self.embedding_store is not None:
+                # Rows written after the snapshot are dropped on open and re-added by WAL replay
+                matrix = self._matrix(user_id, level)
+            else:
+                if entry["mapped"]:
+                    print(f"⚠ Warning: snapshot vectors for {user_id} L{level} are in an embedding store that is not configured")
+                    continue
+                matrix = self._matrix(user_id, level)
+                matrix.load_rows(entry["ids"], arrays[entry["key"]], arrays.get(f"{entry['key']}_scales"))
+        
+        nodes = columns["nodes"]
+        kinds = columns["node_kinds"]
+        self.graph = CompactGraph()
+        self.graph.load_arrays(
+            nodes, arrays["node_levels"], users, arrays["node_users"], [kinds.get(node) for node in nodes],
+            {name: arrays[f"graph_{name}"] for name in ("indptr", "targets", "weights", "types")}
+        )
+        self.graph.edge_types = columns["edge_types"]
+        for node, attrs in columns["node_extras"].items():
+            self.graph.set_attrs(node, attrs)
+        
+        self.hub_trackers = {}
+        for node, degree in zip(nodes, np.diff(arrays["graph_indptr"]).tolist()):
+            self._hub_tracker(node).add_node(node, degree)
+        
+        self.ann_indexes = {}
+        for entry in columns["ann"]:
+            key = (users[entry["user"]], entry["level"])
+            if key not in self.matrices or self.index_backend not in ANN_BACKENDS:
+                continue
+            prefix = entry["key"]
+            ann = ANN_BACKENDS[self.index_backend](self.matrices[key], **self.ann_params)
+            ann.load_state({
+                "nodes": entry["nodes"],
+                "levels": arrays[f"{prefix}_levels"],
+                "entry_point": entry["entry_point"],
+                "rng_state": entry.get("rng_state"),
+                "layers": [
+                    {name: arrays[f"{prefix}_{layer}_{name}"] for name in ("sources", "indptr", "targets")}
+                    for layer in range(entry["layers"])
+                ]
+            })
+            self.ann_indexes[key] = ann
+        
+        return {
+            "nodes": len(self.graph),
+            "edges": self.graph.number_of_edges(),
+            "matrices": len(self.matrices),
+            "ann_indexes": len(self.ann_indexes)
+        }
+    
+    def to_networkx(self):
+        """Debugging export as an nx.Graph, with content previews from the levels"""
+        graph = self.graph.to_networkx()
+        for node, attrs in graph.nodes(data=True):
+            record = self.levels.get(attrs["level"], {}).get(node)
+            if record is not None:
+                attrs["content_preview"] = record["content"][:50]
+        return graph
+    
+    def get_stats(self) -> Dict:
         """Get graph statistics"""
         return {
-            "total_nodes": len(self.graph.nodes()),
-            "total_edges": len(self.graph.edges()),
+            "total_nodes": len(self.graph),
+            "total_edges": self.graph.number_of_edges(),
+            "graph_bytes": self.graph.nbytes,
             "level_0_facts": len(self.levels[0]),
             "level_1_patterns": len(self.levels[1]),
             "level_2_insights": len(self.levels[2]),
-            "hub_count": len(self.hubs),
-            "avg_degree": sum(dict(self.graph.degree()).values()) / len(self.graph) if len(self.graph) > 0 else 0,
-            "compression_ratio": self._calculate_compression()
+            "hub_count": sum(len(tracker.hubs) for tracker in self.hub_trackers.values()),
+            "avg_degree": sum(t.degree_sum for t in self.hub_trackers.values()) / len(self.graph) if len(self.graph) > 0 else 0,
+            "compression_ratio": self._calculate_compression(),
+            "embedding_precision": self.embedding_precision,
+            "embedding_bytes": sum(m.nbytes for m in self.matrices.values()),
+            "embedding_store": {
+                "root_dir": self.embedding_store.root_dir,
+                "matrices": len(self.matrices),
+                "mapped": sum(1 for m in self.matrices.values() if m.is_mapped)
+            } if self.embedding_store is not None else None,
+            "ann_indexes": {
+                f"{user_id}:L{level}": len(ann) for (user_id, level), ann in self.ann_indexes.items()
+            },
+            "encoder": self.encoder.get_stats()
         }
     
     def _calculate_compression(self) -> float:
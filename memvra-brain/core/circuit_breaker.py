@@ -0,0 +1,128 @@
+"""
+Circuit Breaker - Fail fast while a dependency (Ollama) is down
+closed -> open after consecutive failures, half-open trial after a
+cool-down or a successful background health probe
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Three-state breaker
+
+    - closed: calls go through; failure_threshold consecutive failures open it
+    - open: allow() is False, callers use their fallback immediately;
+      after reset_timeout_s (or a successful probe) it turns half-open
+    - half_open: one trial call at a time; success closes, failure re-opens
+    - run_probe(): background loop calling a health check (e.g.
+      AsyncLlamaService.is_available) so recovery and outages are noticed
+      without spending user requests on them; failed probes count toward
+      failure_threshold like failed calls
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout_s: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.metrics = {
+            "opened": 0,
+            "short_circuited": 0,
+            "successes": 0,
+            "failures": 0,
+            "probes": 0,
+            "last_probe_ok": None
+        }
+
+    def _open(self):
+        if self.state != OPEN:
+            self.metrics["opened"] += 1
+            print(f"⚠ Warning: {self.name} circuit open - using fallbacks")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def _close(self):
+        if self.state != CLOSED:
+            print(f"✓ {self.name} circuit closed")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """May a call go out now? (False means: use the fallback)"""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.metrics["short_circuited"] += 1
+        return False
+
+    def record_success(self):
+        self.metrics["successes"] += 1
+        self._close()
+
+    def record_failure(self):
+        self.metrics["failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def release_trial(self):
+        """A half-open trial ended without a verdict (e.g. cancelled)"""
+        self._trial_in_flight = False
+
+    def record_probe(self, ok: bool):
+        """
+        Health check result
+        Failure counts like a failed call while closed (one flaky probe does
+        not open the breaker), re-opens a half-open breaker and restarts an
+        open one's cool-down; success allows a trial call when open
+        """
+        self.metrics["probes"] += 1
+        self.metrics["last_probe_ok"] = ok
+        if not ok:
+            if self.state == CLOSED:
+                self.record_failure()
+            else:
+                self._open()
+        elif self.state == OPEN:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        elif self.state == CLOSED:
+            self.consecutive_failures = 0
+
+    async def run_probe(self, check: Callable[[], Awaitable[bool]], interval_seconds: float = 5.0):
+        """Background loop: probe every interval_seconds"""
+        while True:
+            try:
+                ok = await check()
+            except Exception:
+                ok = False
+            self.record_probe(ok)
+            await asyncio.sleep(interval_seconds)
+
+    def get_stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_s": time.monotonic() - self.opened_at if self.opened_at is not None else 0.0,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout_s": self.reset_timeout_s,
+            **self.metrics
+        }
@@ -0,0 +1,148 @@
+"""
+Citation Verifier - Deterministic claim/fact support scoring
+Checks [Fact: id] citations and scores each claim against the cited facts
+with sentence embeddings and lexical overlap; only ambiguous claims need the LLM
+"""
+import re
+from typing import Dict, List
+
+import numpy as np
+
+from core.query_enhancer import STOPWORDS, stem
+from core.stream_verifier import CITATION, SentenceSplitter, parse_citations
+
+_WORD = re.compile(r"[A-Za-z0-9']+")
+
+
+class CitationVerifier:
+    """
+    Local replacement for most verify_response LLM calls
+
+    - A claim citing a fact that was not retrieved is unsupported
+    - score = embedding_weight * cosine(claim, fact)
+              + (1 - embedding_weight) * share of the claim's content stems found in the fact,
+      best over the cited facts (all retrieved facts when the claim cites none)
+    - score >= support_threshold: supported; < reject_threshold: unsupported;
+      in between: ambiguous (the caller escalates to the LLM judge)
+    - encoder: EncodingService / SentenceTransformer-like with encode_async
+      (fact embeddings come from its cache); None scores lexically only
+    """
+
+    def __init__(
+        self,
+        encoder=None,
+        embedding_weight: float = 0.5,
+        support_threshold: float = 0.55,
+        reject_threshold: float = 0.25,
+        min_words: int = 4
+    ):
+        self.encoder = encoder
+        self.embedding_weight = embedding_weight if encoder is not None else 0.0
+        self.support_threshold = support_threshold
+        self.reject_threshold = reject_threshold
+        self.min_words = min_words
+        self.metrics = {"claims": 0, "supported": 0, "unsupported": 0, "ambiguous": 0}
+
+    @staticmethod
+    def content_stems(text: str) -> set:
+        words = _WORD.findall(CITATION.sub("", text).lower())
+        return {stem(word) for word in words if word not in STOPWORDS}
+
+    def lexical_support(self, claim: str, fact: str) -> float:
+        """Share of the claim's content stems that appear in the fact"""
+        claim_stems = self.content_stems(claim)
+        if not claim_stems:
+            return 1.0
+        return len(claim_stems & self.content_stems(fact)) / len(claim_stems)
+
+    async def _similarities(self, claim: str, facts: List[Dict]) -> np.ndarray:
+        if self.encoder is None:
+            return np.zeros(len(facts), dtype=np.float32)
+        vectors = np.asarray(await self.encoder.encode_async(
+            [CITATION.sub("", claim).strip()] + [fact.get("content", "") for fact in facts]
+        ), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        return vectors[1:] @ vectors[0]
+
+    def _decide(self, score: float) -> str:
+        if score >= self.support_threshold:
+            return "supported"
+        if score < self.reject_threshold:
+            return "unsupported"
+        return "ambiguous"
+
+    async def check_claim(self, claim: str, facts: List[Dict]) -> Dict:
+        """
+        Score one claim against the facts it cites (or all facts)
+        Returns {supported, reason, status, score, fact_id}
+        """
+        self.metrics["claims"] += 1
+        by_id = {fact.get("fact_id"): fact for fact in facts}
+        cited = parse_citations(claim)
+        unknown = [fact_id for fact_id in cited if fact_id not in by_id]
+        if unknown:
+            self.metrics["unsupported"] += 1
+            return {
+                "supported": False,
+                "reason": f"Cites facts that were not retrieved: {', '.join(unknown)}",
+                "status": "unsupported", "score": 0.0, "fact_id": None
+            }
+
+        candidates = [by_id[fact_id] for fact_id in dict.fromkeys(cited)] or facts
+        if not candidates:
+            self.metrics["unsupported"] += 1
+            return {"supported": False, "reason": "No facts to support the claim", "status": "unsupported", "score": 0.0, "fact_id": None}
+
+        similarities = await self._similarities(claim, candidates)
+        scores = [
+            self.embedding_weight * float(similarity)
+            + (1 - self.embedding_weight) * self.lexical_support(claim, fact.get("content", ""))
+            for similarity, fact in zip(similarities, candidates)
+        ]
+        best = int(np.argmax(scores))
+        status = self._decide(scores[best])
+        self.metrics[status] += 1
+
+        fact_id = candidates[best].get("fact_id")
+        if status == "supported":
+            reason = f"Supported by {fact_id} (score {scores[best]:.2f})"
+        elif status == "unsupported":
+            text = CITATION.sub("", claim).strip()
+            text = text if len(text) <= 80 else text[:77] + "..."
+            reason = f"Claim not found in {'the cited facts' if cited else 'any retrieved fact'}: \"{text}\""
+        else:
+            reason = f"Ambiguous support (score {scores[best]:.2f})"
+        return {
+            "supported": status != "unsupported",
+            "reason": reason,
+            "status": status,
+            "score": scores[best],
+            "fact_id": fact_id
+        }
+
+    async def verify(self, response: str, facts: List[Dict]) -> Dict:
+        """
+        Whole-response check with verify_response's {supported, reason} contract
+        status "ambiguous" (supported=True) lists the claims an LLM should judge
+        """
+        splitter = SentenceSplitter()
+        claims = [
+            sentence for sentence in splitter.feed(response) + splitter.flush()
+            if len(_WORD.findall(CITATION.sub("", sentence))) >= self.min_words
+        ]
+        results = [await self.check_claim(claim, facts) for claim in claims]
+
+        unsupported = [r for r in results if r["status"] == "unsupported"]
+        ambiguous = [claim for claim, r in zip(claims, results) if r["status"] == "ambiguous"]
+        if unsupported:
+            return {"supported": False, "reason": unsupported[0]["reason"], "status": "unsupported", "ambiguous_claims": ambiguous}
+        if ambiguous:
+            return {"supported": True, "reason": f"{len(ambiguous)} claim(s) need review", "status": "ambiguous", "ambiguous_claims": ambiguous}
+        return {"supported": True, "reason": "Every claim is supported by a retrieved fact", "status": "supported", "ambiguous_claims": []}
+
+    def get_stats(self) -> Dict:
+        decided = self.metrics["supported"] + self.metrics["unsupported"]
+        return {
+            **self.metrics,
+            "decided_locally_rate": decided / self.metrics["claims"] if self.metrics["claims"] else 0.0
+        }
@@ -0,0 +1,349 @@
+"""
+Compact Graph - Array-backed undirected weighted graph for BDH
+Integer node ids, CSR-style adjacency with per-node slack and float32
+weights; replaces networkx dicts-of-dicts (~10x less memory per edge)
+"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class NodeRecord:
+    """Per-node attributes; content lives in BDHGraph.levels, not here"""
+    __slots__ = ("level", "user", "kind", "attrs")
+
+    def __init__(self, level: int, user: int, kind: Optional[str] = None):
+        self.level = level
+        self.user = user      # interned user id
+        self.kind = kind      # e.g. "psychological_profile"
+        self.attrs = None     # sparse extras (SM-2 stats), dict when set
+
+
+class InternTable:
+    """string <-> int table; released ints are reused"""
+
+    def __init__(self):
+        self.strings: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self.ids
+
+    def __getitem__(self, i: int) -> str:
+        return self.strings[i]
+
+    def get(self, value: str) -> Optional[int]:
+        return self.ids.get(value)
+
+    def intern(self, value: str) -> int:
+        i = self.ids.get(value)
+        if i is None:
+            if self._free:
+                i = self._free.pop()
+                self.strings[i] = value
+            else:
+                i = len(self.strings)
+                self.strings.append(value)
+            self.ids[value] = i
+        return i
+
+    def release(self, value: str) -> Optional[int]:
+        i = self.ids.pop(value, None)
+        if i is not None:
+            self.strings[i] = None
+            self._free.append(i)
+        return i
+
+
+class CompactGraph:
+    """
+    Undirected weighted graph over interned string node ids
+
+    - Adjacency: each node owns a block [offset, offset + capacity) of the
+      shared targets / weights / types arrays, `length` of it in use
+    - A full block moves to the end of the arrays with doubled capacity;
+      abandoned blocks are reclaimed by compact() once they dominate
+    - Edge types (e.g. "profile_link") are interned to one byte
+    - API mirrors the subset of networkx the BDH code used
+    """
+
+    def __init__(self):
+        self.node_ids = InternTable()
+        self.users = InternTable()
+        self.records: List[Optional[NodeRecord]] = []
+        self.edge_types: List[Optional[str]] = [None]
+
+        self._offset = array("q")
+        self._length = array("i")
+        self._capacity = array("i")
+        self._targets = array("i")
+        self._weights = array("f")
+        self._types = array("b")
+        self._edge_count = 0
+        self._garbage = 0
+
+    # Nodes
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.node_ids
+
+    def has_node(self, node_id: str) -> bool:
+        return node_id in self.node_ids
+
+    def nodes(self) -> Iterator[str]:
+        return iter(self.node_ids.ids)
+
+    def add_node(self, node_id: str, level: int, user_id: str, kind: Optional[str] = None) -> bool:
+        """Add a node (or update its attributes), returns True if it is new"""
+        i = self.node_ids.get(node_id)
+        if i is not None:
+            record = self.records[i]
+            record.level, record.user, record.kind = level, self.users.intern(user_id), kind
+            return False
+
+        i = self.node_ids.intern(node_id)
+        record = NodeRecord(level, self.users.intern(user_id), kind)
+        if i == len(self.records):
+            self.records.append(record)
+            self._offset.append(0)
+            self._length.append(0)
+            self._capacity.append(0)
+        else:
+            self.records[i] = record
+            self._offset[i] = self._length[i] = self._capacity[i] = 0
+        return True
+
+    def node(self, node_id: str) -> NodeRecord:
+        return self.records[self.node_ids.ids[node_id]]
+
+    def user_of(self, node_id: str) -> str:
+        return self.users[self.node(node_id).user]
+
+    def set_attrs(self, node_id: str, attrs: Dict):
+        record = self.node(node_id)
+        if record.attrs is None:
+            record.attrs = {}
+        record.attrs.update(attrs)
+
+    def remove_node(self, node_id: str):
+        """Remove a node and all its edges"""
+        i = self.node_ids.get(node_id)
+        if i is None:
+            return
+        for j in list(self._targets[self._offset[i]:self._offset[i] + self._length[i]]):
+            self._delete(j, i)
+            self._edge_count -= 1
+        self._garbage += self._capacity[i]
+        self._offset[i] = self._length[i] = self._capacity[i] = 0
+        self.records[i] = None
+        self.node_ids.release(node_id)
+
+    # Edges
+
+    def _find(self, i: int, j: int) -> int:
+        """Position of j in i's block, -1 if absent"""
+        start = self._offset[i]
+        try:
+            return self._targets.index(j, start, start + self._length[i])
+        except ValueError:
+            return -1
+
+    def _append(self, i: int, j: int, weight: float, kind: int):
+        length, capacity = self._length[i], self._capacity[i]
+        if length == capacity:
+            # Move the block to the end with doubled capacity
+            start = self._offset[i]
+            new_capacity = max(4, capacity * 2)
+            slack = new_capacity - length
+            self._offset[i] = len(self._targets)
+            self._targets.extend(self._targets[start:start + length])
+            self._targets.extend(array("i", bytes(4 * slack)))
+            self._weights.extend(self._weights[start:start + length])
+            self._weights.extend(array("f", bytes(4 * slack)))
+            self._types.extend(self._types[start:start + length])
+            self._types.extend(array("b", bytes(slack)))
+            self._capacity[i] = new_capacity
+            self._garbage += capacity
+        position = self._offset[i] + length
+        self._targets[position] = j
+        self._weights[position] = weight
+        self._types[position] = kind
+        self._length[i] = length + 1
+
+    def _delete(self, i: int, j: int) -> bool:
+        """Drop j from i's block (swap with the block's last entry)"""
+        position = self._find(i, j)
+        if position < 0:
+            return False
+        last = self._offset[i] + self._length[i] - 1
+        self._targets[position] = self._targets[last]
+        self._weights[position] = self._weights[last]
+        self._types[position] = self._types[last]
+        self._length[i] -= 1
+        return True
+
+    def _edge_type(self, kind: Optional[str]) -> int:
+        if kind not in self.edge_types:
+            self.edge_types.append(kind)
+        return self.edge_types.index(kind)
+
+    def has_edge(self, u: str, v: str) -> bool:
+        i, j = self.node_ids.get(u), self.node_ids.get(v)
+        return i is not None and j is not None and self._find(i, j) >= 0
+
+    def add_edge(self, u: str, v: str, weight: float = 1.0, kind: Optional[str] = None) -> bool:
+        """Add (or re-weight) an edge between existing nodes, returns True if it is new"""
+        i, j = self.node_ids.ids[u], self.node_ids.ids[v]
+        type_code = self._edge_type(kind)
+        position = self._find(i, j)
+        if position >= 0:
+            self._weights[position] = weight
+            self._types[position] = type_code
+            other = self._find(j, i)
+            self._weights[other] = weight
+            self._types[other] = type_code
+            return False
+        self._append(i, j, weight, type_code)
+        self._append(j, i, weight, type_code)
+        self._edge_count += 1
+        if self._garbage > len(self._targets) // 2 and self._garbage > 4096:
+            self.compact()
+        return True
+
+    def remove_edge(self, u: str, v: str) -> bool:
+        i, j = self.node_ids.get(u), self.node_ids.get(v)
+        if i is None or j is None or not self._delete(i, j):
+            return False
+        self._delete(j, i)
+        self._edge_count -= 1
+        return True
+
+    def degree(self, node_id: str) -> int:
+        return self._length[self.node_ids.ids[node_id]]
+
+    def neighbours(self, node_id: str) -> List[Tuple[str, float]]:
+        """(neighbour id, weight) pairs"""
+        i = self.node_ids.ids[node_id]
+        start, stop = self._offset[i], self._offset[i] + self._length[i]
+        strings = self.node_ids.strings
+        return [(strings[j], w) for j, w in zip(self._targets[start:stop], self._weights[start:stop])]
+
+    def number_of_edges(self) -> int:
+        return self._edge_count
+
+    def edges(self, node_ids=None, data: bool = False) -> Iterator[Tuple]:
+        """
+        Each undirected edge once, as (u, v) or (u, v, weight, type)
+        node_ids: only edges touching these nodes (like networkx nbunch)
+        """
+        if node_ids is None:
+            indices = [i for i, record in enumerate(self.records) if record is not None]
+        else:
+            indices = [self.node_ids.ids[n] for n in node_ids if n in self.node_ids]
+        bunch = set(indices)
+        strings = self.node_ids.strings
+        for i in indices:
+            start, stop = self._offset[i], self._offset[i] + self._length[i]
+            for position in range(start, stop):
+                j = self._targets[position]
+                if j in bunch and j < i:
+                    continue  # yielded from j's side
+                if data:
+                    yield strings[i], strings[j], self._weights[position], self.edge_types[self._types[position]]
+                else:
+                    yield strings[i], strings[j]
+
+    # Storage
+
+    def compact(self):
+        """Rewrite adjacency blocks contiguously (exact size + slack of 1)"""
+        targets, weights, types = array("i"), array("f"), array("b")
+        for i, record in enumerate(self.records):
+            if record is None:
+                continue
+            start, length = self._offset[i], self._length[i]
+            self._offset[i] = len(targets)
+            self._capacity[i] = length + 1
+            targets.extend(self._targets[start:start + length])
+            targets.append(0)
+            weights.extend(self._weights[start:start + length])
+            weights.append(0.0)
+            types.extend(self._types[start:start + length])
+            types.append(0)
+        self._targets, self._weights, self._types = targets, weights, types
+        self._garbage = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the graph (arrays, records, intern tables)"""
+        arrays = sum(
+            a.itemsize * len(a) for a in (
+                self._offset, self._length, self._capacity, self._targets, self._weights, self._types
+            )
+        )
+        records = 72 * len(self.node_ids)
+        interned = sum(49 + len(s) + 100 for s in self.node_ids.ids)  # string + dict entry
+        return arrays + records + interned
+
+    def to_arrays(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Compact CSR export: (node ids, {indptr, targets, weights, types})"""
+        live = [i for i, record in enumerate(self.records) if record is not None]
+        position = np.full(len(self.records), -1, dtype=np.int64)
+        position[live] = np.arange(len(live))
+
+        offsets = np.frombuffer(self._offset, dtype=np.int64)[live] if live else np.zeros(0, dtype=np.int64)
+        lengths = np.frombuffer(self._length, dtype=np.int32)[live].astype(np.int64) if live else np.zeros(0, dtype=np.int64)
+        indptr = np.zeros(len(live) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        gather = np.repeat(offsets - indptr[:-1], lengths) + np.arange(indptr[-1])
+
+        arrays = {
+            "indptr": indptr,
+            "targets": position[np.frombuffer(self._targets, dtype=np.int32)[gather]].astype(np.int32),
+            "weights": np.frombuffer(self._weights, dtype=np.float32)[gather].copy(),
+            "types": np.frombuffer(self._types, dtype=np.int8)[gather].copy()
+        }
+        return [self.node_ids[i] for i in live], arrays
+
+    def load_arrays(self, node_ids: List[str], levels, users: List[str], user_codes, kinds: List[Optional[str]], arrays):
+        """Replace contents from to_arrays() output plus per-node level/user/kind"""
+        self.__init__()
+        for user_id in users:
+            self.users.intern(user_id)
+        for i, node_id in enumerate(node_ids):
+            self.node_ids.intern(node_id)
+            self.records.append(NodeRecord(int(levels[i]), int(user_codes[i]), kinds[i]))
+
+        indptr = np.asarray(arrays["indptr"], dtype=np.int64)
+        lengths = np.diff(indptr)
+        self._offset = array("q", indptr[:-1].tobytes())
+        self._length = array("i", lengths.astype(np.int32).tobytes())
+        self._capacity = array("i", lengths.astype(np.int32).tobytes())
+        self._targets = array("i", np.asarray(arrays["targets"], dtype=np.int32).tobytes())
+        self._weights = array("f", np.asarray(arrays["weights"], dtype=np.float32).tobytes())
+        self._types = array("b", np.asarray(arrays["types"], dtype=np.int8).tobytes())
+        self._edge_count = int(indptr[-1]) // 2
+
+    def to_networkx(self):
+        """Debugging export as an nx.Graph (networkx imported lazily)"""
+        import networkx as nx
+
+        graph = nx.Graph()
+        for i, record in enumerate(self.records):
+            if record is None:
+                continue
+            attrs = {"level": record.level, "user_id": self.users[record.user]}
+            if record.kind is not None:
+                attrs["type"] = record.kind
+            graph.add_node(self.node_ids[i], **attrs, **(record.attrs or {}))
+        for u, v, weight, kind in self.edges(data=True):
+            graph.add_edge(u, v, weight=weight, **({"type": kind} if kind is not None else {}))
+        return graph
@@ -0,0 +1,166 @@
+"""
+Embedding Cache - LRU + TTL cache for text embeddings
+Skips the encoder for repeated queries, facts and profile texts
+"""
+import atexit
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# Approximate per-entry bookkeeping (key, tuple, OrderedDict node)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by a hash of the normalized text
+
+    - Bounded by total bytes, least-recently-used entries evicted first
+    - Optional TTL per entry
+    - Optional .npz persistence so warm restarts skip the encoder
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None,
+        persist_path: Optional[str] = None,
+        namespace: str = ""
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        # Model name: persisted entries from another model are ignored
+        self.namespace = namespace
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (vector, expires_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Unicode NFC, trimmed, whitespace collapsed"""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(self.normalize(text).encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.time():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text: str, vector: np.ndarray):
+        self._put_key(self.key(text), vector)
+
+    def _put_key(self, key: str, vector: np.ndarray, expires_at: Optional[float] = None):
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)  # shared between callers
+        if expires_at is None and self.ttl_seconds is not None:
+            expires_at = time.time() + self.ttl_seconds
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (vector, expires_at)
+            self.current_bytes += vector.nbytes + _ENTRY_OVERHEAD_BYTES
+            while self.current_bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: str):
+        vector, _ = self._entries.pop(key)
+        self.current_bytes -= vector.nbytes + _ENTRY_OVERHEAD_BYTES
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def save(self, path: Optional[str] = None):
+        """Persist live entries (LRU order) to an .npz file"""
+        path = path or self.persist_path
+        if not path:
+            return
+        now = time.time()
+        with self._lock:
+            items = [
+                (key, vector, expires_at if expires_at is not None else -1.0)
+                for key, (vector, expires_at) in self._entries.items()
+                if expires_at is None or expires_at >= now
+            ]
+        if not items:
+            return
+        keys, vectors, expires = zip(*items)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            namespace=np.array(self.namespace),
+            keys=np.array(keys),
+            vectors=np.stack(vectors),
+            expires=np.array(expires, dtype=np.float64)
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Load persisted entries, returns how many were restored"""
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with np.load(path) as data:
+                if str(data["namespace"]) != self.namespace:
+                    return 0
+                keys, vectors, expires = data["keys"], data["vectors"], data["expires"]
+        except Exception as e:
+            print(f"⚠ Warning: Could not load embedding cache {path} - {e}")
+            return 0
+
+        now = time.time()
+        restored = 0
+        for key, vector, expires_at in zip(keys, vectors, expires):
+            expires_at = None if expires_at < 0 else float(expires_at)
+            if expires_at is not None and expires_at < now:
+                continue
+            self._put_key(str(key), vector, expires_at)
+            restored += 1
+        return restored
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "ttl_seconds": self.ttl_seconds
+        }
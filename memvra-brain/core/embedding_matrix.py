@@ -0,0 +1,234 @@
+"""
+Embedding Matrix - Contiguous vector storage for BDH retrieval
+Keeps one pre-normalized matrix per (user, level) so that scoring
+is a single matrix-vector product instead of a Python loop
+"""
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+# Storage precisions: dtype of the stored rows
+PRECISIONS = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8  # plus one float32 scale per row
+}
+
+
+class EmbeddingMatrix:
+    """
+    Growable, row-addressable matrix of unit-length embeddings
+
+    - Rows are L2-normalized on insert, so dot product == cosine similarity
+    - row <-> id mappings are kept in sync on add / remove
+    - Capacity doubles on growth (amortized O(1) append)
+    - precision: float32 (exact), float16 (2x smaller) or int8 with a
+      per-vector scale (~4x smaller); quantized rows are dequantized in
+      blocks while scoring
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        initial_capacity: int = 64,
+        precision: str = "float32",
+        block_rows: int = 8192
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        self.dim = dim
+        self.precision = precision
+        self.block_rows = block_rows
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._initial_capacity = initial_capacity
+        self._data = None
+        self._scales = None
+        if dim:
+            self._allocate(initial_capacity)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.index
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Populated rows as float32 (a view for float32, a dequantized copy otherwise)"""
+        if self._data is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._dequantize(0, len(self.ids))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by populated rows (and scales)"""
+        if self._data is None:
+            return 0
+        per_row = self._data.itemsize * self.dim + (4 if self._scales is not None else 0)
+        return per_row * len(self.ids)
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize a vector or a batch of row vectors as float32"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _allocate(self, capacity: int):
+        self._data = np.zeros((capacity, self.dim), dtype=PRECISIONS[self.precision])
+        if self.precision == "int8":
+            self._scales = np.zeros(capacity, dtype=np.float32)
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Normalized float32 rows -> stored rows (+ per-row scales for int8)"""
+        if self.precision != "int8":
+            return vectors.astype(PRECISIONS[self.precision]), None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    def _dequantize(self, start: int, stop: int) -> np.ndarray:
+        return self._rows_to_float(self._data[start:stop], None if self._scales is None else self._scales[start:stop])
+
+    def _rows_to_float(self, rows: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        if self.precision == "float32":
+            return rows
+        rows = rows.astype(np.float32)
+        if scales is not None:
+            rows *= scales[:, None]
+        return rows
+
+    def _ensure_capacity(self, needed: int):
+        if self._data is None:
+            self._allocate(max(self._initial_capacity, needed))
+            return
+        capacity = self._data.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        data, scales = self._data, self._scales
+        self._allocate(capacity)
+        self._data[:len(self.ids)] = data[:len(self.ids)]
+        if scales is not None:
+            self._scales[:len(self.ids)] = scales[:len(self.ids)]
+
+    def add(self, item_id: str, vector: np.ndarray) -> int:
+        """Insert (or overwrite) one embedding, returns its row"""
+        return self.add_many([item_id], np.asarray(vector)[None, :])[0]
+
+    def add_many(self, item_ids: List[str], vectors: np.ndarray) -> List[int]:
+        """Insert a batch of embeddings in one copy, returns their rows"""
+        vectors = self.normalize(np.atleast_2d(vectors))
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        self._ensure_capacity(len(self.ids) + len(item_ids))
+
+        # Existing ids (e.g. re-generated patterns) are overwritten in place
+        rows = []
+        for item_id in item_ids:
+            row = self.index.get(item_id)
+            if row is None:
+                row = len(self.ids)
+                self.index[item_id] = row
+                self.ids.append(item_id)
+            rows.append(row)
+
+        quantized, scales = self._quantize(vectors)
+        self._data[rows] = quantized
+        if scales is not None:
+            self._scales[rows] = scales
+
+        return rows
+
+    def remove(self, item_id: str) -> bool:
+        """Remove a row by swapping the last row into its slot"""
+        row = self.index.pop(item_id, None)
+        if row is None:
+            return False
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self._data[row] = self._data[last]
+            if self._scales is not None:
+                self._scales[row] = self._scales[last]
+            self.ids[row] = moved_id
+            self.index[moved_id] = row
+        self.ids.pop()
+        return True
+
+    def export_rows(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Populated rows as stored (quantized) plus int8 scales, for snapshots"""
+        n = len(self.ids)
+        if self._data is None:
+            return np.zeros((0, self.dim or 0), dtype=PRECISIONS[self.precision]), None
+        return self._data[:n], None if self._scales is None else self._scales[:n]
+
+    def load_rows(self, item_ids: List[str], data: np.ndarray, scales: Optional[np.ndarray] = None):
+        """Replace contents with already-stored rows (no re-normalizing or re-quantizing)"""
+        if data.dtype != PRECISIONS[self.precision]:
+            raise ValueError(f"Stored rows are {data.dtype}, matrix precision is {self.precision}")
+        self.ids = list(item_ids)
+        self.index = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.dim = data.shape[1]
+        self._data = None
+        self._ensure_capacity(len(self.ids))
+        self._data[:len(self.ids)] = data
+        if scales is not None:
+            self._scales[:len(self.ids)] = scales
+
+    def get(self, item_id: str) -> Optional[np.ndarray]:
+        """Normalized float32 embedding for an id (copy)"""
+        row = self.index.get(item_id)
+        return None if row is None else self.rows([row])[0].copy()
+
+    def rows(self, rows) -> np.ndarray:
+        """Normalized float32 embeddings for row numbers"""
+        return self._rows_to_float(self._data[rows], None if self._scales is None else self._scales[rows])
+
+    def take(self, item_ids: List[str]) -> np.ndarray:
+        """Normalized float32 embeddings for a list of ids, stacked in order"""
+        return self.rows([self.index[item_id] for item_id in item_ids])
+
+    def scores_many(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Similarity of normalized float32 queries (b x dim) against every row
+        Quantized storage is dequantized block_rows at a time
+        """
+        n = len(self.ids)
+        if not n:
+            return np.zeros((len(queries), 0), dtype=np.float32)
+        if self.precision == "float32":
+            return queries @ self._data[:n].T
+
+        out = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, self.block_rows):
+            stop = min(start + self.block_rows, n)
+            out[:, start:stop] = queries @ self._dequantize(start, stop).T
+        return out
+
+    def scores(self, query_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row"""
+        if not self.ids:
+            return np.zeros(0, dtype=np.float32)
+        query = self.normalize(query_vector).reshape(1, -1)
+        return self.scores_many(query)[0]
+
+    def search(self, query_vector: np.ndarray, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k (id, similarity) pairs, highest first"""
+        return self.top_k(self.scores(query_vector), top_k)
+
+    def top_k(self, scores: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Select top-k rows from precomputed scores via argpartition"""
+        n = len(scores)
+        if n == 0 or top_k <= 0:
+            return []
+        if top_k < n:
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(n)
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in ordered]
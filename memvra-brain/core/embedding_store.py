@@ -0,0 +1,237 @@
+"""
+Embedding Store - Memory-mapped on-disk embedding matrices
+Vectors live in per-user files paged in by the OS on demand, so resident
+memory scales with active users instead of total users
+"""
+import hashlib
+import json
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from core.embedding_matrix import EmbeddingMatrix, PRECISIONS
+
+
+class MappedEmbeddingMatrix(EmbeddingMatrix):
+    """
+    EmbeddingMatrix whose rows are a numpy.memmap over a file
+
+    Files per (user, level) directory:
+    - vectors.bin: rows in the matrix precision (grown by extending the file,
+      existing pages are never copied)
+    - scales.bin: per-row float32 scales (int8 only)
+    - ids.log: append-only header log of row adds/removes, replayed on open
+      into the small in-RAM ids/index
+    - meta.json: dim and precision
+
+    release() drops the mapping and closes ids.log (the header stays in RAM);
+    the next access re-maps the file and the next write reopens the log.
+    """
+
+    def __init__(self, directory: str, precision: str = "float32", initial_capacity: int = 1024, block_rows: int = 8192):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.bin")
+        self._scales_path = os.path.join(directory, "scales.bin")
+        self._ids_path = os.path.join(directory, "ids.log")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._mapped = None
+        self._mapped_scales = None
+        self._capacity = 0
+        self.last_access = time.monotonic()
+
+        super().__init__(dim=None, initial_capacity=initial_capacity, precision=precision, block_rows=block_rows)
+        self._load_header()
+        self._ids_log = None  # opened on the next header write, closed by release()
+
+    # Storage is mapped lazily: base-class code keeps using self._data / self._scales
+    @property
+    def _data(self):
+        self.last_access = time.monotonic()
+        if self._mapped is None and self._capacity:
+            self._map(self._capacity)
+        return self._mapped
+
+    @_data.setter
+    def _data(self, value):
+        self._mapped = value
+
+    @property
+    def _scales(self):
+        if self.precision != "int8":
+            return None
+        if self._mapped_scales is None and self._capacity:
+            self._map(self._capacity)
+        return self._mapped_scales
+
+    @_scales.setter
+    def _scales(self, value):
+        self._mapped_scales = value
+
+    def _load_header(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["precision"] != self.precision:
+                raise ValueError(f"{self.directory} holds {meta['precision']} vectors, not {self.precision}")
+            self.dim = meta["dim"]
+
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    op, item_id = json.loads(line)
+                    if op == "+":
+                        self.index[item_id] = len(self.ids)
+                        self.ids.append(item_id)
+                    else:
+                        self._remove_id(item_id)
+
+        if self.dim and os.path.exists(self._vectors_path):
+            row_bytes = self.dim * np.dtype(PRECISIONS[self.precision]).itemsize
+            self._capacity = os.path.getsize(self._vectors_path) // row_bytes
+
+    def _remove_id(self, item_id: str):
+        """Header-only version of the swap-remove in EmbeddingMatrix.remove"""
+        row = self.index.pop(item_id)
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.ids[row] = moved_id
+            self.index[moved_id] = row
+        self.ids.pop()
+
+    def _write_meta(self):
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "precision": self.precision}, f)
+
+    def _map(self, capacity: int):
+        """(Re)map the files with room for `capacity` rows, extending them if needed"""
+        dtype = np.dtype(PRECISIONS[self.precision])
+        self._extend_file(self._vectors_path, capacity * self.dim * dtype.itemsize)
+        self._mapped = np.memmap(self._vectors_path, dtype=dtype, mode="r+", shape=(capacity, self.dim))
+        if self.precision == "int8":
+            self._extend_file(self._scales_path, capacity * 4)
+            self._mapped_scales = np.memmap(self._scales_path, dtype=np.float32, mode="r+", shape=(capacity,))
+        self._capacity = capacity
+
+    @staticmethod
+    def _extend_file(path: str, size: int):
+        """Grow a file to at least `size` bytes (sparse, zero-filled)"""
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+
+    def _allocate(self, capacity: int):
+        if not os.path.exists(self._meta_path):
+            self._write_meta()
+        self._map(capacity)
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(self._capacity, self._initial_capacity)
+        while capacity < needed:
+            capacity *= 2
+        # Growing the file keeps existing pages in place, no copy
+        self._allocate(capacity)
+
+    def add_many(self, item_ids: List[str], vectors: np.ndarray) -> List[int]:
+        before = len(self.ids)
+        rows = super().add_many(item_ids, vectors)
+        self._append_ids("+", self.ids[before:])
+        return rows
+
+    def remove(self, item_id: str) -> bool:
+        removed = super().remove(item_id)
+        if removed:
+            self._append_ids("-", [item_id])
+        return removed
+
+    def _append_ids(self, op: str, item_ids: List[str]):
+        if self._ids_log is None:
+            self._ids_log = open(self._ids_path, "a", encoding="utf-8")
+        for item_id in item_ids:
+            self._ids_log.write(json.dumps([op, item_id]) + "\n")
+        self._ids_log.flush()
+
+    def _close_ids_log(self):
+        if self._ids_log is not None:
+            self._ids_log.close()
+            self._ids_log = None
+
+    def flush(self):
+        if self._mapped is not None:
+            self._mapped.flush()
+        if self._mapped_scales is not None:
+            self._mapped_scales.flush()
+        if self._ids_log is not None:
+            self._ids_log.flush()
+
+    def release(self):
+        """Flush, unmap and close ids.log; nothing stays resident or open until the next access"""
+        self.flush()
+        self._close_ids_log()
+        self._mapped = None
+        self._mapped_scales = None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of populated rows on disk (does not map the file)"""
+        if not self.dim:
+            return 0
+        per_row = np.dtype(PRECISIONS[self.precision]).itemsize * self.dim + (4 if self.precision == "int8" else 0)
+        return per_row * len(self.ids)
+
+    @property
+    def is_mapped(self) -> bool:
+        return self._mapped is not None
+
+    def compact_header(self):
+        """Rewrite ids.log as one add per live row (drops remove history)"""
+        self._close_ids_log()
+        tmp_path = f"{self._ids_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for item_id in self.ids:
+                f.write(json.dumps(["+", item_id]) + "\n")
+        os.replace(tmp_path, self._ids_path)
+
+
+class EmbeddingStore:
+    """
+    Directory of MappedEmbeddingMatrix files, one set per (user, level)
+    <root>/<sha1(user_id)[:16]>/L<level>/
+    """
+
+    def __init__(self, root_dir: str, precision: str = "float32"):
+        self.root_dir = root_dir
+        self.precision = precision
+        os.makedirs(root_dir, exist_ok=True)
+
+    def path_for(self, user_id: str, level: int) -> str:
+        user_dir = os.path.join(self.root_dir, hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:16])
+        return os.path.join(user_dir, f"L{level}")
+
+    def open_matrix(self, user_id: str, level: int) -> MappedEmbeddingMatrix:
+        directory = self.path_for(user_id, level)
+        user_file = os.path.join(os.path.dirname(directory), "user_id")
+        if not os.path.exists(user_file):
+            os.makedirs(os.path.dirname(directory), exist_ok=True)
+            with open(user_file, "w", encoding="utf-8") as f:
+                f.write(user_id)
+        return MappedEmbeddingMatrix(directory, precision=self.precision)
+
+    def list_matrices(self) -> List[Tuple[str, int]]:
+        """(user_id, level) pairs present on disk"""
+        found = []
+        for user_dir in sorted(os.listdir(self.root_dir)):
+            user_file = os.path.join(self.root_dir, user_dir, "user_id")
+            if not os.path.exists(user_file):
+                continue
+            with open(user_file, "r", encoding="utf-8") as f:
+                user_id = f.read()
+            for entry in sorted(os.listdir(os.path.join(self.root_dir, user_dir))):
+                if entry.startswith("L") and entry[1:].isdigit():
+                    found.append((user_id, int(entry[1:])))
+        return found
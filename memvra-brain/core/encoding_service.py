@@ -0,0 +1,191 @@
+"""
+Encoding Service - Micro-batching front for the sentence encoder
+Coalesces concurrent encode calls into one batched forward pass
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from core.embedding_cache import EmbeddingCache
+
+
+class EncodingService:
+    """
+    Drop-in replacement for SentenceTransformer.encode
+
+    - Callers (any thread) enqueue texts and wait on a future
+    - One worker thread collects requests for up to max_wait_ms or
+      max_batch_size texts, runs a single model.encode and resolves each
+      caller's future with its slice
+    - Tracks achieved batch sizes and queue wait
+    - Optional EmbeddingCache: cached texts never reach the queue
+    - batch_size (per call) caps the forward-pass batch of the texts it
+      is coalesced with (smaller batches for large bulk inputs)
+    - Cancelled callers are dropped from the batch; a failing batch fails
+      only its own callers, never the worker thread
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        self.model = model
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "largest_batch": 0,
+            "queue_wait_s": 0.0,
+            "encode_s": 0.0
+        }
+        self.batch_histogram: Counter = Counter()
+
+        self._worker = threading.Thread(target=self._run, name="encoding-service", daemon=True)
+        self._worker.start()
+
+    def submit(self, sentences: Union[str, List[str]], batch_size: Optional[int] = None) -> Future:
+        """Queue texts for encoding, returns a future of the embedding(s)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        if self.cache is None:
+            self._queue.put((texts, single, future, time.perf_counter(), batch_size))
+            return future
+
+        embeddings = [self.cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(embeddings) if vector is None]
+        if not missing:
+            future.set_result(embeddings[0] if single else np.stack(embeddings))
+            return future
+
+        # Only cache misses go to the encoder
+        pending: Future = Future()
+
+        def complete(done: Future):
+            try:
+                encoded = done.result()
+            except Exception as e:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+                return
+            for i, vector in zip(missing, encoded):
+                self.cache.put(texts[i], vector)
+                embeddings[i] = vector
+            # The vectors stay cached even if the caller cancelled meanwhile
+            if future.set_running_or_notify_cancel():
+                future.set_result(embeddings[0] if single else np.stack(embeddings))
+
+        pending.add_done_callback(complete)
+        self._queue.put(([texts[i] for i in missing], False, pending, time.perf_counter(), batch_size))
+        return future
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        """
+        Blocking encode with SentenceTransformer semantics (str -> 1-D, list -> 2-D)
+        batch_size: forward-pass batch size (default max_batch_size)
+        """
+        return self.submit(sentences, batch_size).result()
+
+    async def encode_async(self, sentences: Union[str, List[str]], batch_size: Optional[int] = None) -> np.ndarray:
+        """Awaitable encode for async callers"""
+        return await asyncio.wrap_future(self.submit(sentences, batch_size))
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            try:
+                count = len(jobs[0][0])
+                deadline = time.perf_counter() + self.max_wait
+
+                # Coalesce whatever arrives within the wait window
+                while count < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    try:
+                        job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    jobs.append(job)
+                    count += len(job[0])
+
+                self._run_batch(jobs)
+            except Exception as e:
+                # The worker must outlive any one batch: fail its callers, keep serving
+                print(f"⚠ Warning: Encoding batch failed: {e}")
+                for _, _, future, _, _ in jobs:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, jobs: List):
+        # Drop callers that cancelled while queued (e.g. a request timeout);
+        # the remaining futures are RUNNING and can no longer be cancelled
+        jobs = [job for job in jobs if job[2].set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        texts = [text for job in jobs for text in job[0]]
+        # The smallest batch_size any caller asked for bounds the forward passes
+        batch_size = min([job[4] for job in jobs if job[4]] or [self.max_batch_size])
+        started = time.perf_counter()
+        try:
+            embeddings = np.atleast_2d(self.model.encode(texts, batch_size=batch_size))
+        except Exception as e:
+            for _, _, future, _, _ in jobs:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        with self._lock:
+            self.metrics["requests"] += len(jobs)
+            self.metrics["texts"] += len(texts)
+            self.metrics["batches"] += 1
+            self.metrics["largest_batch"] = max(self.metrics["largest_batch"], len(texts))
+            self.metrics["queue_wait_s"] += sum(started - enqueued for _, _, _, enqueued, _ in jobs)
+            self.metrics["encode_s"] += finished - started
+            # Power-of-two buckets: 1, 2, 4, 8, ...
+            self.batch_histogram[1 << (len(texts) - 1).bit_length()] += 1
+
+        start = 0
+        for job_texts, single, future, _, _ in jobs:
+            result = embeddings[start:start + len(job_texts)]
+            start += len(job_texts)
+            future.set_result(result[0] if single else result)
+
+    def get_stats(self) -> Dict:
+        """Achieved batching and latency metrics"""
+        with self._lock:
+            metrics = dict(self.metrics)
+            histogram = dict(sorted(self.batch_histogram.items()))
+        batches = metrics["batches"] or 1
+        requests = metrics["requests"] or 1
+        return {
+            "requests": metrics["requests"],
+            "texts": metrics["texts"],
+            "batches": metrics["batches"],
+            "avg_batch_size": metrics["texts"] / batches,
+            "avg_requests_per_batch": metrics["requests"] / batches,
+            "largest_batch": metrics["largest_batch"],
+            "batch_size_histogram": histogram,
+            "avg_queue_wait_ms": metrics["queue_wait_s"] / requests * 1000,
+            "avg_encode_ms": metrics["encode_s"] / batches * 1000,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "cache": self.cache.get_stats() if self.cache is not None else None
+        }
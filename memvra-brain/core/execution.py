@@ -0,0 +1,179 @@
+"""
+Execution Layer - Keeps blocking encoder, graph and LLM work off the event loop
+Each stage has its own bounded thread pool, in-flight cap and queue-depth metrics
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Optional
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer (writer-preferring)
+    BDHGraph is not thread-safe: retrievals share it, mutations get it alone
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class Stage:
+    """
+    One pipeline stage (encode, graph_read, graph_write, llm)
+
+    - max_concurrency callers run at once, the rest wait on a semaphore
+      (queue depth = waiting callers)
+    - run(): blocking callable on the stage's own thread pool, optionally
+      inside guard() (e.g. the graph read/write lock)
+    - run_async(): awaitable work (async clients) under the same cap
+    """
+
+    def __init__(self, name: str, max_concurrency: int, guard: Optional[Callable] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.guard = guard
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"stage-{name}")
+        self.queued = 0
+        self.in_flight = 0
+        self.metrics = {
+            "completed": 0,
+            "failed": 0,
+            "max_queued": 0,
+            "wait_s": 0.0,
+            "run_s": 0.0
+        }
+
+    def _guarded(self, fn: Callable, *args, **kwargs):
+        with self.guard():
+            return fn(*args, **kwargs)
+
+    async def _admit(self, work):
+        """Wait for a slot, then await work() with timing"""
+        self.queued += 1
+        self.metrics["max_queued"] = max(self.metrics["max_queued"], self.queued)
+        queued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        started = time.perf_counter()
+        self.metrics["wait_s"] += started - queued_at
+        self.in_flight += 1
+        try:
+            result = await work()
+        except BaseException:
+            self.metrics["failed"] += 1
+            raise
+        else:
+            self.metrics["completed"] += 1
+            return result
+        finally:
+            self.in_flight -= 1
+            self.metrics["run_s"] += time.perf_counter() - started
+            self._semaphore.release()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking callable on this stage's pool"""
+        call = partial(self._guarded, fn, *args, **kwargs) if self.guard else partial(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await self._admit(lambda: loop.run_in_executor(self._executor, call))
+
+    async def run_async(self, fn: Callable, *args, **kwargs):
+        """Await an async callable under this stage's concurrency cap"""
+        return await self._admit(lambda: fn(*args, **kwargs))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        done = self.metrics["completed"] + self.metrics["failed"]
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            **self.metrics,
+            "avg_wait_ms": self.metrics["wait_s"] * 1000 / done if done else 0.0,
+            "avg_run_ms": self.metrics["run_s"] * 1000 / done if done else 0.0
+        }
+
+
+class ExecutionLayer:
+    """
+    Per-stage executors for the API handlers
+
+    - encode: sentence encoder (EncodingService.encode_async)
+    - graph_read / graph_write: BDHGraph under one ReadWriteLock, so
+      retrievals run in parallel and mutations run alone
+    - llm: Ollama round trips
+
+    Threads, not processes: the encoder (torch) and matrix search (numpy)
+    release the GIL, and BDHGraph state cannot be shared across processes
+    """
+
+    DEFAULT_LIMITS = {"encode": 4, "graph_read": 4, "graph_write": 1, "llm": 8}
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        limits = {**self.DEFAULT_LIMITS, **(limits or {})}
+        self.graph_lock = ReadWriteLock()
+        guards = {"graph_read": self.graph_lock.read, "graph_write": self.graph_lock.write}
+        self.stages: Dict[str, Stage] = {
+            name: Stage(name, limit, guard=guards.get(name))
+            for name, limit in limits.items()
+        }
+
+    def stage(self, name: str) -> Stage:
+        if name not in self.stages:
+            raise ValueError(f"Unknown execution stage: {name}")
+        return self.stages[name]
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs):
+        """Run blocking fn(*args, **kwargs) in the named stage"""
+        return await self.stage(stage).run(fn, *args, **kwargs)
+
+    async def run_async(self, stage: str, fn: Callable, *args, **kwargs):
+        """Await async fn(*args, **kwargs) under the named stage's cap"""
+        return await self.stage(stage).run_async(fn, *args, **kwargs)
+
+    def shutdown(self):
+        for stage in self.stages.values():
+            stage.shutdown()
+
+    def get_stats(self) -> Dict:
+        return {name: stage.get_stats() for name, stage in self.stages.items()}
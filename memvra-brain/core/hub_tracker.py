@@ -0,0 +1,86 @@
+"""
+Hub Tracker - Incremental hub detection for the BDH graph
+Maintains one user's degree distribution so hubs update in O(Δ) per edge change
+"""
+from typing import Dict, Set
+
+
+class HubTracker:
+    """
+    Per-user hub set: nodes with degree > 2x the user's average degree
+
+    - Running degree sum and node count (average in O(1))
+    - Degree buckets {degree: nodes} so a moving threshold only touches
+      the buckets it crosses
+    """
+
+    def __init__(self):
+        self.degrees: Dict[str, int] = {}
+        self.degree_sum = 0
+        self.buckets: Dict[int, Set[str]] = {}
+        self.hubs: Set[str] = set()
+        # Smallest degree that counts as a hub: floor(2 * avg) + 1
+        self.min_hub_degree = 1
+
+    def __len__(self) -> int:
+        return len(self.degrees)
+
+    @property
+    def avg_degree(self) -> float:
+        return self.degree_sum / len(self.degrees) if self.degrees else 0.0
+
+    def _bucket_add(self, node_id: str, degree: int):
+        self.buckets.setdefault(degree, set()).add(node_id)
+
+    def _bucket_remove(self, node_id: str, degree: int):
+        bucket = self.buckets.get(degree)
+        if bucket is not None:
+            bucket.discard(node_id)
+            if not bucket:
+                del self.buckets[degree]
+
+    def add_node(self, node_id: str, degree: int = 0):
+        if node_id in self.degrees:
+            return
+        self.degrees[node_id] = degree
+        self.degree_sum += degree
+        self._bucket_add(node_id, degree)
+        if degree >= self.min_hub_degree:
+            self.hubs.add(node_id)
+        self._rebalance()
+
+    def remove_node(self, node_id: str):
+        degree = self.degrees.pop(node_id, None)
+        if degree is None:
+            return
+        self.degree_sum -= degree
+        self._bucket_remove(node_id, degree)
+        self.hubs.discard(node_id)
+        self._rebalance()
+
+    def change_degree(self, node_id: str, delta: int):
+        """Apply an edge add (+1) / remove (-1) to one endpoint"""
+        degree = self.degrees[node_id]
+        self._bucket_remove(node_id, degree)
+        degree += delta
+        self.degrees[node_id] = degree
+        self.degree_sum += delta
+        self._bucket_add(node_id, degree)
+
+        if degree >= self.min_hub_degree:
+            self.hubs.add(node_id)
+        else:
+            self.hubs.discard(node_id)
+        self._rebalance()
+
+    def _rebalance(self):
+        """Shift the hub threshold, touching only the buckets it crosses"""
+        n = len(self.degrees)
+        threshold = (2 * self.degree_sum) // n + 1 if n else 1
+        if threshold > self.min_hub_degree:
+            for degree in range(self.min_hub_degree, threshold):
+                self.hubs.difference_update(self.buckets.get(degree, ()))
+        elif threshold < self.min_hub_degree:
+            for degree in range(threshold, self.min_hub_degree):
+                self.hubs.update(self.buckets.get(degree, ()))
+        self.min_hub_degree = threshold
@@ -0,0 +1,172 @@
+"""
+Incremental Dream - Per-user dream cycle state
+Folds only the facts stored since the last cycle into the user's topic
+clusters and plans graph writes for the patterns / insights / profile that changed
+"""
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+class _DreamState:
+    """One user's clusters up to the watermark"""
+
+    def __init__(self):
+        self.watermark = 0  # facts folded, in creation order
+        self.last_fact_id: Optional[str] = None  # fact at watermark - 1 (detects deletions)
+        self.clusters: Dict[str, List[str]] = {}  # topic -> fact ids, topics in first-seen order
+        self.word_counts: Dict[str, Counter] = {}
+
+
+class IncrementalDreamer:
+    """
+    Incremental Level 0 → 1 → 2 → 3 compression for the dream cycle
+
+    - Watermark: a user's facts are append-only in creation order, so only
+      user_facts[watermark:] are grouped and folded into the clusters
+    - A shorter fact list or a different fact at the watermark (a fact was
+      removed) and full=True fold everything again from scratch
+    - Stable node ids per topic: pattern_{user}_{topic}, insight_{user}_{topic}
+    - plan() compares the derived nodes with the graph records and returns
+      only the ones whose content changed, so untouched patterns, insights
+      and the profile are neither re-encoded nor re-journaled
+    - Cluster state is in memory; after a restart the first cycle refolds
+      (cheap keyword grouping) and the graph comparison still skips the writes
+    """
+
+    def __init__(self, compressor):
+        self.compressor = compressor
+        self.states: Dict[str, _DreamState] = {}
+        self._lock = threading.Lock()
+
+    def _fold(self, state: _DreamState, facts: List[Dict]):
+        for topic, topic_facts in self.compressor._group_by_topic(facts).items():
+            state.clusters.setdefault(topic, []).extend(f["fact_id"] for f in topic_facts)
+            counts = state.word_counts.setdefault(topic, Counter())
+            for fact in topic_facts:
+                counts.update(self.compressor._words(fact.get("content", "")))
+
+    def _patterns(self, user_id: str, state: _DreamState) -> List[Dict]:
+        """compress_level_0_to_1 output, rebuilt from the clusters"""
+        patterns = []
+        for topic, fact_ids in state.clusters.items():
+            if len(fact_ids) < 3:  # Minimum for pattern
+                continue
+            patterns.append({
+                "pattern_id": f"pattern_{user_id}_{topic.lower()}",
+                "pattern": self.compressor._pattern_from_counts(topic, state.word_counts[topic], len(fact_ids)),
+                "topic": topic,
+                "facts_compressed": list(fact_ids),
+                "confidence": min(1.0, len(fact_ids) / self.compressor.facts_per_pattern),
+                "user_id": user_id
+            })
+        return patterns
+
+    def plan(self, user_id: str, user_facts: List[Dict], graph, full: bool = False) -> Dict:
+        """
+        Fold new facts and diff the derived nodes against the graph
+        Returns {patterns, insights, profile, write_patterns, write_insights,
+        write_profile, remove, new_facts, incremental}; call commit() once
+        the writes are applied
+        """
+        with self._lock:
+            previous = self.states.get(user_id)
+        state = _DreamState()
+        incremental = (
+            not full and previous is not None
+            and previous.watermark <= len(user_facts)
+            and (previous.watermark == 0 or user_facts[previous.watermark - 1]["fact_id"] == previous.last_fact_id)
+        )
+        if incremental:
+            state.watermark = previous.watermark
+            state.clusters = {topic: list(ids) for topic, ids in previous.clusters.items()}
+            state.word_counts = {topic: Counter(counts) for topic, counts in previous.word_counts.items()}
+
+        new_facts = user_facts[state.watermark:]
+        self._fold(state, new_facts)
+        state.watermark = len(user_facts)
+        state.last_fact_id = user_facts[-1]["fact_id"] if user_facts else None
+
+        patterns = self._patterns(user_id, state)
+        insights = []
+        profile = {}
+        if len(patterns) >= 3:
+            insights = self.compressor.generate_generalizations(patterns, user_id)
+            for insight in insights:
+                insight["insight_id"] = f"insight_{user_id}_{insight['topic'].lower()}"
+            profile = self.compressor.synthesize_psychological_profile(insights, user_id)
+
+        write_patterns = [
+            p for p in patterns
+            if self._changed(graph.levels[1].get(p["pattern_id"]), p["pattern"], facts_compressed=p["facts_compressed"], confidence=p["confidence"])
+        ]
+        write_insights = [
+            i for i in insights
+            if self._changed(graph.levels[2].get(i["insight_id"]), i["insight"], patterns_used=i["patterns_used"], score=i["score"])
+        ]
+        current_profile = graph.levels[3].get(f"profile_{user_id}")
+        write_profile = bool(profile) and (current_profile is None or current_profile.get("raw_data") != profile)
+
+        # Nodes no longer derived: insights that dropped out of the top topics;
+        # on a fresh or full fold also patterns of emptied topics and old positional ids
+        keep = {p["pattern_id"] for p in patterns} | {i["insight_id"] for i in insights}
+        remove = []
+        for level in ((1, 2) if not incremental else (2,)):
+            remove.extend(
+                (node_id, level) for node_id, _ in graph.iter_user_nodes(user_id, level)
+                if node_id not in keep
+            )
+
+        return {
+            "state": state,
+            "patterns": patterns,
+            "insights": insights,
+            "profile": profile,
+            "write_patterns": write_patterns,
+            "write_insights": write_insights,
+            "write_profile": write_profile,
+            "remove": remove,
+            "new_facts": len(new_facts),
+            "incremental": incremental
+        }
+
+    @staticmethod
+    def _changed(record: Optional[Dict], content: str, **fields) -> bool:
+        if record is None or record.get("content") != content:
+            return True
+        return any(record.get(name) != value for name, value in fields.items())
+
+    def commit(self, user_id: str, plan: Dict):
+        """Advance the user's watermark to the planned state"""
+        with self._lock:
+            self.states[user_id] = plan["state"]
+
+    def reset(self, user_id: Optional[str] = None):
+        """Drop cluster state (one user or all): the next cycle refolds"""
+        with self._lock:
+            if user_id is None:
+                self.states.clear()
+            else:
+                self.states.pop(user_id, None)
+
+    @staticmethod
+    def work_report(plan: Dict, total_facts: int) -> Dict:
+        """Work done vs skipped by one cycle"""
+        return {
+            "incremental": plan["incremental"],
+            "new_facts": plan["new_facts"],
+            "facts_skipped": total_facts - plan["new_facts"],
+            "patterns_updated": len(plan["write_patterns"]),
+            "patterns_unchanged": len(plan["patterns"]) - len(plan["write_patterns"]),
+            "insights_updated": len(plan["write_insights"]),
+            "insights_unchanged": len(plan["insights"]) - len(plan["write_insights"]),
+            "nodes_removed": len(plan["remove"]),
+            "profile": "updated" if plan["write_profile"] else "unchanged"
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "tracked_users": len(self.states),
+                "facts_folded": sum(state.watermark for state in self.states.values())
+            }
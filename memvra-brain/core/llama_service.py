@@ -4,11 +4,150 @@ Integrates Llama 3.1 8B via Ollama for query enhancement and response formatting
 STATELESS - no memory stored here
 """
 import ollama
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import json
 
+from core.circuit_breaker import CircuitBreaker
+from core.llm_cache import LLMResultCache
+from core.ollama_client import AsyncOllamaClient
+from core.prompt_builder import PromptBuilder
 
-class LlamaService:
+
+class LlamaPrompts:
+    """
+    Prompts, parsing, result memoization and non-LLM fallbacks shared by
+    LlamaService and AsyncLlamaService (only the transport differs)
+    """
+    
+    GREETINGS = ['hello', 'hi', 'hey', 'greetings']
+    PERSONAL_MARKERS = ['who am i', 'my name', 'my job', 'i like', 'my favorite', 'what did i']
+    ENHANCE_OPTIONS = {"temperature": 0.1}  # Low temperature for consistent extraction
+    VERIFY_OPTIONS = {"temperature": 0.1, "format": "json"}
+    
+    model_name: str
+    cache: Optional[LLMResultCache] = None
+    prompt_builder: PromptBuilder
+    
+    def _cache_lookup(self, kind: str, prompt: str, options: Dict, user_id: Optional[str] = None) -> Tuple[Optional[str], Optional[Dict]]:
+        """(key, cached result) - both None without a cache"""
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(self.model_name, prompt, options, user_id)
+        return key, self.cache.get(kind, key)
+    
+    def _cache_store(self, kind: str, key: Optional[str], result: Dict):
+        """Only real LLM answers are stored, never fallbacks"""
+        if key is not None:
+            self.cache.put(kind, key, result)
+    
+    @staticmethod
+    def _enhance_prompt(user_query: str) -> str:
+        return f"""Extract the following from this query:
+1. Intent (what the user wants: preferences, facts, summary, etc.)
+2. Keywords (important terms)
+3. Synonyms (related terms to search for)
+
+Query: "{user_query}"
+
+Respond in JSON format:
+{{
+    "intent": "...",
+    "keywords": ["...", "..."],
+    "synonyms": ["...", "..."]
+}}"""
+    
+    @staticmethod
+    def _parse_enhancement(response_text: str, user_query: str) -> Dict:
+        result = json.loads(response_text)
+        return {
+            "intent": result.get("intent", "general_query"),
+            "keywords": result.get("keywords", [user_query]),
+            "synonyms": result.get("synonyms", []),
+            "enhanced_query": " ".join(result.get("keywords", []) + result.get("synonyms", []))
+        }
+    
+    @staticmethod
+    def _keyword_fallback(user_query: str) -> Dict:
+        """Fallback: simple keyword extraction"""
+        words = user_query.lower().split()
+        return {
+            "intent": "general_query",
+            "keywords": words,
+            "synonyms": [],
+            "enhanced_query": user_query
+        }
+    
+    def _is_greeting(self, query: str) -> bool:
+        return any(word in query.lower() for word in self.GREETINGS)
+    
+    def _is_personal(self, query: str) -> bool:
+        return any(word in query.lower() for word in self.PERSONAL_MARKERS)
+    
+    def _response_prompt(self, facts: List[Dict], query: str, level_used: int, user_profile: Optional[Dict]) -> str:
+        """Chain-of-Thought prompt with Fact IDs for citation (after the cached system prefix)"""
+        return self.prompt_builder.response_prompt(facts, query, level_used, user_profile)
+    
+    @staticmethod
+    def _general_prompt(query: str) -> str:
+        return f"""You are MemVra, an intelligent AI assistant.
+User Query: "{query}"
+
+Instructions:
+1. Answer the query helpfully and accurately based on your general knowledge.
+2. Be concise but informative.
+3. Maintain a helpful and friendly tone.
+
+Response:"""
+    
+    def _verify_prompt(self, response: str, facts: List[Dict]) -> str:
+        # The same packed (budgeted) facts the response was generated from
+        facts_text, _ = self.prompt_builder.pack_facts(facts, with_ids=False)
+        return f"""Verify if the following Response is fully supported by the Context.
+Context:
+{facts_text}
+
+Response:
+{response}
+
+Instructions:
+1. Check for any claims in Response not found in Context.
+2. Return JSON: {{"supported": true/false, "reason": "..."}}
+"""
+    
+    def _format_no_facts_response(self, query: str, user_profile: Optional[Dict]) -> str:
+        """
+        Active Learning: If we don't know, ASK the user.
+        """
+        return f"I don't have that memory about you yet. If you tell me, I'll remember it for next time! (e.g., 'My name is...')"
+    
+    def _fallback_format(self, facts: List[Dict], query: str, level_used: int, confidence: float) -> str:
+        """Simple formatting without Llama"""
+        facts_text = "\n".join([f"• {fact.get('content', str(fact))}" for fact in facts[:5]])
+        
+        return f"""Based on your memories, here's what I found (confidence: {confidence:.2f}):
+
+{facts_text}
+
+(Retrieved {len(facts)} fact(s) from Level {level_used})"""
+    
+    def translate_user_language(self, text: str, user_profile: Dict) -> str:
+        """
+        Translate text using user's vocabulary (Feature 7: Linguistic Profiling)
+        """
+        if not user_profile:
+            return text
+        
+        linguistic = user_profile.get("linguistic_profile", {})
+        synonyms = linguistic.get("synonyms", {})
+        
+        # Replace standard terms with user's preferred vocabulary
+        for concept, user_term in synonyms.items():
+            text = text.replace(concept, user_term)
+        
+        return text
+
+
+class LlamaService(LlamaPrompts):
     """
     Llama 3.1 8B integration for natural language understanding
     Two main functions:
@@ -16,9 +155,16 @@ class LlamaService:
     2. Response Formatting (~100 tokens)
     """
     
-    def __init__(self, model_name: str = "llama3.1:8b-instruct-fp16"):
+    def __init__(
+        self,
+        model_name: str = "llama3.1:8b-instruct-fp16",
+        cache: Optional[LLMResultCache] = None,
+        prompt_builder: Optional[PromptBuilder] = None
+    ):
         self.model_name = model_name
         self.client = ollama.Client()
+        self.cache = cache
+        self.prompt_builder = prompt_builder or PromptBuilder()
         
         # Verify Ollama is running and model is available
         try:
@@ -31,50 +177,29 @@ class LlamaService:
     def enhance_query(self, user_query: str, user_profile: Optional[Dict] = None) -> Dict:
         """
         Extract intent, keywords, and create query vector for BDH search
-        Uses ~50 tokens per call
+        Uses ~50 tokens per call (none when cached)
         """
+        prompt = self._enhance_prompt(user_query)
+        key, cached = self._cache_lookup("enhance", prompt, self.ENHANCE_OPTIONS)
+        if cached is not None:
+            return cached
         try:
-            # Build prompt for query enhancement
-            prompt = f"""Extract the following from this query:
-1. Intent (what the user wants: preferences, facts, summary, etc.)
-2. Keywords (important terms)
-3. Synonyms (related terms to search for)
-
-Query: "{user_query}"
-
-Respond in JSON format:
-{{
-    "intent": "...",
-    "keywords": ["...", "..."],
-    "synonyms": ["...", "..."]
-}}"""
-            
             response = self.client.generate(
                 model=self.model_name,
                 prompt=prompt,
-                options={"temperature": 0.1}  # Low temperature for consistent extraction
+                options=self.prompt_builder.options(self.ENHANCE_OPTIONS),
+                keep_alive=self.prompt_builder.keep_alive
             )
             
             # Parse JSON response
-            result = json.loads(response['response'])
-            
-            return {
-                "intent": result.get("intent", "general_query"),
-                "keywords": result.get("keywords", [user_query]),
-                "synonyms": result.get("synonyms", []),
-                "enhanced_query": " ".join(result.get("keywords", []) + result.get("synonyms", []))
-            }
+            result = self._parse_enhancement(response['response'], user_query)
+            self._cache_store("enhance", key, result)
+            return result
             
         except Exception as e:
             # Fallback: simple keyword extraction
             print(f"Llama enhancement failed, using fallback: {e}")
-            words = user_query.lower().split()
-            return {
-                "intent": "general_query",
-                "keywords": words,
-                "synonyms": [],
-                "enhanced_query": user_query
-            }
+            return self._keyword_fallback(user_query)
     
     def stream_response(
         self,
@@ -91,15 +216,13 @@ Respond in JSON format:
         2. Reasoning Engine: CoT for complex queries
         3. Streaming: Low latency perception
         """
-        is_greeting = any(word in query.lower() for word in ['hello', 'hi', 'hey', 'greetings'])
-        if is_greeting and not facts:
+        if self._is_greeting(query) and not facts:
             yield "Hello! I'm online and ready to help. What's on your mind?"
             return
 
         if not facts:
             # Check if it's a personal question that requires memory
-            is_personal = any(word in query.lower() for word in ['who am i', 'my name', 'my job', 'i like', 'my favorite', 'what did i'])
-            if is_personal:
+            if self._is_personal(query):
                 yield self._format_no_facts_response(query, user_profile)
             else:
                 # General knowledge fallback
@@ -108,37 +231,20 @@ Respond in JSON format:
             return
 
         # 2. Reasoning Engine: Build Chain-of-Thought Prompt
-        # Include Fact IDs for citation
-        facts_str = "\n".join([f"[Fact: {fact.get('fact_id', 'unknown')}] {fact.get('content', str(fact))}" for fact in facts[:5]])
-        
-        formality = user_profile.get("linguistic_profile", {}).get("formality", 0.5) if user_profile else 0.5
-        style = "professional and concise" if formality > 0.6 else "casual and friendly"
-
-        prompt = f"""You are MemVra, an intelligent AI assistant.
-Facts retrieved from memory (Level {level_used}):
-{facts_str}
-
-User Query: "{query}"
-
-Instructions:
-1. Think step-by-step about how the facts answer the query.
-2. If facts are insufficient, admit it.
-3. Formulate a {style} response.
-4. Do NOT hallucinate. Only use provided facts.
-5. STRICT CITATION: You MUST cite the source fact ID for every claim using [Fact: <id>].
+        prompt = self._response_prompt(facts, query, level_used, user_profile)
 
-Response:"""
-
-        # 3. Stream from Ollama
+        # 3. Stream from Ollama (fixed system prefix first: reused from the prompt cache)
         try:
             stream = self.client.generate(
                 model=self.model_name,
                 prompt=prompt,
+                system=self.prompt_builder.system_prefix,
                 stream=True,
-                options={
+                options=self.prompt_builder.options({
                     "temperature": 0.2,
                     "top_p": 0.9
-                }
+                }),
+                keep_alive=self.prompt_builder.keep_alive
             )
             
             for chunk in stream:
@@ -151,25 +257,18 @@ Response:"""
 
     def _stream_general_response(self, query: str):
         """Stream general knowledge response when no memories are found"""
-        prompt = f"""You are MemVra, an intelligent AI assistant.
-User Query: "{query}"
-
-Instructions:
-1. Answer the query helpfully and accurately based on your general knowledge.
-2. Be concise but informative.
-3. Maintain a helpful and friendly tone.
-
-Response:"""
+        prompt = self._general_prompt(query)
         
         try:
             stream = self.client.generate(
                 model=self.model_name,
                 prompt=prompt,
                 stream=True,
-                options={
+                options=self.prompt_builder.options({
                     "temperature": 0.7,  # Higher temperature for creativity
                     "top_p": 0.9
-                }
+                }),
+                keep_alive=self.prompt_builder.keep_alive
             )
             
             for chunk in stream:
@@ -182,63 +281,26 @@ Response:"""
         """Legacy non-streaming method (wraps streaming)"""
         return "".join(list(self.stream_response(*args, **kwargs)))
     
-    def _format_no_facts_response(self, query: str, user_profile: Optional[Dict]) -> str:
-        """
-        Active Learning: If we don't know, ASK the user.
-        """
-        return f"I don't have that memory about you yet. If you tell me, I'll remember it for next time! (e.g., 'My name is...')"
-    
-    def _fallback_format(self, facts: List[Dict], query: str, level_used: int, confidence: float) -> str:
-        """Simple formatting without Llama"""
-        facts_text = "\n".join([f"• {fact.get('content', str(fact))}" for fact in facts[:5]])
-        
-        return f"""Based on your memories, here's what I found (confidence: {confidence:.2f}):
-
-{facts_text}
-
-(Retrieved {len(facts)} fact(s) from Level {level_used})"""
-    
-    def translate_user_language(self, text: str, user_profile: Dict) -> str:
-        """
-        Translate text using user's vocabulary (Feature 7: Linguistic Profiling)
-        """
-        if not user_profile:
-            return text
-        
-        linguistic = user_profile.get("linguistic_profile", {})
-        synonyms = linguistic.get("synonyms", {})
-        
-        # Replace standard terms with user's preferred vocabulary
-        for concept, user_term in synonyms.items():
-            text = text.replace(concept, user_term)
-        
-        return text
-    
-    def verify_response(self, response: str, facts: List[Dict]) -> Dict:
+    def verify_response(self, response: str, facts: List[Dict], user_id: Optional[str] = None) -> Dict:
         """
         Self-Verification Loop (Hallucination Safeguard)
         Checks if the response is supported by the facts.
+        Cached per user_id until their facts change.
         """
+        prompt = self._verify_prompt(response, facts)
+        key, cached = self._cache_lookup("verify", prompt, self.VERIFY_OPTIONS, user_id)
+        if cached is not None:
+            return cached
         try:
-            facts_text = "\n".join([f"{f.get('content')}" for f in facts])
-            
-            prompt = f"""Verify if the following Response is fully supported by the Context.
-Context:
-{facts_text}
-
-Response:
-{response}
-
-Instructions:
-1. Check for any claims in Response not found in Context.
-2. Return JSON: {{"supported": true/false, "reason": "..."}}
-"""
             result = self.client.generate(
                 model=self.model_name,
                 prompt=prompt,
-                options={"temperature": 0.1, "format": "json"}
+                options=self.prompt_builder.options(self.VERIFY_OPTIONS),
+                keep_alive=self.prompt_builder.keep_alive
             )
-            return json.loads(result['response'])
+            verdict = json.loads(result['response'])
+            self._cache_store("verify", key, verdict)
+            return verdict
         except Exception as e:
             print(f"Verification failed: {e}")
             return {"supported": True, "reason": "Verification skipped due to error"}
@@ -250,3 +312,196 @@ Instructions:
             return True
         except:
             return False
+
+
+class LlamaUnavailable(Exception):
+    """The circuit breaker is open, no call was made"""
+
+
+class AsyncLlamaService(LlamaPrompts):
+    """
+    Async variant of LlamaService on AsyncOllamaClient
+    Same prompts, fallbacks and return values; every call has a deadline,
+    generations per model are capped and connection errors are retried
+    
+    A CircuitBreaker sits in front of Ollama: while it is open the keyword
+    fallback, _fallback_format and "verification skipped" answers are
+    returned immediately instead of waiting on a dead server
+    
+    With an LLMResultCache, enhance_query and verify_response answers are
+    memoized (enhancement globally, verification per user and fact version)
+    """
+    
+    def __init__(
+        self,
+        model_name: str = "llama3.1:8b-instruct-fp16",
+        client: Optional[AsyncOllamaClient] = None,
+        enhance_deadline_s: float = 5.0,
+        response_deadline_s: float = 30.0,
+        verify_deadline_s: float = 10.0,
+        breaker: Optional[CircuitBreaker] = None,
+        cache: Optional[LLMResultCache] = None,
+        prompt_builder: Optional[PromptBuilder] = None
+    ):
+        self.model_name = model_name
+        self.client = client or AsyncOllamaClient()
+        self.breaker = breaker or CircuitBreaker("ollama")
+        self.cache = cache
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.enhance_deadline_s = enhance_deadline_s
+        self.response_deadline_s = response_deadline_s
+        self.verify_deadline_s = verify_deadline_s
+        print(f"✓ Async Llama service using {self.client.host} with model: {model_name}")
+    
+    async def _generate(self, prompt: str, options: Dict, deadline_s: float, format: str = "") -> Dict:
+        """client.generate behind the breaker (LlamaUnavailable while open)"""
+        if not self.breaker.allow():
+            raise LlamaUnavailable("Ollama circuit open")
+        recorded = False
+        try:
+            response = await self.client.generate(
+                self.model_name, prompt, options=self.prompt_builder.options(options), format=format,
+                deadline_s=deadline_s, keep_alive=self.prompt_builder.keep_alive
+            )
+            self.breaker.record_success()
+            recorded = True
+            return response
+        except Exception:
+            self.breaker.record_failure()
+            recorded = True
+            raise
+        finally:
+            if not recorded:
+                self.breaker.release_trial()
+    
+    async def _stream(self, prompt: str, options: Dict, system: str = "") -> AsyncIterator[Dict]:
+        """client.stream_generate behind the breaker (LlamaUnavailable while open)"""
+        if not self.breaker.allow():
+            raise LlamaUnavailable("Ollama circuit open")
+        recorded = False
+        try:
+            async for chunk in self.client.stream_generate(
+                self.model_name, prompt, options=self.prompt_builder.options(options),
+                deadline_s=self.response_deadline_s, system=system, keep_alive=self.prompt_builder.keep_alive
+            ):
+                if not recorded:
+                    # First chunk: the server is answering
+                    self.breaker.record_success()
+                    recorded = True
+                yield chunk
+            if not recorded:
+                self.breaker.record_success()
+                recorded = True
+        except Exception:
+            if not recorded:
+                self.breaker.record_failure()
+                recorded = True
+            raise
+        finally:
+            if not recorded:
+                self.breaker.release_trial()
+    
+    async def enhance_query(self, user_query: str, user_profile: Optional[Dict] = None) -> Dict:
+        """Extract intent, keywords and synonyms (keyword fallback on any failure)"""
+        prompt = self._enhance_prompt(user_query)
+        key, cached = self._cache_lookup("enhance", prompt, self.ENHANCE_OPTIONS)
+        if cached is not None:
+            return cached
+        try:
+            response = await self._generate(
+                prompt,
+                options={"temperature": 0.1},
+                deadline_s=self.enhance_deadline_s
+            )
+            result = self._parse_enhancement(response['response'], user_query)
+            self._cache_store("enhance", key, result)
+            return result
+        except LlamaUnavailable:
+            return self._keyword_fallback(user_query)
+        except Exception as e:
+            print(f"Llama enhancement failed, using fallback: {e}")
+            return self._keyword_fallback(user_query)
+    
+    async def stream_response(
+        self,
+        facts: List[Dict],
+        query: str,
+        level_used: int,
+        confidence: float,
+        user_profile: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """Async generator with the same adaptive logic as LlamaService.stream_response"""
+        if self._is_greeting(query) and not facts:
+            yield "Hello! I'm online and ready to help. What's on your mind?"
+            return
+        
+        if not facts:
+            if self._is_personal(query):
+                yield self._format_no_facts_response(query, user_profile)
+            else:
+                async for token in self._stream_general_response(query):
+                    yield token
+            return
+        
+        prompt = self._response_prompt(facts, query, level_used, user_profile)
+        streamed = False
+        try:
+            async for chunk in self._stream(
+                prompt, options={"temperature": 0.2, "top_p": 0.9}, system=self.prompt_builder.system_prefix
+            ):
+                if 'response' in chunk:
+                    streamed = True
+                    yield chunk['response']
+        except Exception as e:
+            if not isinstance(e, LlamaUnavailable):
+                print(f"Streaming failed: {e}")
+            # Only fall back if nothing was sent yet (no half answer + summary)
+            if not streamed:
+                yield self._fallback_format(facts, query, level_used, confidence)
+    
+    async def _stream_general_response(self, query: str) -> AsyncIterator[str]:
+        try:
+            async for chunk in self._stream(self._general_prompt(query), options={"temperature": 0.7, "top_p": 0.9}):
+                if 'response' in chunk:
+                    yield chunk['response']
+        except LlamaUnavailable:
+            yield "I'm having trouble accessing my general knowledge right now."
+        except Exception as e:
+            yield f"I'm having trouble accessing my general knowledge right now. Error: {e}"
+    
+    async def format_response(self, *args, **kwargs) -> str:
+        """Non-streaming response (joins the stream)"""
+        return "".join([token async for token in self.stream_response(*args, **kwargs)])
+    
+    async def verify_response(self, response: str, facts: List[Dict], user_id: Optional[str] = None) -> Dict:
+        """Self-Verification Loop (skipped, i.e. supported, on any failure), cached per user_id"""
+        prompt = self._verify_prompt(response, facts)
+        key, cached = self._cache_lookup("verify", prompt, self.VERIFY_OPTIONS, user_id)
+        if cached is not None:
+            return cached
+        try:
+            result = await self._generate(
+                prompt,
+                options={"temperature": 0.1},
+                deadline_s=self.verify_deadline_s,
+                format="json"
+            )
+            verdict = json.loads(result['response'])
+            self._cache_store("verify", key, verdict)
+            return verdict
+        except LlamaUnavailable:
+            return {"supported": True, "reason": "Verification skipped: LLM unavailable"}
+        except Exception as e:
+            print(f"Verification failed: {e}")
+            return {"supported": True, "reason": "Verification skipped due to error"}
+    
+    async def is_available(self) -> bool:
+        """Check if Ollama service is available (bypasses the breaker, used as its probe)"""
+        try:
+            await self.client.list(deadline_s=2.0)
+            return True
+        except Exception:
+            return False
+    
+    async def aclose(self):
+        await self.client.aclose()
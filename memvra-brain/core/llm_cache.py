@@ -0,0 +1,161 @@
+"""
+LLM Result Cache - LRU + TTL memo for near-deterministic LLM calls
+enhance_query (temperature 0.1) and verify_response (JSON) answers keyed by
+model + prompt hash, so repeated recalls skip those Ollama round trips
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class LLMResultCache:
+    """
+    Parsed LLM results keyed by sha1(model, options, scope, normalized prompt)
+
+    - Bounded by entry count, least-recently-used entries evicted first
+    - Optional TTL per entry
+    - Per-user scope: entries stored with a user_id carry that user's fact
+      version; bump_version(user_id) (on every fact store) makes them misses
+    - Hit / miss counters per kind ("enhance", "verify")
+    - Optional JSON persistence (entries + versions) for warm restarts
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: Optional[float] = None,
+        persist_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (kind, value, expires_at)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        """Unicode NFC, trimmed, whitespace collapsed"""
+        return " ".join(unicodedata.normalize("NFC", prompt).split())
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump_version(self, user_id: str):
+        """The user's facts changed: their scoped entries no longer match"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def key(self, model: str, prompt: str, options: Optional[Dict] = None, user_id: Optional[str] = None) -> str:
+        scope = f"{user_id}@{self.version(user_id)}" if user_id is not None else ""
+        material = "\0".join([
+            model, json.dumps(options or {}, sort_keys=True), scope, self.normalize(prompt)
+        ])
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _count(self, kind: str, field: str):
+        self.stats.setdefault(kind, {"hits": 0, "misses": 0})[field] += 1
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._count(kind, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(kind, "hits")
+            return dict(entry[1])
+
+    def put(self, kind: str, key: str, value: Dict, expires_at: Optional[float] = None):
+        if expires_at is None and self.ttl_seconds is not None:
+            expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (kind, dict(value), expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def save(self, path: Optional[str] = None):
+        """Persist live entries (LRU order) and user versions to a JSON file"""
+        path = path or self.persist_path
+        if not path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, kind, value, expires_at]
+                for key, (kind, value, expires_at) in self._entries.items()
+                if expires_at is None or expires_at >= now
+            ]
+            versions = dict(self._versions)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"versions": versions, "entries": entries}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Load persisted entries, returns how many were restored"""
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠ Warning: Could not load LLM cache {path} - {e}")
+            return 0
+
+        with self._lock:
+            for user_id, version in data.get("versions", {}).items():
+                self._versions[user_id] = max(self._versions.get(user_id, 0), version)
+
+        now = time.time()
+        restored = 0
+        for key, kind, value, expires_at in data.get("entries", []):
+            if expires_at is not None and expires_at < now:
+                continue
+            self.put(kind, key, value, expires_at)
+            restored += 1
+        return restored
+
+    def get_stats(self) -> Dict:
+        hits = sum(s["hits"] for s in self.stats.values())
+        lookups = hits + sum(s["misses"] for s in self.stats.values())
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "by_kind": {
+                kind: {**s, "hit_rate": s["hits"] / (s["hits"] + s["misses"])}
+                for kind, s in self.stats.items()
+            },
+            "evictions": self.evictions,
+            "tracked_users": len(self._versions),
+            "ttl_seconds": self.ttl_seconds
+        }
@@ -0,0 +1,46 @@
+"""
+Memory Store - Append-only fact records with a per-user index
+Replaces the flat memory_store list so per-user reads cost O(user's facts)
+"""
+from typing import Dict, Iterator, List
+
+
+class MemoryStore:
+    """
+    List-like store of fact dicts (append / extend / clear / iterate)
+
+    - Global creation order is kept for snapshots
+    - by_user index: user_id -> that user's facts in creation order
+    """
+
+    def __init__(self):
+        self._facts: List[Dict] = []
+        self._by_user: Dict[str, List[Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._facts)
+
+    def append(self, fact: Dict):
+        self._facts.append(fact)
+        self._by_user.setdefault(fact.get("user_id"), []).append(fact)
+
+    def extend(self, facts):
+        for fact in facts:
+            self.append(fact)
+
+    def clear(self):
+        self._facts.clear()
+        self._by_user.clear()
+
+    def for_user(self, user_id: str) -> List[Dict]:
+        """A user's facts in creation order (copy of the index entry)"""
+        return list(self._by_user.get(user_id, ()))
+
+    def count(self, user_id: str) -> int:
+        return len(self._by_user.get(user_id, ()))
+
+    def users(self) -> List[str]:
+        return list(self._by_user)
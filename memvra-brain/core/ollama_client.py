@@ -0,0 +1,216 @@
+"""
+Ollama Client - Async HTTP client for the Ollama REST API
+Pooled HTTP/1.1 keep-alive connections, per-call deadlines,
+per-model concurrency caps and jittered retries on connection errors
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Union
+
+import httpx
+
+
+# Failures where the request never reached Ollama: safe to retry
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+
+
+class OllamaDeadlineExceeded(TimeoutError):
+    """A call did not finish within its deadline"""
+
+
+class AsyncOllamaClient:
+    """
+    Thin async client for /api/generate and /api/tags
+
+    - One httpx.AsyncClient: keep-alive pool of max_connections
+    - deadline_s bounds a whole call (retries, queueing and streaming included)
+    - A semaphore per model caps in-flight generations (max_per_model)
+    - Connection errors are retried up to `retries` times with full-jitter
+      exponential backoff, never past the deadline
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        max_connections: int = 16,
+        max_keepalive: int = 16,
+        max_per_model: int = 4,
+        deadline_s: float = 30.0,
+        connect_timeout_s: float = 2.0,
+        retries: int = 2,
+        backoff_s: float = 0.1
+    ):
+        host = host or os.environ.get("OLLAMA_HOST") or "http://localhost:11434"
+        self.host = host if "://" in host else f"http://{host}"
+        self.max_per_model = max_per_model
+        self.deadline_s = deadline_s
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self._http = httpx.AsyncClient(
+            base_url=self.host,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(deadline_s, connect=connect_timeout_s)
+        )
+        self._model_slots: Dict[str, asyncio.Semaphore] = {}
+        self._model_in_flight: Dict[str, int] = {}
+        self.metrics = {
+            "requests": 0,
+            "retries": 0,
+            "deadline_exceeded": 0,
+            "errors": 0,
+            "in_flight": 0
+        }
+
+    @asynccontextmanager
+    async def _slot(self, model: str):
+        """One of the model's max_per_model generation slots"""
+        if model not in self._model_slots:
+            self._model_slots[model] = asyncio.Semaphore(self.max_per_model)
+        async with self._model_slots[model]:
+            self._model_in_flight[model] = self._model_in_flight.get(model, 0) + 1
+            self.metrics["in_flight"] += 1
+            try:
+                yield
+            finally:
+                self._model_in_flight[model] -= 1
+                self.metrics["in_flight"] -= 1
+
+    async def _backoff(self, attempt: int, deadline: float):
+        """Full jitter: sleep uniform(0, backoff * 2^attempt), capped at the deadline"""
+        delay = random.uniform(0, self.backoff_s * (2 ** attempt))
+        remaining = deadline - time.monotonic()
+        if delay >= remaining:
+            raise OllamaDeadlineExceeded("deadline reached while backing off")
+        self.metrics["retries"] += 1
+        await asyncio.sleep(delay)
+
+    async def _with_deadline(self, call, deadline_s: Optional[float]):
+        """Run call() under the overall deadline, retrying connection errors"""
+        deadline = time.monotonic() + (deadline_s or self.deadline_s)
+        self.metrics["requests"] += 1
+        try:
+            async with asyncio.timeout(deadline - time.monotonic()):
+                attempt = 0
+                while True:
+                    try:
+                        return await call()
+                    except RETRYABLE_ERRORS:
+                        if attempt >= self.retries:
+                            raise
+                        await self._backoff(attempt, deadline)
+                        attempt += 1
+        except (TimeoutError, httpx.TimeoutException) as e:
+            self.metrics["deadline_exceeded"] += 1
+            raise OllamaDeadlineExceeded(str(e) or "deadline exceeded") from e
+        except Exception:
+            self.metrics["errors"] += 1
+            raise
+
+    @staticmethod
+    def _generate_body(model: str, prompt: str, stream: bool, options: Optional[Dict], system: str, keep_alive) -> Dict:
+        """/api/generate request; system and keep_alive only when set (server defaults otherwise)"""
+        body = {"model": model, "prompt": prompt, "stream": stream, "options": options or {}}
+        if system:
+            body["system"] = system
+        if keep_alive is not None:
+            body["keep_alive"] = keep_alive
+        return body
+
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict] = None,
+        format: str = "",
+        deadline_s: Optional[float] = None,
+        system: str = "",
+        keep_alive: Optional[Union[str, float]] = None
+    ) -> Dict:
+        """Non-streaming generation, returns Ollama's JSON ({"response": ...})"""
+        body = self._generate_body(model, prompt, False, options, system, keep_alive)
+        body["format"] = format
+
+        async def call():
+            async with self._slot(model):
+                response = await self._http.post("/api/generate", json=body)
+                response.raise_for_status()
+                return response.json()
+
+        return await self._with_deadline(call, deadline_s)
+
+    async def stream_generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict] = None,
+        deadline_s: Optional[float] = None,
+        system: str = "",
+        keep_alive: Optional[Union[str, float]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming generation, yields Ollama's NDJSON chunks
+        Connection errors are retried only before the first chunk
+        """
+        body = self._generate_body(model, prompt, True, options, system, keep_alive)
+        deadline = time.monotonic() + (deadline_s or self.deadline_s)
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def call():
+            received = False
+            async with self._slot(model):
+                try:
+                    async with self._http.stream("POST", "/api/generate", json=body) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if line:
+                                received = True
+                                await queue.put(json.loads(line))
+                except RETRYABLE_ERRORS as e:
+                    if received:
+                        # Chunks already went to the caller: a retry would repeat them
+                        raise httpx.ReadError(str(e)) from e
+                    raise
+
+        async def produce():
+            try:
+                await self._with_deadline(call, deadline - time.monotonic())
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    async def list(self, deadline_s: Optional[float] = None) -> Dict:
+        """Installed models (/api/tags), used as the availability probe"""
+        async def call():
+            response = await self._http.get("/api/tags")
+            response.raise_for_status()
+            return response.json()
+
+        return await self._with_deadline(call, deadline_s)
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def get_stats(self) -> Dict:
+        return {
+            "host": self.host,
+            "max_per_model": self.max_per_model,
+            "models_in_flight": dict(self._model_in_flight),
+            **self.metrics
+        }
@@ -0,0 +1,406 @@
+"""
+Brain Persistence - Write-ahead log + periodic snapshots
+Restores BDHGraph, memory_store and user profiles after a restart
+by loading the last snapshot and replaying the log (no re-encoding)
+"""
+import glob
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.user_profile import UserProfile
+
+
+# Frame: <payload length u32><crc32 u32><payload>
+_FRAME = struct.Struct("<II")
+_HEADER_LEN = struct.Struct("<I")
+
+# Profile fields journaled as "profile_counters"
+PROFILE_COUNTERS = ("total_facts", "total_queries", "total_patterns", "total_insights")
+# Profile fields journaled as "profile_settings"
+PROFILE_SETTINGS = ("query_enhancer", "linguistic_profile")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class WriteAheadLog:
+    """
+    Append-only segment files of framed records
+    Payload: <header length u32><JSON header {lsn, op, data, shape}><float32 embeddings>
+    A torn or corrupt tail (crash mid-write) is detected by length/CRC and truncated
+    """
+
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(first lsn, path) of every segment, oldest first"""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, "wal-*.log")):
+            found.append((int(os.path.basename(path)[4:-4]), path))
+        return sorted(found)
+
+    def open_segment(self, first_lsn: int):
+        """Start a new segment; later appends go there"""
+        self.close()
+        path = os.path.join(self.directory, f"wal-{first_lsn:016d}.log")
+        self._file = open(path, "ab")
+
+    def append(self, lsn: int, op: str, data: Dict, embeddings: Optional[np.ndarray] = None) -> int:
+        """Write one record, returns its size in bytes"""
+        header = {"lsn": lsn, "op": op, "data": data}
+        body = b""
+        if embeddings is not None:
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            header["shape"] = list(embeddings.shape)
+            body = embeddings.tobytes()
+        header_bytes = json.dumps(header, default=_json_default).encode("utf-8")
+        payload = _HEADER_LEN.pack(len(header_bytes)) + header_bytes + body
+
+        self._file.write(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        return _FRAME.size + len(payload)
+
+    def read(self, path: str) -> Iterator[Tuple[int, str, Dict, Optional[np.ndarray]]]:
+        """Yield (lsn, op, data, embeddings) records, truncating a torn tail"""
+        with open(path, "rb") as f:
+            content = f.read()
+
+        offset = 0
+        while offset < len(content):
+            if offset + _FRAME.size > len(content):
+                break
+            length, crc = _FRAME.unpack_from(content, offset)
+            payload = content[offset + _FRAME.size:offset + _FRAME.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+
+            (header_length,) = _HEADER_LEN.unpack_from(payload, 0)
+            header = json.loads(payload[_HEADER_LEN.size:_HEADER_LEN.size + header_length])
+            embeddings = None
+            if "shape" in header:
+                embeddings = np.frombuffer(
+                    payload, dtype=np.float32, offset=_HEADER_LEN.size + header_length
+                ).reshape(header["shape"])
+            yield header["lsn"], header["op"], header["data"], embeddings
+            offset += _FRAME.size + length
+
+        if offset < len(content):
+            print(f"⚠ Warning: Truncating torn WAL tail in {path} ({len(content) - offset} bytes)")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+    def bytes_since(self, lsn: int) -> int:
+        """Size of the segments holding records after lsn"""
+        return sum(os.path.getsize(path) for first_lsn, path in self.segments() if first_lsn > lsn)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BrainPersistence:
+    """
+    Durability for the in-process brain state
+
+    - Every mutation is appended to the WAL before it is applied
+      (BDHGraph ops carry their embeddings, so replay never encodes)
+    - snapshot(): BDHGraph.snapshot_state() arrays in one .npz plus
+      columnar JSON metadata; older snapshots and WAL segments are dropped
+    - Two phases: capture_snapshot() copies the state while graph writes are
+      excluded, write_snapshot() serializes the copies with the graph released
+    - recover(): last snapshot + replay of newer WAL records, timed
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        graph,
+        memory_store,
+        user_profiles: Dict[str, UserProfile],
+        snapshot_every: int = 50000,
+        fsync: bool = False
+    ):
+        self.data_dir = data_dir
+        self.graph = graph
+        self.memory_store = memory_store
+        self.user_profiles = user_profiles
+        self.snapshot_every = snapshot_every
+        os.makedirs(data_dir, exist_ok=True)
+
+        self.wal = WriteAheadLog(os.path.join(data_dir, "wal"), fsync=fsync)
+        self._lock = threading.RLock()
+        self.lsn = 0
+        self.snapshot_lsn = 0
+        self._snapshotting = False
+        self.metrics = {"appends": 0, "wal_bytes": 0, "snapshots": 0, "last_snapshot_s": None, "last_snapshot_capture_s": None, "recovery": None}
+
+    # Write path
+
+    def append(self, op: str, data: Dict, embeddings: Optional[np.ndarray] = None):
+        """Journal one mutation (BDHGraph.journal hook)"""
+        with self._lock:
+            self.lsn += 1
+            self.metrics["wal_bytes"] += self.wal.append(self.lsn, op, data, embeddings)
+            self.metrics["appends"] += 1
+
+    def log_memory(self, fact_data: Dict):
+        """memory_store.append(fact_data) happened"""
+        self.append("memory_store", fact_data)
+
+    def log_profile_counters(self, profile: UserProfile):
+        """Profile counters changed (absolute values, replay is idempotent)"""
+        self.append("profile_counters", {
+            "user_id": profile.user_id,
+            **{field: getattr(profile, field) for field in PROFILE_COUNTERS}
+        })
+
+    def log_profile_settings(self, profile: UserProfile):
+        """Per-tenant settings / learned vocabulary changed"""
+        self.append("profile_settings", {
+            "user_id": profile.user_id,
+            **{field: getattr(profile, field) for field in PROFILE_SETTINGS}
+        })
+
+    # Replay
+
+    def _apply(self, op: str, data: Dict, embeddings: Optional[np.ndarray]):
+        if op == "memory_store":
+            self.memory_store.append(data)
+        elif op == "profile_counters":
+            user_id = data["user_id"]
+            if user_id not in self.user_profiles:
+                self.user_profiles[user_id] = UserProfile(user_id=user_id)
+            for field in PROFILE_COUNTERS:
+                setattr(self.user_profiles[user_id], field, data[field])
+        elif op == "profile_settings":
+            user_id = data["user_id"]
+            if user_id not in self.user_profiles:
+                self.user_profiles[user_id] = UserProfile(user_id=user_id)
+            for field in PROFILE_SETTINGS:
+                setattr(self.user_profiles[user_id], field, data[field])
+        else:
+            self.graph.apply(op, data, embeddings)
+
+    def recover(self) -> Dict:
+        """Load the last snapshot, replay newer WAL records, then start journaling"""
+        started = time.perf_counter()
+        snapshot = self._current_snapshot()
+        if snapshot:
+            self._load_snapshot(snapshot)
+        snapshot_loaded = time.perf_counter()
+
+        replayed = 0
+        for _, path in self.wal.segments():
+            for lsn, op, data, embeddings in self.wal.read(path):
+                if lsn <= self.lsn:
+                    continue
+                self._apply(op, data, embeddings)
+                self.lsn = lsn
+                replayed += 1
+        finished = time.perf_counter()
+
+        self.wal.open_segment(self.lsn + 1)
+        self.graph.journal = self.append
+
+        report = {
+            "snapshot": snapshot,
+            "snapshot_lsn": self.snapshot_lsn,
+            "replayed_records": replayed,
+            "lsn": self.lsn,
+            "facts": len(self.graph.levels[0]),
+            "snapshot_load_s": snapshot_loaded - started,
+            "replay_s": finished - snapshot_loaded,
+            "recovery_s": finished - started
+        }
+        self.metrics["recovery"] = report
+        print(
+            f"✓ Recovered brain state: {report['facts']} facts, {replayed} WAL records "
+            f"in {report['recovery_s']:.2f}s"
+        )
+        return report
+
+    # Snapshots
+
+    def _current_snapshot(self) -> Optional[str]:
+        current = os.path.join(self.data_dir, "CURRENT")
+        if not os.path.exists(current):
+            return None
+        with open(current, "r", encoding="utf-8") as f:
+            name = f.read().strip()
+        return name if name and os.path.isdir(os.path.join(self.data_dir, name)) else None
+
+    def _load_snapshot(self, name: str):
+        path = os.path.join(self.data_dir, name)
+        with open(os.path.join(path, "graph.json"), "r", encoding="utf-8") as f:
+            columns = json.load(f)
+        with open(os.path.join(path, "state.json"), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        with np.load(os.path.join(path, "arrays.npz")) as arrays:
+            self.graph.restore_state(columns, arrays)
+
+        store = state["memory_store"]
+        self.memory_store.clear()
+        self.memory_store.extend(dict(zip(store, row)) for row in zip(*store.values()))
+        self.user_profiles.clear()
+        for data in state["user_profiles"]:
+            self.user_profiles[data["user_id"]] = UserProfile(**data)
+        self.lsn = self.snapshot_lsn = state["lsn"]
+
+    def capture_snapshot(self) -> Optional[Dict]:
+        """
+        First snapshot phase: copy the state at the current LSN
+        Call with graph mutations excluded (the graph_write stage): graph ops
+        and memory_store appends then cannot interleave. The LSN, a new WAL
+        segment, memory_store and the profiles are captured under the journal
+        lock, the graph as BDHGraph.snapshot_state() copies. Returns None if
+        nothing changed or a snapshot is already being written; pass the
+        result to write_snapshot() once the graph is released.
+        """
+        with self._lock:
+            if self._snapshotting or (self.lsn == self.snapshot_lsn and self._current_snapshot()):
+                return None
+            self._snapshotting = True
+            started = time.perf_counter()
+            lsn = self.lsn
+            # Records after lsn go to the new segment, which survives the cleanup below
+            self.wal.open_segment(lsn + 1)
+            # Fact metadata dicts are shared with the graph records and updated in place
+            facts = [
+                {field: dict(value) if isinstance(value, dict) else value for field, value in fact.items()}
+                for fact in self.memory_store
+            ]
+            # list() copies the dict in one step (the event loop may add profiles meanwhile)
+            profiles = [profile.model_dump(mode="json") for profile in list(self.user_profiles.values())]
+
+        try:
+            columns, arrays = self.graph.snapshot_state()
+        except Exception:
+            with self._lock:
+                self._snapshotting = False
+            raise
+        return {
+            "lsn": lsn,
+            "facts": facts,
+            "profiles": profiles,
+            "columns": columns,
+            "arrays": arrays,
+            "started": started,
+            "capture_s": time.perf_counter() - started
+        }
+
+    def write_snapshot(self, capture: Dict) -> Dict:
+        """
+        Second snapshot phase: serialize and write a capture_snapshot() result,
+        then drop what it supersedes. Touches only the copies, so it runs on
+        any thread while graph reads and writes continue. Profile records after
+        the LSN hold absolute values, so replaying them over a slightly newer
+        profile is harmless.
+        """
+        lsn = capture["lsn"]
+        name = f"snapshot-{lsn:016d}"
+        try:
+            tmp_path = os.path.join(self.data_dir, f".{name}.tmp")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+
+            with open(os.path.join(tmp_path, "graph.json"), "w", encoding="utf-8") as f:
+                json.dump(capture["columns"], f, default=_json_default)
+                self._sync(f)
+            with open(os.path.join(tmp_path, "arrays.npz"), "wb") as f:
+                np.savez(f, **capture["arrays"])
+                self._sync(f)
+
+            # memory_store stored column-wise
+            facts = capture["facts"]
+            fields: Dict[str, None] = {}
+            for fact in facts:
+                fields.update(dict.fromkeys(fact))
+            state = {
+                "lsn": lsn,
+                "memory_store": {field: [fact.get(field) for fact in facts] for field in fields},
+                "user_profiles": capture["profiles"]
+            }
+            with open(os.path.join(tmp_path, "state.json"), "w", encoding="utf-8") as f:
+                json.dump(state, f, default=_json_default)
+                self._sync(f)
+
+            os.replace(tmp_path, os.path.join(self.data_dir, name))
+            current_tmp = os.path.join(self.data_dir, "CURRENT.tmp")
+            with open(current_tmp, "w", encoding="utf-8") as f:
+                f.write(name)
+                self._sync(f)
+            os.replace(current_tmp, os.path.join(self.data_dir, "CURRENT"))
+
+            # Everything up to lsn is in the snapshot: drop the older segments
+            for first_lsn, path in self.wal.segments():
+                if first_lsn <= lsn:
+                    os.remove(path)
+            for old in glob.glob(os.path.join(self.data_dir, "snapshot-*")):
+                if os.path.basename(old) != name:
+                    shutil.rmtree(old, ignore_errors=True)
+        finally:
+            with self._lock:
+                self._snapshotting = False
+
+        elapsed = time.perf_counter() - capture["started"]
+        with self._lock:
+            self.snapshot_lsn = lsn
+            self.metrics["snapshots"] += 1
+            self.metrics["last_snapshot_s"] = elapsed
+            self.metrics["last_snapshot_capture_s"] = capture["capture_s"]
+            self.metrics["wal_bytes"] = self.wal.bytes_since(lsn)
+        print(f"✓ Snapshot {name} written in {elapsed:.2f}s ({capture['capture_s']:.2f}s capturing)")
+        return {"snapshot": name, "lsn": lsn, "seconds": elapsed, "capture_seconds": capture["capture_s"]}
+
+    def _sync(self, f):
+        """fsync a snapshot file before it is renamed into place (when fsync is on)"""
+        if self.wal.fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def snapshot(self) -> Optional[Dict]:
+        """Capture and write a snapshot in one call (shutdown, scripts)"""
+        capture = self.capture_snapshot()
+        return None if capture is None else self.write_snapshot(capture)
+
+    def maybe_capture_snapshot(self) -> Optional[Dict]:
+        """capture_snapshot() once snapshot_every records have accumulated in the WAL"""
+        if self.lsn - self.snapshot_lsn >= self.snapshot_every:
+            return self.capture_snapshot()
+        return None
+
+    def close(self):
+        self.graph.journal = None
+        self.wal.close()
+
+    def get_stats(self) -> Dict:
+        return {
+            "data_dir": self.data_dir,
+            "lsn": self.lsn,
+            "snapshot_lsn": self.snapshot_lsn,
+            "wal_records_since_snapshot": self.lsn - self.snapshot_lsn,
+            **self.metrics
+        }
@@ -0,0 +1,117 @@
+"""
+Prompt Builder - Prompt assembly for the response LLM call
+A fixed system prefix Ollama can keep in its KV cache, token-budgeted fact
+packing, and the keep_alive / num_ctx options that keep that cache warm
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Words and single punctuation marks (a fast stand-in for the model's BPE)
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# Identical for every request, so the model's prompt cache reuses it;
+# everything that varies (level, facts, style, query) comes after it
+SYSTEM_PREFIX = """You are MemVra, an intelligent AI assistant.
+You answer the user's query from facts retrieved from their memory, listed as [Fact: <id>] <content>.
+
+Instructions:
+1. Think step-by-step about how the facts answer the query.
+2. If facts are insufficient, admit it.
+3. Respond in the style requested.
+4. Do NOT hallucinate. Only use provided facts.
+5. STRICT CITATION: You MUST cite the source fact ID for every claim using [Fact: <id>]."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate LLM token count: one per punctuation mark, one per word
+    plus one per further 6 characters (long words split into sub-words)
+    """
+    return sum(1 + (len(token) - 1) // 6 for token in _TOKEN.findall(text))
+
+
+class PromptBuilder:
+    """
+    Builds the response prompt as (system, prompt)
+
+    - system: SYSTEM_PREFIX, byte-identical across requests and users
+    - prompt: level, packed facts, style and the query
+    - Facts are packed in ranked order: each is cut to max_fact_tokens,
+      packing stops at max_facts or when fact_budget_tokens is spent
+      (the first fact is always included, truncated to the budget)
+    - keep_alive keeps the model (and its prompt cache) loaded between
+      requests; num_ctx is pinned because changing it reloads the model
+    """
+
+    def __init__(
+        self,
+        fact_budget_tokens: int = 480,
+        max_fact_tokens: int = 160,
+        max_facts: int = 5,
+        keep_alive: Optional[str] = "30m",
+        num_ctx: Optional[int] = 4096,
+        system_prefix: str = SYSTEM_PREFIX
+    ):
+        self.fact_budget_tokens = fact_budget_tokens
+        self.max_fact_tokens = max_fact_tokens
+        self.max_facts = max_facts
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.system_prefix = system_prefix
+
+    @staticmethod
+    def truncate(text: str, max_tokens: int) -> str:
+        """Cut text after max_tokens estimated tokens, at a token boundary"""
+        used = 0
+        for match in _TOKEN.finditer(text):
+            used += 1 + (len(match.group()) - 1) // 6
+            if used > max_tokens:
+                return text[:match.start()].rstrip() + " …"
+        return text
+
+    def pack_facts(self, facts: List[Dict], with_ids: bool = True) -> Tuple[str, Dict]:
+        """Fact lines within the budget, plus packing stats"""
+        lines = []
+        remaining = self.fact_budget_tokens
+        truncated = 0
+        for fact in facts[:self.max_facts]:
+            if remaining <= 0:
+                break
+            content = fact.get("content", str(fact))
+            limit = min(self.max_fact_tokens, remaining)
+            packed = self.truncate(content, limit)
+            truncated += packed != content
+            remaining -= min(estimate_tokens(content), limit)
+            lines.append(f"[Fact: {fact.get('fact_id', 'unknown')}] {packed}" if with_ids else packed)
+        return "\n".join(lines), {
+            "facts_packed": len(lines),
+            "facts_truncated": truncated,
+            "facts_dropped": len(facts) - len(lines),
+            "fact_tokens": self.fact_budget_tokens - remaining
+        }
+
+    def response_prompt(self, facts: List[Dict], query: str, level_used: int, user_profile: Optional[Dict]) -> str:
+        """Per-request part of the response prompt (goes after system_prefix)"""
+        facts_str, _ = self.pack_facts(facts)
+
+        formality = user_profile.get("linguistic_profile", {}).get("formality", 0.5) if user_profile else 0.5
+        style = "professional and concise" if formality > 0.6 else "casual and friendly"
+
+        return f"""Facts retrieved from memory (Level {level_used}):
+{facts_str}
+
+Style: {style}
+User Query: "{query}"
+
+Response:"""
+
+    def options(self, options: Dict) -> Dict:
+        """Generation options with the pinned context size"""
+        return {**options, "num_ctx": self.num_ctx} if self.num_ctx else dict(options)
+
+    def estimate(self, prompt: str) -> Dict:
+        """Token estimate of a request: cacheable prefix vs per-request part"""
+        prefix_tokens = estimate_tokens(self.system_prefix)
+        prompt_tokens = estimate_tokens(prompt)
+        return {"prefix_tokens": prefix_tokens, "prompt_tokens": prompt_tokens, "total_tokens": prefix_tokens + prompt_tokens}
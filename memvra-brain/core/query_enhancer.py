@@ -0,0 +1,151 @@
+"""
+Query Enhancer - Local, deterministic replacement for LlamaService.enhance_query
+Stopword-filtered keywords, a synonym table (built-in groups plus the user's
+LinguisticProfiler vocabulary) and a rule-based intent classifier
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+tell know remember recall show find give anything something thing things get got
+""".split())
+
+# Concept groups: any member in the query adds the others
+SYNONYM_GROUPS = [
+    ["work", "job", "career", "office"],
+    ["bug", "error", "issue", "failure", "crash"],
+    ["debug", "debugging", "troubleshoot", "fix"],
+    ["stress", "stressed", "anxious", "overwhelmed", "pressure"],
+    ["happy", "great", "excited", "glad"],
+    ["sad", "down", "upset", "disappointed"],
+    ["tired", "exhausted", "drained", "burnout"],
+    ["exercise", "workout", "run", "gym"],
+    ["team", "colleagues", "coworkers"],
+    ["manager", "boss", "management"],
+    ["learn", "learning", "study", "studying", "reading"],
+    ["family", "parents", "kids"],
+    ["friend", "friends"],
+    ["sleep", "rest"],
+    ["code", "coding", "programming"],
+    ["like", "love", "enjoy", "prefer", "favorite"],
+]
+
+# Intent rules, first match wins (intent names follow the LLM prompt's examples)
+INTENT_RULES: List[Tuple[str, re.Pattern]] = [
+    ("summary", re.compile(r"\b(summar\w*|overview|recap|in general|overall)\b")),
+    ("identity", re.compile(r"\b(who am i|my name|about me|my job|my role)\b")),
+    ("preferences", re.compile(r"\b(like|love|prefer\w*|favou?rite|enjoy|hate|dislike)\b")),
+    ("emotions", re.compile(r"\b(feel\w*|mood|emotion\w*|stress\w*|happy|sad|anxious|upset)\b")),
+    ("temporal", re.compile(r"\b(when|yesterday|today|last (week|month|year|time)|recent\w*|ago)\b")),
+    ("facts", re.compile(r"^(what|which|where|how|did|do|does|have|has|is|are|was|were)\b")),
+]
+
+_TOKEN = re.compile(r"\b\w+\b")
+
+
+def stem(word: str) -> str:
+    """Crude suffix stripping, enough to match debug / debugging / debugged"""
+    for suffix in ("ing", "edly", "ed", "s", "ly"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    # runn(ing) -> run
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiouls":
+        word = word[:-1]
+    return word
+
+
+class LocalQueryEnhancer:
+    """
+    Same contract as LlamaService.enhance_query:
+    {intent, keywords, synonyms, enhanced_query}, with no LLM call
+
+    - keywords: query tokens minus stopwords, in order, de-duplicated
+    - synonyms: SYNONYM_GROUPS, the profile's abbreviations / synonyms,
+      and vocabulary words sharing a keyword's stem (the user's own forms)
+    - intent: first matching INTENT_RULES entry, else general_query
+    """
+
+    def __init__(self, max_synonyms_per_keyword: int = 3):
+        self.max_synonyms_per_keyword = max_synonyms_per_keyword
+        self.groups: Dict[str, List[str]] = {}
+        for group in SYNONYM_GROUPS:
+            for word in group:
+                self.groups.setdefault(word, []).extend(w for w in group if w != word)
+        # user_id -> (vocabulary size, {stem: [words by frequency]})
+        self._stem_indexes: Dict[str, Tuple[int, Dict[str, List[str]]]] = {}
+
+    def extract_keywords(self, query: str) -> List[str]:
+        words = _TOKEN.findall(query.lower())
+        return list(dict.fromkeys(w for w in words if w not in STOPWORDS and (len(w) > 1 or w.isdigit())))
+
+    def classify_intent(self, query: str) -> str:
+        text = query.lower().strip()
+        for intent, pattern in INTENT_RULES:
+            if pattern.search(text):
+                return intent
+        return "general_query"
+
+    def _stem_index(self, user_profile: Dict) -> Dict[str, List[str]]:
+        """Vocabulary grouped by stem, rebuilt only when the vocabulary changes"""
+        vocabulary = user_profile.get("linguistic_profile", {}).get("vocabulary", {})
+        user_id = user_profile.get("user_id", "")
+        cached = self._stem_indexes.get(user_id)
+        if cached is not None and cached[0] == len(vocabulary):
+            return cached[1]
+
+        index: Dict[str, List[str]] = {}
+        for word, info in sorted(vocabulary.items(), key=lambda x: -x[1].get("frequency", 0)):
+            index.setdefault(stem(word), []).append(word)
+        self._stem_indexes[user_id] = (len(vocabulary), index)
+        return index
+
+    def expand(self, keywords: List[str], query: str, user_profile: Optional[Dict] = None) -> List[str]:
+        """Synonyms for the keywords, excluding the keywords themselves"""
+        seen = set(keywords)
+        synonyms: List[str] = []
+
+        def add(words, limit: int):
+            for word in words:
+                if limit <= 0:
+                    return
+                if word not in seen:
+                    seen.add(word)
+                    synonyms.append(word)
+                    limit -= 1
+
+        linguistic = (user_profile or {}).get("linguistic_profile", {})
+        stem_index = self._stem_index(user_profile) if user_profile else {}
+        for keyword in keywords:
+            add(self.groups.get(keyword, ()), self.max_synonyms_per_keyword)
+            add(stem_index.get(stem(keyword), ()), self.max_synonyms_per_keyword)
+
+        # The user's abbreviations both ways, preferred terms for concepts
+        text = query.lower()
+        for abbrev, full in linguistic.get("abbreviations", {}).items():
+            if abbrev.lower() in keywords:
+                add(self.extract_keywords(full), self.max_synonyms_per_keyword)
+            elif full.lower() in text:
+                add([abbrev.lower()], 1)
+        for concept, user_term in linguistic.get("synonyms", {}).items():
+            if concept.lower() in text or concept.lower() in keywords:
+                add(self.extract_keywords(user_term), self.max_synonyms_per_keyword)
+        return synonyms
+
+    def enhance_query(self, user_query: str, user_profile: Optional[Dict] = None) -> Dict:
+        """Extract intent, keywords and synonyms locally (drop-in for the LLM call)"""
+        keywords = self.extract_keywords(user_query)
+        synonyms = self.expand(keywords, user_query, user_profile)
+        return {
+            "intent": self.classify_intent(user_query),
+            "keywords": keywords or user_query.lower().split(),
+            "synonyms": synonyms,
+            "enhanced_query": " ".join(keywords + synonyms) if keywords else user_query
+        }
@@ -0,0 +1,217 @@
+"""
+Stream Verifier - Sentence-level verification while the response streams
+[Fact: id] citations are checked locally as each sentence completes; only
+spans the local checks cannot decide go to the LLM judge, concurrently
+with the rest of the stream
+"""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+CITATION = re.compile(r"\[Fact:\s*([^\]]*)\]")
+# A boundary: sentence punctuation before whitespace, or a newline
+_BOUNDARY = re.compile(r"[.!?]+(?=\s)|\n")
+# Citations placed right after the punctuation belong to the sentence before
+_TRAILING_CITATIONS = re.compile(r"\s*(?:\[Fact:[^\]]*\][.!?]*\s*)+")
+_WORD = re.compile(r"[A-Za-z0-9']+")
+
+
+def parse_citations(text: str) -> List[str]:
+    """Fact ids cited in text ([Fact: a] or [Fact: a, b]), in order"""
+    ids = []
+    for match in CITATION.finditer(text):
+        ids.extend(part.strip() for part in match.group(1).split(",") if part.strip())
+    return ids
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence splitter for a token stream
+
+    A sentence is only emitted once the next non-space text is known, so
+    "... Python. [Fact: x]" keeps its citation
+    """
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        sentences = []
+        while True:
+            match = _BOUNDARY.search(self.buffer)
+            if not match:
+                break
+            end = match.end()
+            trailing = _TRAILING_CITATIONS.match(self.buffer, end)
+            if trailing:
+                end = trailing.end()
+            rest = self.buffer[end:].lstrip()
+            # Wait for more text: a citation may still follow (or is half-streamed)
+            if not rest or (rest.startswith("[") and "]" not in rest):
+                break
+            sentence = self.buffer[:end].strip()
+            self.buffer = self.buffer[end:]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self) -> List[str]:
+        sentence, self.buffer = self.buffer.strip(), ""
+        return [sentence] if sentence else []
+
+
+class StreamingVerifier:
+    """
+    Verifies a streamed response against the retrieved facts
+
+    Per completed sentence, locally:
+    - cites ids that were not retrieved -> unsupported (no LLM call)
+    - cites retrieved facts -> supported, or with a CitationVerifier scored
+      against the cited facts in the background
+    - fewer than min_words words -> trivial (connective text, skipped)
+    - otherwise uncited; consecutive uncited sentences form a span that is
+      judged as soon as the span ends, while tokens keep streaming
+
+    A judge is the CitationVerifier when it is decisive, else the LLM
+    (verify_response). finish() waits at most budget_s for outstanding
+    judges; spans still unjudged are reported as pending (their calls keep
+    running and fill the LLM cache). A judge that raised marks its span
+    skipped with the error as reason. The summary keeps the
+    {supported, reason} contract.
+    """
+
+    def __init__(
+        self,
+        llama_service,
+        facts: List[Dict],
+        user_id: Optional[str] = None,
+        budget_s: float = 2.0,
+        min_words: int = 4,
+        citation_verifier=None
+    ):
+        self.llama_service = llama_service
+        self.facts = facts
+        self.fact_ids = {fact.get("fact_id") for fact in facts}
+        self.user_id = user_id
+        self.budget_s = budget_s
+        self.min_words = min_words
+        self.citation_verifier = citation_verifier
+
+        self.splitter = SentenceSplitter()
+        self.sentences: List[Dict] = []
+        self._span: List[Dict] = []
+        self._judges: List[Tuple[List[Dict], asyncio.Task]] = []
+
+    def check_sentence(self, text: str) -> Dict:
+        """Citation-level verdict for one sentence"""
+        citations = parse_citations(text)
+        unknown = [fact_id for fact_id in citations if fact_id not in self.fact_ids]
+        if unknown:
+            return {"text": text, "status": "invalid_citation", "reason": f"Cites facts that were not retrieved: {', '.join(unknown)}"}
+        if citations:
+            return {"text": text, "status": "cited", "citations": citations}
+        if len(_WORD.findall(CITATION.sub("", text))) < self.min_words:
+            return {"text": text, "status": "trivial"}
+        return {"text": text, "status": "uncited"}
+
+    def feed(self, token: str):
+        for text in self.splitter.feed(token):
+            self._add(text)
+
+    def _add(self, text: str):
+        sentence = self.check_sentence(text)
+        self.sentences.append(sentence)
+        if sentence["status"] == "uncited":
+            self._span.append(sentence)
+            return
+        if sentence["status"] == "trivial":
+            return
+        self._escalate()
+        if sentence["status"] == "cited" and self.citation_verifier is not None:
+            cited = set(sentence["citations"])
+            self._judge([sentence], [fact for fact in self.facts if fact.get("fact_id") in cited])
+
+    def _escalate(self):
+        """Judge the current uncited span against all facts (runs concurrently)"""
+        if self._span:
+            span, self._span = self._span, []
+            self._judge(span, self.facts)
+
+    def _judge(self, sentences: List[Dict], facts: List[Dict]):
+        text = " ".join(sentence["text"] for sentence in sentences)
+        self._judges.append((sentences, asyncio.create_task(self._verdict(text, facts))))
+
+    async def _verdict(self, text: str, facts: List[Dict]) -> Dict:
+        """Local score when decisive, else the LLM judge"""
+        if self.citation_verifier is not None:
+            verdict = await self.citation_verifier.check_claim(text, facts)
+            if verdict["status"] != "ambiguous":
+                return {**verdict, "judge": "local"}
+        verdict = await self.llama_service.verify_response(text, facts, self.user_id)
+        return {**verdict, "judge": "llm"}
+
+    async def finish(self) -> Dict:
+        """Flush the last sentence, wait up to budget_s for judges, summarize"""
+        for text in self.splitter.flush():
+            self._add(text)
+        self._escalate()
+
+        started = time.perf_counter()
+        outstanding = [task for _, task in self._judges if not task.done()]
+        if outstanding:
+            await asyncio.wait(outstanding, timeout=self.budget_s)
+        wait_ms = (time.perf_counter() - started) * 1000
+
+        pending_spans = 0
+        failed_spans = 0
+        llm_judged = 0
+        for sentences, task in self._judges:
+            error = None
+            if not task.done() or task.cancelled():
+                pending_spans += 1
+                verdict = None
+            elif task.exception() is not None:
+                # A failed judge (encoder / LLM error) leaves its span unverified,
+                # it does not fail the already generated response
+                failed_spans += 1
+                verdict = None
+                error = f"Verification failed: {task.exception()}"
+            else:
+                verdict = task.result()
+                llm_judged += verdict["judge"] == "llm"
+            for sentence in sentences:
+                if error is not None:
+                    sentence["status"] = "skipped"
+                    sentence["reason"] = error
+                elif verdict is None:
+                    sentence["status"] = "pending"
+                elif verdict.get("supported", True):
+                    sentence["status"] = f"{verdict['judge']}_supported"
+                else:
+                    sentence["status"] = f"{verdict['judge']}_unsupported"
+                    sentence["reason"] = verdict.get("reason", "Potential inaccuracy detected")
+
+        unsupported = [s for s in self.sentences if s["status"] in ("invalid_citation", "local_unsupported", "llm_unsupported")]
+        if unsupported:
+            status, supported, reason = "unsupported", False, unsupported[0]["reason"]
+        elif pending_spans:
+            status, supported, reason = "pending", True, f"{pending_spans} span(s) still being verified"
+        elif failed_spans:
+            status, supported, reason = "unverified", True, f"{failed_spans} span(s) could not be verified"
+        else:
+            status, supported, reason = "verified", True, "All claims cite retrieved facts or were confirmed"
+
+        return {
+            "supported": supported,
+            "reason": reason,
+            "status": status,
+            "sentences": len(self.sentences),
+            "checked_locally": sum(1 for s in self.sentences if not s["status"].startswith(("llm_", "pending", "skipped"))),
+            "llm_judged": llm_judged,
+            "pending": pending_spans,
+            "failed": failed_spans,
+            "wait_ms": wait_ms
+        }
@@ -212,12 +212,17 @@ class TRMCompressor:
     
     def _extract_pattern(self, topic: str, facts: List[Dict]) -> str:
         """Extract pattern description from facts"""
-        fact_count = len(facts)
-        
         # Extract common words
         all_words = " ".join([f.get("content", "") for f in facts]).lower()
-        words = re.findall(r'\w+', all_words)
-        common_words = [word for word, count in Counter(words).most_common(3) if len(word) > 3]
+        return self._pattern_from_counts(topic, Counter(self._words(all_words)), len(facts))
+    
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return re.findall(r'\w+', text.lower())
+    
+    def _pattern_from_counts(self, topic: str, word_counts: Counter, fact_count: int) -> str:
+        """Pattern description from a topic's running word counts (incremental dream cycle)"""
+        common_words = [word for word, count in word_counts.most_common(3) if len(word) > 3]
         
         # Generate pattern description
         pattern = f"{topic}_PREFERENCE → {', '.join(common_words)} (from {fact_count} facts)"
@@ -29,6 +29,9 @@ class UserProfile(BaseModel):
     behavioral_predictions: List[Dict] = []
     # Example: [{"trigger": "monday_9am", "likely_query": "...", "confidence": 0.87}]
     
+    context_window: List[Dict] = []
+    # Example: [{"query": "...", "hour": 9, "day": 0, "timestamp": "..."}]  # last 10 queries
+    
     # Feature 4: Confidence Decay & Reinforcement
     fact_access_log: Dict[str, datetime] = {}
     # Example: {"fact_123": datetime(...)}
@@ -46,6 +49,9 @@ class UserProfile(BaseModel):
     retrieval_strategy: str = "start_level_2"
     # Options: "start_level_2", "start_level_1", "start_level_0"
     
+    query_enhancer: Optional[str] = None
+    # Options: "llm", "local" (None = service default, MEMVRA_QUERY_ENHANCER)
+    
     # Feature 7: Linguistic Profiling
     linguistic_profile: Dict[str, any] = {
         "vocabulary": {},
@@ -2,12 +2,14 @@
 MemVra Brain - Bicameral Predictive Architecture
 Version: 3.0
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 # Import the new API router
-from api.routes import router as api_router
+from api.routes import router as api_router, bdh_graph, execution, llama_service, persistence, release_idle_embeddings, snapshot_periodically, snapshot_writer
 
 # Initialize FastAPI
 app = FastAPI(
@@ -28,6 +30,44 @@ app.add_middleware(
 # Include the API router
 app.include_router(api_router)
 
+@app.on_event("startup")
+async def start_background_tasks():
+    # Kept on app.state: the loop only holds weak references to tasks,
+    # and shutdown cancels them
+    app.state.background_tasks = []
+    # Memory-mapped embedding store: page out idle users periodically
+    if bdh_graph.embedding_store is not None:
+        app.state.background_tasks.append(asyncio.create_task(release_idle_embeddings()))
+    # Ollama health probe: drives the circuit breaker open / half-open
+    app.state.background_tasks.append(asyncio.create_task(llama_service.breaker.run_probe(llama_service.is_available)))
+    # Write-ahead log: compact into a snapshot periodically
+    if persistence is not None:
+        app.state.background_tasks.append(asyncio.create_task(snapshot_periodically()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    # Before the final snapshot: no loop may start another capture or release
+    tasks = getattr(app.state, "background_tasks", [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+@app.on_event("shutdown")
+def snapshot_on_shutdown():
+    # Clean shutdown: next start loads the snapshot with nothing to replay
+    # (after any background snapshot write has finished)
+    snapshot_writer.shutdown(wait=True)
+    if persistence is not None:
+        persistence.snapshot()
+        persistence.close()
+    # Stop the per-stage executor threads
+    execution.shutdown()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    # Close pooled keep-alive connections to Ollama
+    await llama_service.aclose()
+
 if __name__ == "__main__":
     print("🧠 Starting MemVra Brain (Bicameral Architecture)...")
     uvicorn.run(app, host="0.0.0.0", port=8000)
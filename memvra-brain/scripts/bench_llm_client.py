@@ -0,0 +1,125 @@
+"""
+LLM Client Benchmark - sync LlamaService vs AsyncLlamaService
+Runs recall-shaped LLM sequences (enhance -> format -> verify) against the
+stand-in Ollama server (started in-process unless --host is given)
+
+Usage:
+  python scripts/bench_llm_client.py [--requests 64] [--concurrency 32] [--latency-ms 200]
+  python scripts/bench_llm_client.py --host http://localhost:11434   # real Ollama
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import uvicorn
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llama_service import LlamaService, AsyncLlamaService
+from core.ollama_client import AsyncOllamaClient
+from scripts.fake_ollama import create_app
+
+FACTS = [{"fact_id": f"fact_{i}", "content": f"stand-in fact {i}"} for i in range(5)]
+
+
+def start_fake_server(port: int, latency_ms: float, tokens: int, token_ms: float, fail_rate: float, prompt_token_ms: float = 0.0):
+    app = create_app(latency_ms, tokens, token_ms, fail_rate, prompt_token_ms)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return app, server
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def report(name: str, latencies, elapsed: float):
+    print(
+        f"{name:<28} {len(latencies) / elapsed:7.1f} req/s   "
+        f"p50 {percentile(latencies, 50) * 1000:7.0f} ms   p99 {percentile(latencies, 99) * 1000:7.0f} ms"
+    )
+
+
+def sync_recall(service: LlamaService) -> float:
+    started = time.perf_counter()
+    service.enhance_query("what do I like?")
+    text = service.format_response(facts=FACTS, query="what do I like?", level_used=0, confidence=0.9)
+    service.verify_response(text, FACTS)
+    return time.perf_counter() - started
+
+
+async def async_recall(service: AsyncLlamaService) -> float:
+    started = time.perf_counter()
+    await service.enhance_query("what do I like?")
+    text = await service.format_response(facts=FACTS, query="what do I like?", level_used=0, confidence=0.9)
+    await service.verify_response(text, FACTS)
+    return time.perf_counter() - started
+
+
+async def run_async(host: str, requests: int, concurrency: int, max_per_model: int):
+    client = AsyncOllamaClient(host=host, max_connections=concurrency, max_keepalive=concurrency, max_per_model=max_per_model)
+    service = AsyncLlamaService(client=client)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            return await async_recall(service)
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+    stats = service.client.get_stats()
+    await service.aclose()
+    return latencies, elapsed, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync vs async LlamaService throughput")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-per-model", type=int, default=8)
+    parser.add_argument("--host", default=None, help="Default: in-process stand-in server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake_app = None
+    host = args.host
+    if host is None:
+        fake_app, _ = start_fake_server(args.port, args.latency_ms, args.tokens, args.token_ms, args.fail_rate)
+        host = f"http://127.0.0.1:{args.port}"
+    os.environ["OLLAMA_HOST"] = host
+
+    # Before: one sync client, every call blocks the event loop (serial)
+    sync_service = LlamaService()
+    serial_count = min(args.requests, 8)
+    started = time.perf_counter()
+    serial = [sync_recall(sync_service) for _ in range(serial_count)]
+    report("sync, on the event loop", serial, time.perf_counter() - started)
+
+    # Sync client in a thread pool (ExecutionLayer llm stage style)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        started = time.perf_counter()
+        threaded = list(pool.map(lambda _: sync_recall(sync_service), range(args.requests)))
+        report(f"sync, {args.concurrency} threads", threaded, time.perf_counter() - started)
+
+    if fake_app is not None:
+        fake_app.state.stats["max_in_flight"] = 0
+    latencies, elapsed, stats = asyncio.run(run_async(host, args.requests, args.concurrency, args.max_per_model))
+    report(f"async, {args.concurrency} in flight", latencies, elapsed)
+
+    print(f"\n{'client retries':<28} {stats['retries']}")
+    print(f"{'deadline exceeded':<28} {stats['deadline_exceeded']}")
+    if fake_app is not None:
+        print(f"{'server max in flight':<28} {fake_app.state.stats['max_in_flight']} (cap {args.max_per_model} per model)")
@@ -0,0 +1,127 @@
+"""
+Prompt Budget Benchmark - prompt tokens and time-to-first-token per recall
+Streams recall-shaped responses through AsyncLlamaService with the previous
+prompt layout (instructions after five full facts) and with PromptBuilder
+(fixed system prefix, budgeted facts) against the stand-in Ollama server,
+which charges --prompt-token-ms per prompt token not in its prefix cache
+
+Usage:
+  python scripts/bench_prompts.py [--recalls 50] [--fact-sentences 6] [--prompt-token-ms 1.0]
+  python scripts/bench_prompts.py --host http://localhost:11434   # real Ollama (no evaluated-token counts)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llama_service import AsyncLlamaService
+from core.ollama_client import AsyncOllamaClient
+from core.prompt_builder import PromptBuilder
+from scripts.bench_llm_client import percentile, start_fake_server
+
+BRAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "What was stressing me out at work?",
+    "How did I feel about the project?",
+    "What did I do last weekend?",
+    "Tell me about my debugging sessions",
+    "What have I been learning lately?",
+]
+
+
+class LegacyPromptBuilder(PromptBuilder):
+    """The previous layout: no system prefix, five full facts, instructions after the query"""
+
+    def __init__(self):
+        super().__init__(fact_budget_tokens=10 ** 9, max_fact_tokens=10 ** 9, keep_alive=None, num_ctx=None, system_prefix="")
+
+    def response_prompt(self, facts, query, level_used, user_profile):
+        facts_str, _ = self.pack_facts(facts)
+        return f"""You are MemVra, an intelligent AI assistant.
+Facts retrieved from memory (Level {level_used}):
+{facts_str}
+
+User Query: "{query}"
+
+Instructions:
+1. Think step-by-step about how the facts answer the query.
+2. If facts are insufficient, admit it.
+3. Formulate a casual and friendly response.
+4. Do NOT hallucinate. Only use provided facts.
+5. STRICT CITATION: You MUST cite the source fact ID for every claim using [Fact: <id>].
+
+Response:"""
+
+
+def load_long_facts(path: str, sentences: int):
+    """Journal-sized facts: consecutive memories joined `sentences` at a time"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    contents = [fact["content"] for fact in (data.get("facts", []) if isinstance(data, dict) else data)]
+    return [
+        {"fact_id": f"fact_{i}", "content": " ".join(contents[i:i + sentences])}
+        for i in range(0, len(contents) - sentences, sentences)
+    ]
+
+
+async def run(name: str, builder: PromptBuilder, host: str, recalls, fake_app):
+    service = AsyncLlamaService(client=AsyncOllamaClient(host=host), prompt_builder=builder)
+    stats = fake_app.state.stats if fake_app is not None else None
+    before = dict(stats) if stats is not None else None
+
+    ttfts, estimated = [], []
+    for facts, query in recalls:
+        prompt = builder.response_prompt(facts, query, 0, None)
+        estimated.append(builder.estimate(prompt)["total_tokens"])
+        started = time.perf_counter()
+        first = None
+        async for _ in service.stream_response(facts=facts, query=query, level_used=0, confidence=0.9):
+            if first is None:
+                first = time.perf_counter() - started
+        ttfts.append(first)
+    await service.aclose()
+
+    evaluated = ""
+    if stats is not None:
+        evaluated = f"{(stats['prompt_tokens_evaluated'] - before['prompt_tokens_evaluated']) / len(recalls):9.0f}"
+    print(
+        f"{name:<12} {sum(estimated) / len(estimated):9.0f} {evaluated:>9} "
+        f"{percentile(ttfts, 50) * 1000:9.0f} ms {percentile(ttfts, 95) * 1000:9.0f} ms"
+    )
+
+
+async def main(args, host, fake_app):
+    facts = load_long_facts(args.data, args.fact_sentences)
+    rng = random.Random(args.seed)
+    recalls = [(rng.sample(facts, 5), rng.choice(QUERIES)) for _ in range(args.recalls)]
+    print(f"📊 {args.recalls} recalls, 5 facts each, ~{args.fact_sentences} memories per fact")
+    print(f"\n{'layout':<12} {'prompt':>9} {'evaluated':>9} {'TTFT p50':>12} {'TTFT p95':>12}")
+    await run("previous", LegacyPromptBuilder(), host, recalls, fake_app)
+    await run("budgeted", PromptBuilder(), host, recalls, fake_app)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens and TTFT: previous vs budgeted prompts")
+    parser.add_argument("--recalls", type=int, default=50)
+    parser.add_argument("--data", default=os.path.join(BRAIN_DIR, "data", "synthetic_memories.json"))
+    parser.add_argument("--fact-sentences", type=int, default=6)
+    parser.add_argument("--host", default=None, help="Default: in-process stand-in server")
+    parser.add_argument("--port", type=int, default=11436)
+    parser.add_argument("--prompt-token-ms", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake_app = None
+    host = args.host
+    if host is None:
+        fake_app, _ = start_fake_server(args.port, args.latency_ms, 20, 1.0, 0.0, args.prompt_token_ms)
+        host = f"http://127.0.0.1:{args.port}"
+    asyncio.run(main(args, host, fake_app))
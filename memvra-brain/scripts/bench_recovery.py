@@ -0,0 +1,94 @@
+"""
+Brain Persistence - Warm Restart Benchmark
+Fills a BDHGraph with synthetic facts (clustered random embeddings,
+journaled exactly like add_facts), snapshots, appends a WAL tail, then
+measures recovery into a fresh graph - the encoder is never called
+
+Usage:
+  python scripts/bench_recovery.py [--facts 1000000] [--users 1000] [--wal-tail 10000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bdh_graph import BDHGraph
+from core.persistence import BrainPersistence
+
+
+def synthetic_batches(total: int, users: int, dim: int, batch_size: int, start: int = 0):
+    """Facts around 32 topic centres per user so the graph gets real edges"""
+    rng = np.random.default_rng(start)
+    centres = rng.normal(size=(32, dim)).astype(np.float32)
+    for offset in range(start, start + total, batch_size):
+        count = min(batch_size, start + total - offset)
+        topics = rng.integers(0, len(centres), size=count)
+        embeddings = centres[topics] + 0.35 * rng.normal(size=(count, dim)).astype(np.float32)
+        facts = [
+            {
+                "fact_id": f"fact_{offset + i}",
+                "content": f"synthetic fact {offset + i} about topic {topics[i]}",
+                "user_id": f"user_{(offset + i) % users}",
+                "metadata": {"version": "new_fact"}
+            }
+            for i in range(count)
+        ]
+        yield facts, embeddings
+
+
+def ingest(graph: BDHGraph, persistence: BrainPersistence, batches):
+    """Same WAL record + apply as BDHGraph.add_facts, minus the encoder"""
+    for facts, embeddings in batches:
+        persistence.append("add_facts", {"facts": facts}, embeddings)
+        graph.apply("add_facts", {"facts": facts}, embeddings)
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm restart timing for BrainPersistence")
+    parser.add_argument("--facts", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--wal-tail", type=int, default=10000, help="Facts written after the snapshot")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--data-dir", default=None, help="Default: a temporary directory")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="memvra-recovery-")
+    graph = BDHGraph(index_backend="exact")
+    persistence = BrainPersistence(data_dir, graph, [], {})
+    persistence.recover()
+
+    started = time.perf_counter()
+    ingest(graph, persistence, synthetic_batches(args.facts, args.users, args.dim, args.batch_size))
+    print(f"📥 Ingested {args.facts} facts in {time.perf_counter() - started:.1f}s")
+
+    snapshot = persistence.snapshot()
+    ingest(graph, persistence, synthetic_batches(args.wal_tail, args.users, args.dim, args.batch_size, start=args.facts))
+    persistence.close()
+    expected = graph.get_stats()
+
+    restarted = BDHGraph(index_backend="exact")
+    report = BrainPersistence(data_dir, restarted, [], {}).recover()
+    actual = restarted.get_stats()
+
+    print(f"\n{'facts':<28} {report['facts']}")
+    print(f"{'snapshot size':<28} {dir_size(os.path.join(data_dir, snapshot['snapshot'])) / 1e6:.1f} MB (written in {snapshot['seconds']:.2f}s)")
+    print(f"{'snapshot load':<28} {report['snapshot_load_s']:.2f}s")
+    print(f"{'WAL replay':<28} {report['replay_s']:.2f}s ({report['replayed_records']} records)")
+    print(f"{'total recovery':<28} {report['recovery_s']:.2f}s")
+    print(f"{'encoder texts on restart':<28} {restarted.encoder.get_stats()['texts']}")
+    print(f"{'state matches':<28} {all(expected[k] == actual[k] for k in ('total_nodes', 'total_edges', 'level_0_facts'))}")
+
+    if not args.data_dir:
+        shutil.rmtree(data_dir, ignore_errors=True)
@@ -0,0 +1,93 @@
+"""
+Quantized Embedding Storage - Recall Loss Report
+Measures float16 / int8 storage against float32 on the bundled datasets:
+- recall@k (tie-aware: a hit is any row scoring >= the float32 k-th score)
+- mean absolute similarity error
+- bytes per stored vector
+
+Usage:
+  python scripts/eval_quantization.py [--top-k 5] [--data data/test_batch_full.json ...]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_transformers import SentenceTransformer
+from core.embedding_matrix import EmbeddingMatrix, PRECISIONS
+
+BRAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_texts(paths):
+    """Unique fact contents plus their individual sentences (more distinct vectors)"""
+    texts = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        facts = data.get("facts", []) if isinstance(data, dict) else data
+        for fact in facts:
+            content = fact.get("content", "").strip()
+            if not content:
+                continue
+            texts.add(content)
+            texts.update(s.strip() for s in re.split(r"(?<=[.!?])\s+", content) if len(s.strip()) > 10)
+    return sorted(texts)
+
+
+def evaluate(embeddings: np.ndarray, precision: str, top_k: int):
+    ids = [str(i) for i in range(len(embeddings))]
+    exact = EmbeddingMatrix(precision="float32")
+    exact.add_many(ids, embeddings)
+    quantized = EmbeddingMatrix(precision=precision)
+    quantized.add_many(ids, embeddings)
+
+    queries = EmbeddingMatrix.normalize(embeddings)
+    exact_scores = exact.scores_many(queries)
+    quantized_scores = quantized.scores_many(queries)
+
+    k = min(top_k, len(ids))
+    hits = 0
+    for row in range(len(queries)):
+        kth_exact = np.sort(exact_scores[row])[-k]
+        returned = [int(i) for i, _ in quantized.top_k(quantized_scores[row], k)]
+        hits += sum(1 for i in returned if exact_scores[row, i] >= kth_exact - 1e-6)
+
+    return {
+        "precision": precision,
+        "recall_at_k": hits / (k * len(queries)),
+        "score_mae": float(np.abs(exact_scores - quantized_scores).mean()),
+        "bytes_per_vector": quantized.nbytes / len(ids),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall loss of quantized embedding storage")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--data", nargs="*", default=None, help="Dataset files (default: data/*.json)")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    paths = args.data or sorted(glob.glob(os.path.join(BRAIN_DIR, "data", "*.json")))
+    texts = load_texts(paths)
+    print(f"📊 {len(texts)} distinct texts from {len(paths)} dataset file(s)")
+
+    encoder = SentenceTransformer(args.model)
+    embeddings = encoder.encode(texts, batch_size=64)
+
+    baseline = None
+    print(f"\n{'precision':<10} {'recall@' + str(args.top_k):<10} {'score MAE':<12} {'bytes/vec':<10} {'vs float32'}")
+    for precision in PRECISIONS:
+        report = evaluate(embeddings, precision, args.top_k)
+        baseline = baseline or report["bytes_per_vector"]
+        print(
+            f"{precision:<10} {report['recall_at_k']:<10.4f} {report['score_mae']:<12.6f} "
+            f"{report['bytes_per_vector']:<10.0f} {baseline / report['bytes_per_vector']:.1f}x smaller"
+        )
@@ -0,0 +1,139 @@
+"""
+Query Enhancement - Offline Retrieval Quality Report
+Compares raw queries, LocalQueryEnhancer and the LLM enhancer (Ollama via
+OLLAMA_HOST, skipped when unreachable) on the bundled datasets:
+- hit@k and MRR of the source text among fact contents and their sentences
+- enhancement latency per query
+
+Queries are generated deterministically from each text's keywords with
+question templates, or read from --queries (JSON list of {query, relevant})
+
+Usage:
+  python scripts/eval_query_enhancement.py [--top-k 5] [--data data/test_batch_full.json ...]
+  python scripts/eval_query_enhancement.py --queries my_queries.json --engines raw local
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_transformers import SentenceTransformer
+from core.embedding_matrix import EmbeddingMatrix
+from core.linguistic_profiler import LinguisticProfiler
+from core.llama_service import AsyncLlamaService
+from core.query_enhancer import LocalQueryEnhancer
+from core.user_profile import UserProfile
+from scripts.eval_quantization import load_texts
+
+BRAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATES = [
+    "What do you remember about {a} and {b}?",
+    "When was I dealing with {a}?",
+    "Tell me about the time with {a}, {b} and {c}",
+    "did I ever mention {b}",
+    "anything on {c} or {a}?",
+]
+
+
+def generate_queries(texts, enhancer: LocalQueryEnhancer, seed: int = 0):
+    """One templated query per text from 3 of its keywords; relevant = texts containing it"""
+    rng = random.Random(seed)
+    queries = []
+    for text in texts:
+        keywords = [w for w in enhancer.extract_keywords(text) if len(w) > 3]
+        if len(keywords) < 3:
+            continue
+        a, b, c = rng.sample(keywords, 3)
+        relevant = [other for other in texts if text in other]
+        queries.append({"query": rng.choice(TEMPLATES).format(a=a, b=b, c=c), "relevant": relevant})
+    return queries
+
+
+async def enhance_all(engine: str, queries, local: LocalQueryEnhancer, llm: AsyncLlamaService, profile: dict):
+    """(enhanced texts, seconds per query)"""
+    texts, latencies = [], []
+    for item in queries:
+        started = time.perf_counter()
+        if engine == "raw":
+            text = item["query"]
+        elif engine == "local":
+            text = local.enhance_query(item["query"], profile)["enhanced_query"]
+        else:
+            text = (await llm.enhance_query(item["query"], profile))["enhanced_query"]
+        latencies.append(time.perf_counter() - started)
+        texts.append(text)
+    return texts, latencies
+
+
+def score(matrix: EmbeddingMatrix, query_vectors: np.ndarray, queries, top_k: int):
+    hits, reciprocal_ranks = 0, []
+    for vector, item in zip(query_vectors, queries):
+        ranked = [item_id for item_id, _ in matrix.search(vector, len(matrix))]
+        relevant = set(item["relevant"])
+        rank = next((i + 1 for i, item_id in enumerate(ranked) if item_id in relevant), None)
+        hits += rank is not None and rank <= top_k
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    return hits / len(queries), float(np.mean(reciprocal_ranks))
+
+
+async def main(args):
+    paths = args.data or sorted(glob.glob(os.path.join(BRAIN_DIR, "data", "*.json")))
+    texts = load_texts(paths)
+    local = LocalQueryEnhancer()
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = json.load(f)
+    else:
+        queries = generate_queries(texts, local, args.seed)
+    print(f"📊 {len(texts)} distinct texts from {len(paths)} dataset file(s), {len(queries)} queries")
+
+    # Tenant vocabulary as the dream cycle would build it
+    profile = UserProfile(user_id="eval")
+    LinguisticProfiler().build_profile(texts, profile)
+    profile = profile.to_dict()
+
+    encoder = SentenceTransformer(args.model)
+    matrix = EmbeddingMatrix()
+    matrix.add_many(texts, encoder.encode(texts, batch_size=64))
+
+    llm = None
+    if "llm" in args.engines:
+        llm = AsyncLlamaService()
+        if not await llm.is_available():
+            print(f"⚠ Warning: Ollama not reachable at {llm.client.host} - skipping the llm engine")
+            args.engines = [engine for engine in args.engines if engine != "llm"]
+
+    print(f"\n{'engine':<8} {'hit@' + str(args.top_k):<8} {'MRR':<8} {'enhance p50':>14} {'enhance p95':>14}")
+    for engine in args.engines:
+        enhanced, latencies = await enhance_all(engine, queries, local, llm, profile)
+        hit_rate, mrr = score(matrix, encoder.encode(enhanced, batch_size=64), queries, args.top_k)
+        latencies.sort()
+        print(
+            f"{engine:<8} {hit_rate:<8.3f} {mrr:<8.3f} "
+            f"{latencies[len(latencies) // 2] * 1000:>11.2f} ms {latencies[int(len(latencies) * 0.95)] * 1000:>11.2f} ms"
+        )
+
+    if llm is not None:
+        await llm.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval quality of local vs LLM query enhancement")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--data", nargs="*", default=None, help="Dataset files (default: data/*.json)")
+    parser.add_argument("--queries", default=None, help="JSON list of {query, relevant: [texts]}")
+    parser.add_argument("--engines", nargs="*", default=["raw", "local", "llm"], choices=["raw", "local", "llm"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
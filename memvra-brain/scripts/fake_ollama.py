@@ -0,0 +1,127 @@
+"""
+Stand-in Ollama server for tests and benchmarks (no model, no GPU)
+Implements /api/tags and /api/generate (streaming and not) with a
+configurable latency, token rate and failure rate, plus prompt evaluation
+time per prompt token with a per-model prefix cache (like llama.cpp's)
+
+Usage:
+  python scripts/fake_ollama.py [--port 11435] [--latency-ms 200] [--tokens 40] [--token-ms 5] [--fail-rate 0.0] [--prompt-token-ms 0]
+  OLLAMA_HOST=http://localhost:11435 python main.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+# Add parent directory to path to import core modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_builder import estimate_tokens
+
+
+def create_app(
+    latency_ms: float = 200.0,
+    tokens: int = 40,
+    token_ms: float = 5.0,
+    fail_rate: float = 0.0,
+    prompt_token_ms: float = 0.0
+) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    app.state.stats = {
+        "generate": 0, "in_flight": 0, "max_in_flight": 0, "failed": 0,
+        "prompt_tokens": 0, "prompt_tokens_evaluated": 0
+    }
+    # model -> last full prompt: its shared prefix with the next one is free
+    app.state.prompt_cache = {}
+
+    def evaluate_prompt(body: dict):
+        """(prompt tokens, tokens not served from the prefix cache)"""
+        text = f"{body.get('system', '')}\n{body.get('prompt', '')}"
+        cached = app.state.prompt_cache.get(body.get("model"), "")
+        common = 0
+        for a, b in zip(text, cached):
+            if a != b:
+                break
+            common += 1
+        app.state.prompt_cache[body.get("model")] = text
+        total = estimate_tokens(text)
+        evaluated = total - estimate_tokens(text[:common])
+        app.state.stats["prompt_tokens"] += total
+        app.state.stats["prompt_tokens_evaluated"] += evaluated
+        return total, evaluated
+
+    def answer(body: dict) -> str:
+        # JSON-shaped answers for the enhancement and verification prompts
+        prompt = body.get("prompt", "")
+        if body.get("format") == "json" or "Return JSON" in prompt:
+            return json.dumps({"supported": True, "reason": "stand-in"})
+        if "Respond in JSON format" in prompt:
+            return json.dumps({"intent": "facts", "keywords": ["stand", "in"], "synonyms": []})
+        return " ".join(["token"] * tokens)
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "llama3.1:8b-instruct-fp16"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        stats = app.state.stats
+        stats["generate"] += 1
+        if random.random() < fail_rate:
+            stats["failed"] += 1
+            return JSONResponse({"error": "stand-in failure"}, status_code=503)
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        text = answer(body)
+        prompt_tokens, evaluated = evaluate_prompt(body)
+        prompt_eval_s = evaluated * prompt_token_ms / 1000
+
+        if not body.get("stream", True):
+            try:
+                await asyncio.sleep(prompt_eval_s + (latency_ms + tokens * token_ms) / 1000)
+                return {"model": body.get("model"), "response": text, "done": True, "prompt_eval_count": prompt_tokens}
+            finally:
+                stats["in_flight"] -= 1
+
+        async def chunks():
+            try:
+                await asyncio.sleep(prompt_eval_s + latency_ms / 1000)
+                for word in text.split(" "):
+                    yield json.dumps({"model": body.get("model"), "response": word + " ", "done": False}) + "\n"
+                    await asyncio.sleep(token_ms / 1000)
+                yield json.dumps({"model": body.get("model"), "response": "", "done": True, "prompt_eval_count": prompt_tokens}) + "\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Time to first token")
+    parser.add_argument("--tokens", type=int, default=40, help="Tokens per answer")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Delay between tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of generate calls answered with 503")
+    parser.add_argument("--prompt-token-ms", type=float, default=0.0, help="Prompt evaluation time per uncached prompt token")
+    args = parser.parse_args()
+
+    print(f"🦙 Fake Ollama on http://localhost:{args.port}")
+    uvicorn.run(
+        create_app(args.latency_ms, args.tokens, args.token_ms, args.fail_rate, args.prompt_token_ms),
+        host="127.0.0.1", port=args.port, log_level="warning"
+    )
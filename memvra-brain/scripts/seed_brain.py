@@ -2,7 +2,6 @@
 Simplified seed script for MemVra - Uses brain API directly
 """
 import requests
-import time
 
 BRAIN_URL = "http://localhost:8000/v1"
 USER_ID = "test@example.com"  # Use actual logged-in user
@@ -32,23 +31,23 @@ def seed_brain():
     print("=" * 60)
     
     stored = 0
-    for i, content in enumerate(TEST_FACTS, 1):
-        try:
-            response = requests.post(
-                f"{BRAIN_URL}/logical/store",
-                params={"user_id": USER_ID},
-                json={
-                    "user_id": USER_ID,
-                    "content": content,
-                    "tags": []
-                }
-            )
-            response.raise_for_status()
-            print(f"✓ [{i:2d}/15] {content[:55]}...")
+    try:
+        # One bulk request instead of one POST (and sleep) per fact
+        response = requests.post(
+            f"{BRAIN_URL}/logical/store:batch",
+            json={
+                "facts": [
+                    {"user_id": USER_ID, "content": content, "tags": []}
+                    for content in TEST_FACTS
+                ]
+            }
+        )
+        response.raise_for_status()
+        for i, (content, result) in enumerate(zip(TEST_FACTS, response.json()["results"]), 1):
+            print(f"✓ [{i:2d}/15] {content[:55]}... ({result['fact_id']})")
             stored += 1
-            time.sleep(0.1)
-        except Exception as e:
-            print(f"✗ [{i:2d}/15] Failed: {str(e)[:60]}")
+    except Exception as e:
+        print(f"✗ Batch store failed: {str(e)[:60]}")
     
     print("=" * 60)
     print(f"✓ Successfully stored {stored}/15 memories in brain")
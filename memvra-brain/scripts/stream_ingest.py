@@ -0,0 +1,104 @@
+"""
+Stream a fact dataset into MemVra Brain via the NDJSON ingest endpoint
+Resumable: the last acknowledged offset is kept in a checkpoint file
+
+Usage:
+  python scripts/stream_ingest.py data/test_batch_mega.json --user-id demo
+  python scripts/stream_ingest.py backfill.ndjson --user-id demo --checkpoint backfill.ckpt
+"""
+import argparse
+import json
+import os
+import time
+
+import requests
+
+BRAIN_URL = "http://localhost:8000/v1"
+
+
+def iter_records(path: str):
+    """Yield fact records; NDJSON files are read line by line, JSON files are loaded"""
+    if path.endswith((".ndjson", ".jsonl")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    yield from data.get("facts", []) if isinstance(data, dict) else data
+
+
+def read_checkpoint(path: str) -> int:
+    """Offset of the next record to send"""
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    return 0
+
+
+def write_checkpoint(path: str, next_offset: int):
+    if path:
+        with open(path, "w") as f:
+            f.write(str(next_offset))
+
+
+def stream_ingest(path: str, user_id: str, checkpoint: str, batch_size: int):
+    start_offset = read_checkpoint(checkpoint)
+    if start_offset:
+        print(f"↻ Resuming from offset {start_offset}")
+
+    def body():
+        for offset, record in enumerate(iter_records(path)):
+            if offset < start_offset:
+                continue
+            line = {
+                "user_id": record.get("user_id", user_id),
+                "content": record["content"],
+                "tags": record.get("tags", [])
+            }
+            yield (json.dumps(line) + "\n").encode("utf-8")
+
+    started = time.time()
+    response = requests.post(
+        f"{BRAIN_URL}/logical/store:stream",
+        params={"start_offset": start_offset, "batch_size": batch_size},
+        data=body(),
+        headers={"Content-Type": "application/x-ndjson"},
+        stream=True
+    )
+    response.raise_for_status()
+
+    summary = {}
+    for raw in response.iter_lines():
+        if not raw:
+            continue
+        message = json.loads(raw)
+        kind = message.get("type")
+        if kind == "result" and "error" in message:
+            print(f"✗ offset {message['offset']}: {message['error'][:80]}")
+        elif kind == "progress":
+            write_checkpoint(checkpoint, message["acknowledged_offset"] + 1)
+            rate = message["stored"] / max(time.time() - started, 1e-6)
+            print(f"  acknowledged {message['acknowledged_offset']} ({message['stored']} stored, {rate:.0f} facts/s)")
+        elif kind in ("done", "error"):
+            summary = message
+
+    elapsed = time.time() - started
+    if summary.get("type") == "error":
+        print(f"✗ Ingest stopped: {summary.get('detail')} (resume with the same command)")
+    else:
+        print(f"✓ Stored {summary.get('stored', 0)} facts in {elapsed:.1f}s ({summary.get('failed', 0)} failed)")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream facts into MemVra Brain")
+    parser.add_argument("path", help="JSON ({'facts': [...]} or list) or NDJSON file")
+    parser.add_argument("--user-id", default="test@example.com")
+    parser.add_argument("--checkpoint", default=None, help="File holding the next offset to send")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    stream_ingest(args.path, args.user_id, args.checkpoint, args.batch_size)
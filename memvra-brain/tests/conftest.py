@@ -0,0 +1,68 @@
+"""
+Shared fixtures for the core storage / index / durability tests
+BDHGraph gets a deterministic bag-of-words encoder instead of a
+SentenceTransformer, so tests run offline and similarities are predictable
+"""
+import hashlib
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import core modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.bdh_graph as bdh_graph_module
+from core.bdh_graph import BDHGraph
+
+DIM = 64
+
+
+class HashingEncoder:
+    """SentenceTransformer stand-in: hashed word counts (same words -> same vector)"""
+
+    def __init__(self, name=None):
+        self.name = name
+
+    @staticmethod
+    def _vector(text: str) -> np.ndarray:
+        vector = np.zeros(DIM, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16)
+            vector[digest % DIM] += 1.0
+        return vector
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        if isinstance(sentences, str):
+            return self._vector(sentences)
+        return np.stack([self._vector(text) for text in sentences]) if sentences else np.zeros((0, DIM), np.float32)
+
+
+def random_unit_vectors(count: int, dim: int = DIM, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def make_graph(monkeypatch):
+    """BDHGraph factory with the hashing encoder (kwargs go to BDHGraph)"""
+    monkeypatch.setattr(bdh_graph_module, "SentenceTransformer", HashingEncoder)
+
+    def make(**kwargs):
+        kwargs.setdefault("embedding_cache_mb", 0)
+        kwargs.setdefault("encoder_max_wait_ms", 0)
+        return BDHGraph(**kwargs)
+
+    return make
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    """api.routes on the hashing encoder, without persistence or on-disk stores"""
+    monkeypatch.setattr(bdh_graph_module, "SentenceTransformer", HashingEncoder)
+    for name in ("MEMVRA_DATA_DIR", "MEMVRA_EMBEDDING_DIR", "MEMVRA_LLM_CACHE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    import api.routes as routes_module
+    return routes_module
@@ -0,0 +1,77 @@
+"""
+ANN Index tests - HNSW recall against exact search, deletes, state export
+"""
+import numpy as np
+
+from core.ann_index import HNSWIndex
+from core.embedding_matrix import EmbeddingMatrix
+
+
+def clustered_vectors(count: int, dim: int = 32, clusters: int = 20, seed: int = 0) -> np.ndarray:
+    """Sentence-embedding-like data: points around a few topic centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim))
+    vectors = centres[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dim))
+    return vectors.astype(np.float32)
+
+
+def build(count: int = 1000, seed: int = 0):
+    matrix = EmbeddingMatrix()
+    matrix.add_many([f"n{i}" for i in range(count)], clustered_vectors(count, seed=seed))
+    index = HNSWIndex(matrix, M=12, ef_construction=80, ef_search=64)
+    for node_id in matrix.ids:
+        index.insert(node_id)
+    return matrix, index
+
+
+def queries(count: int = 50) -> np.ndarray:
+    return clustered_vectors(count, seed=99)
+
+
+def test_recall_against_exact_search():
+    _, index = build()
+    report = index.measure_recall(queries(), top_k=10)
+    assert report["recall_at_k"] >= 0.9
+    # Sub-linear: far fewer similarity evaluations than a full scan
+    assert report["avg_distance_evals"] < len(index) / 2
+
+
+def test_recall_holds_after_deletes():
+    matrix, index = build()
+    deleted = [f"n{i}" for i in range(0, len(matrix), 3)]
+    for node_id in deleted:
+        index.delete(node_id)  # before the row goes, as BDHGraph does
+        matrix.remove(node_id)
+
+    assert len(index) == len(matrix)
+    for query in queries(20):
+        assert not {node for node, _ in index.search(query, 10)} & set(deleted)
+    assert index.measure_recall(queries(), top_k=10)["recall_at_k"] >= 0.85
+
+    # Links only point at live nodes
+    for links in index.layers:
+        for source, targets in links.items():
+            assert source in index and all(target in index for target in targets)
+
+
+def test_reinsert_overwritten_vector():
+    matrix, index = build(count=300)
+    target = matrix.get("n5")
+    matrix.add("n0", target)  # overwrite n0 with n5's vector
+    index.insert("n0")
+    found = dict(index.search(target, 2))
+    assert set(found) == {"n0", "n5"}
+
+
+def test_export_and_load_state_round_trip():
+    matrix, index = build(count=500)
+    restored = HNSWIndex(matrix, M=12, ef_construction=80, ef_search=64)
+    restored.load_state(index.export_state())
+
+    for query in queries(20):
+        assert restored.search(query, 10) == index.search(query, 10)
+    # Continued inserts draw the same levels as the original would
+    matrix.add("extra", clustered_vectors(1, seed=5)[0])
+    index.insert("extra")
+    restored.insert("extra")
+    assert restored.node_levels["extra"] == index.node_levels["extra"]
@@ -0,0 +1,49 @@
+"""
+Circuit Breaker tests - state transitions from calls and health probes
+"""
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_failed_probes_count_toward_the_threshold():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    breaker.record_probe(False)
+    breaker.record_probe(False)
+    assert breaker.state == CLOSED and breaker.allow()
+
+    # A good probe resets the streak
+    breaker.record_probe(True)
+    breaker.record_probe(False)
+    breaker.record_probe(False)
+    assert breaker.state == CLOSED
+
+    breaker.record_probe(False)
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.metrics["opened"] == 1
+
+
+def test_probes_and_calls_share_the_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_probe(False)
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_probe_moves_open_to_half_open_and_failure_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=3600)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    breaker.record_probe(True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()       # one trial call
+    assert not breaker.allow()   # the rest fall back meanwhile
+
+    breaker.record_probe(False)
+    assert breaker.state == OPEN
+
+    breaker.record_probe(True)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.consecutive_failures == 0
@@ -0,0 +1,94 @@
+"""
+CompactGraph tests - same adjacency as networkx under adds, removals and compaction
+"""
+import random
+
+import networkx as nx
+import pytest
+
+from core.compact_graph import CompactGraph
+
+
+def assert_same(graph: CompactGraph, reference: nx.Graph):
+    assert set(graph.nodes()) == set(reference.nodes)
+    assert graph.number_of_edges() == reference.number_of_edges()
+    assert {frozenset(edge) for edge in graph.edges()} == {frozenset(edge) for edge in reference.edges}
+    for node in reference.nodes:
+        assert graph.degree(node) == reference.degree(node)
+        assert dict(graph.neighbours(node)) == pytest.approx(
+            {other: data["weight"] for other, data in reference[node].items()}
+        )
+
+
+def random_operations(graph: CompactGraph, reference: nx.Graph, seed: int, steps: int = 3000):
+    rng = random.Random(seed)
+    next_id = 0
+    for _ in range(steps):
+        nodes = list(reference.nodes)
+        op = rng.random()
+        if op < 0.2 or len(nodes) < 2:
+            node = f"n{next_id}"
+            next_id += 1
+            graph.add_node(node, level=0, user_id=rng.choice(["u1", "u2"]))
+            reference.add_node(node)
+        elif op < 0.75:
+            u, v = rng.sample(nodes, 2)
+            weight = round(rng.random(), 3)
+            graph.add_edge(u, v, weight)
+            reference.add_edge(u, v, weight=weight)
+        elif op < 0.9:
+            u, v = rng.sample(nodes, 2)
+            assert graph.remove_edge(u, v) == reference.has_edge(u, v)
+            if reference.has_edge(u, v):
+                reference.remove_edge(u, v)
+        else:
+            node = rng.choice(nodes)
+            graph.remove_node(node)
+            reference.remove_node(node)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_networkx_after_removals(seed):
+    graph, reference = CompactGraph(), nx.Graph()
+    random_operations(graph, reference, seed)
+    assert_same(graph, reference)
+
+    graph.compact()
+    assert_same(graph, reference)
+
+    # Still consistent when mutated after compaction (blocks regrow from exact size)
+    random_operations(graph, reference, seed + 100, steps=500)
+    assert_same(graph, reference)
+
+
+def test_removed_ids_can_be_reused():
+    graph = CompactGraph()
+    for node in ("a", "b", "c"):
+        graph.add_node(node, level=0, user_id="u")
+    graph.add_edge("a", "b", 0.9)
+    graph.remove_node("a")
+    graph.add_node("a", level=1, user_id="u")
+
+    assert not graph.has_edge("a", "b")
+    assert graph.degree("a") == 0 and graph.degree("b") == 0
+    assert graph.node("a").level == 1
+
+
+def test_array_round_trip():
+    graph, reference = CompactGraph(), nx.Graph()
+    random_operations(graph, reference, seed=7, steps=1000)
+    graph.add_edge(*list(reference.nodes)[:2], 0.5, kind="profile_link")
+    reference.add_edge(*list(reference.nodes)[:2], weight=0.5)
+
+    nodes, arrays = graph.to_arrays()
+    records = [graph.node(node) for node in nodes]
+    restored = CompactGraph()
+    restored.load_arrays(
+        nodes, [r.level for r in records], list(graph.users.ids), [r.user for r in records],
+        [r.kind for r in records], arrays
+    )
+    restored.edge_types = list(graph.edge_types)
+
+    assert_same(restored, reference)
+    assert set(restored.edges(data=True)) == set(graph.edges(data=True))
+    assert nx.utils.graphs_equal(restored.to_networkx(), graph.to_networkx())
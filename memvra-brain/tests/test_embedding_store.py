@@ -0,0 +1,72 @@
+"""
+Embedding Store tests - memory-mapped matrices across restarts
+"""
+import gc
+import resource
+
+from tests.conftest import random_unit_vectors
+from core.embedding_store import EmbeddingStore
+
+
+def test_reopened_matrix_replays_ids_and_vectors(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    vectors = random_unit_vectors(5)
+    matrix = store.open_matrix("u", 0)
+    matrix.add_many([f"f{i}" for i in range(5)], vectors)
+    matrix.remove("f1")
+    matrix.flush()
+
+    reopened = EmbeddingStore(str(tmp_path)).open_matrix("u", 0)
+    assert sorted(reopened.ids) == ["f0", "f2", "f3", "f4"]
+    for i in (0, 2, 3, 4):
+        assert abs(float(reopened.get(f"f{i}") @ vectors[i]) - 1.0) < 1e-5
+    assert store.list_matrices() == [("u", 0)]
+
+
+def test_restart_without_wal_drops_orphan_rows(make_graph, tmp_path):
+    # Store only (no WAL / snapshot): a restarted graph has no nodes for old rows
+    graph = make_graph(embedding_store_dir=str(tmp_path), index_backend="exact")
+    graph.add_fact("a", "I like dark theme in my editor", "u")
+    graph.add_fact("b", "I like dark theme in my editor a lot", "u")
+    assert graph.graph.has_edge("a", "b")
+    graph.matrices[("u", 0)].flush()
+
+    restarted = make_graph(embedding_store_dir=str(tmp_path), index_backend="exact")
+    result = restarted.add_fact("c", "I like dark theme in my editor", "u")
+
+    assert result == {"fact_id": "c", "connections": 0}
+    assert list(restarted.matrices[("u", 0)].ids) == ["c"]
+    facts = restarted.retrieve(query="dark theme editor", user_id="u", level=0)["facts"]
+    assert [fact["fact_id"] for fact in facts] == ["c"]
+
+    # The header was compacted, a second restart starts from the live row only
+    again = make_graph(embedding_store_dir=str(tmp_path), index_backend="exact")
+    again.add_facts([{"fact_id": "d", "content": "dark theme editor", "user_id": "u"}])
+    assert list(again.matrices[("u", 0)].ids) == ["d"]
+
+
+def test_released_matrices_hold_no_file_descriptors(tmp_path):
+    # Far more matrices than descriptors: released ones must not keep ids.log
+    # (or their mappings) open
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limit = 64
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+    try:
+        store = EmbeddingStore(str(tmp_path))
+        matrices = []
+        for i in range(limit * 3):
+            matrix = store.open_matrix(f"u{i}", 0)
+            matrix.add_many([f"f{i}"], random_unit_vectors(1, seed=i))
+            matrix.release()
+            matrices.append(matrix)
+        gc.collect()
+
+        # Released matrices still serve reads and reopen the log on write
+        first = matrices[0]
+        assert abs(float(first.get("f0") @ random_unit_vectors(1, seed=0)[0]) - 1.0) < 1e-5
+        first.add_many(["g0"], random_unit_vectors(1, seed=999))
+        first.release()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    assert sorted(EmbeddingStore(str(tmp_path)).open_matrix("u0", 0).ids) == ["f0", "g0"]
@@ -0,0 +1,95 @@
+"""
+Encoding Service tests - batching, per-call batch_size and cancelled callers
+"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from core.embedding_cache import EmbeddingCache
+from core.encoding_service import EncodingService
+from tests.conftest import HashingEncoder
+
+
+class RecordingModel(HashingEncoder):
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        self.batch_sizes.append(batch_size)
+        return super().encode(sentences, batch_size=batch_size)
+
+
+def test_batch_size_reaches_the_model():
+    model = RecordingModel()
+    service = EncodingService(model, max_batch_size=64, max_wait_ms=0)
+    texts = [f"text {i}" for i in range(10)]
+
+    embeddings = service.encode(texts, batch_size=4)
+    service.encode(texts)
+
+    assert model.batch_sizes == [4, 64]
+    assert embeddings.shape == (10, 64)
+    assert np.allclose(embeddings[3], model._vector("text 3"))
+
+
+def test_single_text_returns_one_vector():
+    service = EncodingService(RecordingModel(), max_wait_ms=0)
+    assert service.encode("hello world").shape == (64,)
+
+
+class GatedModel(HashingEncoder):
+    """Blocks each encode until the gate opens"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        self.gate.wait(timeout=5)
+        return super().encode(sentences, batch_size=batch_size)
+
+
+@pytest.mark.parametrize("cache", [None, "cache"])
+def test_cancelled_caller_does_not_stop_the_worker(cache):
+    model = GatedModel()
+    service = EncodingService(model, max_wait_ms=0, cache=EmbeddingCache() if cache else None)
+
+    busy = service.submit("first text")  # the worker blocks on this batch
+    time.sleep(0.05)
+    abandoned = service.submit("second text")
+    assert abandoned.cancel()
+    model.gate.set()
+
+    assert busy.result(timeout=5).shape == (64,)
+    assert abandoned.cancelled()
+    assert service.submit(["third text", "fourth text"]).result(timeout=5).shape == (2, 64)
+
+
+def test_cancelled_await_does_not_stop_the_worker():
+    model = GatedModel()
+    service = EncodingService(model, max_wait_ms=0)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(service.encode_async("slow text"), timeout=0.05)
+        model.gate.set()
+        return await asyncio.wait_for(service.encode_async("next text"), timeout=5)
+
+    assert asyncio.run(run()).shape == (64,)
+
+
+def test_failed_batch_keeps_the_worker_alive():
+    class FlakyModel(HashingEncoder):
+        def encode(self, sentences, batch_size=32, **kwargs):
+            if "boom" in sentences:
+                raise RuntimeError("encoder failure")
+            return super().encode(sentences, batch_size=batch_size)
+
+    service = EncodingService(FlakyModel(), max_wait_ms=0)
+    with pytest.raises(RuntimeError):
+        service.encode(["boom"])
+    assert service.submit("fine").result(timeout=5).shape == (64,)
@@ -0,0 +1,59 @@
+"""
+NDJSON Ingest tests - chunk boundaries, offsets and the line-length limit
+"""
+import asyncio
+import json
+
+import pytest
+
+from api.ingest import iter_ndjson_batches
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def collect(data: bytes, size: int, **kwargs):
+    async def run():
+        return [batch async for batch in iter_ndjson_batches(_chunks(data, size), **kwargs)]
+    return asyncio.run(run())
+
+
+RECORDS = [{"user_id": "u", "content": f"fact number {i}"} for i in range(10)]
+BODY = b"".join(json.dumps(record).encode() + b"\n" for record in RECORDS)
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, len(BODY)])
+def test_records_survive_any_chunking(size):
+    batches = collect(BODY + b"\n" + json.dumps(RECORDS[0]).encode(), size, batch_size=4, start_offset=5)
+
+    assert [len(batch) for batch in batches] == [4, 4, 3]
+    records = [record for batch in batches for record in batch]
+    assert [offset for offset, _ in records] == list(range(5, 16))
+    assert [record for _, record in records] == RECORDS + RECORDS[:1]
+
+
+def test_bad_line_is_reported_in_place():
+    (batch,) = collect(b'{"a": 1}\nnot json\n[1]\n', 5)
+    assert batch[0] == (0, {"a": 1})
+    assert isinstance(batch[1][1], json.JSONDecodeError)
+    assert isinstance(batch[2][1], ValueError)
+
+
+def test_overlong_partial_line_is_rejected_even_after_a_newline():
+    # One chunk: a complete line, then a partial one already over the limit
+    data = b'{"a": 1}\n' + b"x" * 100
+    with pytest.raises(ValueError, match="offset 1 exceeds 64 bytes"):
+        collect(data, len(data), max_line_bytes=64)
+
+
+def test_overlong_complete_line_is_rejected():
+    with pytest.raises(ValueError, match="exceeds 64 bytes"):
+        collect(b"y" * 100 + b"\n", 200, max_line_bytes=64)
+
+
+def test_long_line_in_small_chunks():
+    record = {"user_id": "u", "content": "z" * 200_000}
+    (batch,) = collect(json.dumps(record).encode() + b"\n", 16)
+    assert batch == [(0, record)]
@@ -0,0 +1,216 @@
+"""
+Brain Persistence tests - WAL framing, torn tails, replay and snapshot round trips
+"""
+import copy
+import os
+
+import numpy as np
+import pytest
+
+from core.memory_store import MemoryStore
+from core.persistence import BrainPersistence, WriteAheadLog
+from core.user_profile import UserProfile
+
+TOPICS = [
+    "I like dark theme in my code editor",
+    "Python code reviews every morning",
+    "Optimize the slow database queries",
+    "Weekend hiking trip in the mountains",
+]
+
+
+def fact(i: int, user_id: str = "u1") -> dict:
+    return {"fact_id": f"fact_{i}", "content": f"{TOPICS[i % len(TOPICS)]} {i}", "user_id": user_id, "metadata": {"version": "new_fact"}}
+
+
+class Brain:
+    """Graph + memory_store + profiles wired to a BrainPersistence, like api/routes.py"""
+
+    def __init__(self, make_graph, data_dir: str, **graph_kwargs):
+        graph_kwargs.setdefault("index_backend", "exact")
+        self.graph = make_graph(**graph_kwargs)
+        self.memory_store = MemoryStore()
+        self.user_profiles = {}
+        self.persistence = BrainPersistence(data_dir, self.graph, self.memory_store, self.user_profiles)
+        self.report = self.persistence.recover()
+
+    def store(self, facts):
+        for data in facts:
+            self.memory_store.append(data)
+            self.persistence.log_memory(data)
+            profile = self.user_profiles.setdefault(data["user_id"], UserProfile(user_id=data["user_id"]))
+            profile.increment_fact_count()
+            self.persistence.log_profile_counters(profile)
+        self.graph.add_facts(facts)
+
+    def close(self):
+        self.persistence.close()
+
+
+def state(brain: Brain) -> dict:
+    """Everything recovery must reproduce"""
+    graph = brain.graph
+    return {
+        "levels": {level: dict(records) for level, records in graph.levels.items()},
+        "edges": sorted((min(u, v), max(u, v), round(w, 5), kind) for u, v, w, kind in graph.graph.edges(data=True)),
+        "vectors": {
+            key: {node_id: np.round(matrix.get(node_id), 5).tolist() for node_id in matrix.ids}
+            for key, matrix in graph.matrices.items() if len(matrix)
+        },
+        "memory_store": list(brain.memory_store),
+        "profiles": {user_id: profile.total_facts for user_id, profile in brain.user_profiles.items()}
+    }
+
+
+def populate(brain: Brain, start: int = 0, count: int = 12):
+    brain.store([fact(i, "u1" if i % 3 else "u2") for i in range(start, start + count)])
+    brain.graph.add_fact(f"single_{start}", "I like dark theme in my code editor too", "u1")
+    brain.graph.add_pattern(f"pattern_u1_{start}", "UI_PREFERENCE → dark, theme", ["fact_1", "fact_2"], 0.6, "u1")
+    brain.graph.remove_fact(f"fact_{start + 1}")
+
+
+# WriteAheadLog
+
+def test_wal_truncates_torn_tail_and_keeps_appending(tmp_path):
+    wal = WriteAheadLog(str(tmp_path))
+    wal.open_segment(1)
+    for lsn in range(1, 4):
+        wal.append(lsn, "op", {"n": lsn}, np.full((2, 3), lsn, dtype=np.float32) if lsn == 2 else None)
+    wal.close()
+    (_, path), = wal.segments()
+    intact = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial record")  # crash mid-write
+
+    records = list(wal.read(path))
+    assert [(lsn, data) for lsn, _, data, _ in records] == [(1, {"n": 1}), (2, {"n": 2}), (3, {"n": 3})]
+    assert np.array_equal(records[1][3], np.full((2, 3), 2, dtype=np.float32))
+    assert os.path.getsize(path) == intact
+
+    wal.open_segment(1)
+    wal.append(4, "op", {"n": 4})
+    wal.close()
+    assert [lsn for lsn, _, _, _ in wal.read(path)] == [1, 2, 3, 4]
+
+
+def test_wal_stops_at_corrupt_record(tmp_path):
+    wal = WriteAheadLog(str(tmp_path))
+    wal.open_segment(1)
+    sizes = [wal.append(lsn, "op", {"n": lsn}) for lsn in range(1, 4)]
+    wal.close()
+    (_, path), = wal.segments()
+    with open(path, "r+b") as f:
+        f.seek(sizes[0] + sizes[1] - 1)  # last payload byte of record 2
+        f.write(b"\xff")
+
+    assert [lsn for lsn, _, _, _ in wal.read(path)] == [1]
+    assert os.path.getsize(path) == sizes[0]
+
+
+# Recovery
+
+def test_replay_restores_state_without_encoding(make_graph, tmp_path):
+    brain = Brain(make_graph, str(tmp_path))
+    populate(brain)
+    expected = state(brain)
+    brain.close()
+
+    recovered = Brain(make_graph, str(tmp_path))
+    assert recovered.report["snapshot"] is None
+    assert recovered.report["replayed_records"] == brain.persistence.lsn
+    assert state(recovered) == expected
+    assert recovered.graph.encoder.get_stats()["texts"] == 0
+
+
+def test_snapshot_round_trip_with_wal_tail(make_graph, tmp_path):
+    brain = Brain(make_graph, str(tmp_path))
+    populate(brain)
+    snapshot = brain.persistence.snapshot()
+    assert brain.persistence.snapshot() is None  # nothing new since
+    populate(brain, start=100, count=6)
+    expected = state(brain)
+    brain.close()
+
+    # Only segments after the snapshot are kept
+    assert all(first_lsn > snapshot["lsn"] for first_lsn, _ in brain.persistence.wal.segments())
+
+    recovered = Brain(make_graph, str(tmp_path))
+    assert recovered.report["snapshot"] == snapshot["snapshot"]
+    assert recovered.report["replayed_records"] == brain.persistence.lsn - snapshot["lsn"]
+    assert state(recovered) == expected
+
+    # A recovered brain keeps journaling where it left off
+    populate(recovered, start=200, count=4)
+    expected = state(recovered)
+    recovered.close()
+    assert state(Brain(make_graph, str(tmp_path))) == expected
+
+
+def test_recovery_after_torn_tail(make_graph, tmp_path):
+    brain = Brain(make_graph, str(tmp_path))
+    populate(brain)
+    brain.persistence.snapshot()
+    brain.store([fact(50)])
+    expected = state(brain)
+    brain.graph.add_fact("fact_51", TOPICS[1], "u1")  # one WAL record
+    brain.close()
+
+    # Cut the last record in half
+    _, path = brain.persistence.wal.segments()[-1]
+    records = list(brain.persistence.wal.read(path))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+
+    recovered = Brain(make_graph, str(tmp_path))
+    assert recovered.persistence.lsn == records[-2][0]
+    assert state(recovered) == expected
+
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_snapshot_round_trip_with_embedding_store(make_graph, tmp_path, precision):
+    kwargs = {"embedding_store_dir": str(tmp_path / "vectors"), "embedding_precision": precision}
+    brain = Brain(make_graph, str(tmp_path / "brain"), **kwargs)
+    populate(brain)
+    brain.persistence.snapshot()
+    # Rows written after the snapshot are dropped on open and re-added by replay
+    populate(brain, start=100, count=6)
+    expected = state(brain)
+    brain.close()
+
+    recovered = Brain(make_graph, str(tmp_path / "brain"), **kwargs)
+    assert state(recovered) == expected
+    facts = recovered.graph.retrieve(query=TOPICS[0], user_id="u1", level=0)["facts"]
+    assert facts and all(f["fact_id"] in recovered.graph.levels[0] for f in facts)
+
+
+def test_snapshot_written_after_the_graph_moves_on(make_graph, tmp_path):
+    # capture_snapshot() under graph_write, write_snapshot() later while writes continue
+    brain = Brain(make_graph, str(tmp_path))
+    populate(brain)
+    captured = copy.deepcopy(state(brain))
+    capture = brain.persistence.capture_snapshot()
+    assert brain.persistence.capture_snapshot() is None  # one snapshot at a time
+
+    brain.graph.update_fact_stats("fact_0", {"ease_factor": 1.3})  # in-place metadata update
+    populate(brain, start=100, count=6)
+    snapshot = brain.persistence.write_snapshot(capture)
+    expected = state(brain)
+    brain.close()
+
+    # The capture is detached from the live records
+    level_0 = capture["columns"]["levels"]["0"]
+    assert "ease_factor" not in level_0["records"][level_0["ids"].index("fact_0")]["metadata"]
+    assert all("ease_factor" not in fact["metadata"] for fact in capture["facts"])
+
+    # The snapshot plus the WAL tail give the current graph...
+    recovered = Brain(make_graph, str(tmp_path))
+    assert recovered.report["snapshot"] == snapshot["snapshot"]
+    assert recovered.report["replayed_records"] == brain.persistence.lsn - capture["lsn"]
+    for key in ("levels", "edges", "vectors", "profiles"):
+        assert state(recovered)[key] == expected[key]
+
+    # ...and the snapshot alone the captured state
+    for _, path in recovered.persistence.wal.segments():
+        os.remove(path)
+    recovered.close()
+    assert state(Brain(make_graph, str(tmp_path))) == captured
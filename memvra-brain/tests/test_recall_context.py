@@ -0,0 +1,63 @@
+"""
+Recall context tests - build_context's second retrieval and merge per mode
+"""
+import asyncio
+import itertools
+
+import pytest
+
+from core.user_profile import UserProfile
+
+FACTS = [
+    "I like dark theme in my code editor",
+    "Dark mode editor settings for late night coding",
+    "Weekend hiking trip in the mountains",
+    "Mountain trail hiking with friends on Saturday",
+    "Python code reviews every morning",
+]
+_users = itertools.count()
+
+
+@pytest.fixture
+def recall(routes, monkeypatch):
+    """(routes, user_profile) with facts stored and an enhancer whose terms barely overlap the query"""
+    user_id = f"context_user_{next(_users)}"
+    routes.bdh_graph.add_facts([
+        {"fact_id": f"{user_id}_{i}", "content": content, "user_id": user_id}
+        for i, content in enumerate(FACTS)
+    ])
+
+    async def enhance_query(query, user_profile, enhancer=None):
+        return {
+            "enhanced_query": "mountain hiking trail weekend",
+            "keywords": ["mountain", "hiking", "trail"],
+            "synonyms": ["trek"],
+            "intent": "activities"
+        }
+
+    monkeypatch.setattr(routes, "enhance_query", enhance_query)
+    return routes, UserProfile(user_id=user_id)
+
+
+def test_tiered_merges_both_retrievals(recall):
+    routes, profile = recall
+    results, enhanced, timings = asyncio.run(routes.build_context("dark editor theme", profile, "local", "tiered"))
+
+    assert "retrieve_enhanced" in timings
+    assert results["context_source"] in ("raw", "enhanced", "raw+enhanced")
+    assert set(timings["retrieval"]) == {"raw", "enhanced"}
+    kept = [fact["fact_id"] for fact in results["facts"]]
+    assert [step["node"] for step in results["path"]] == [n for n in kept if n in {s["node"] for s in results["path"]}]
+    assert results["confidence"] == pytest.approx(
+        sum(fact["similarity"] for fact in results["facts"]) / len(results["facts"])
+    )
+
+
+def test_spreading_keeps_its_traversal(recall):
+    routes, profile = recall
+    results, enhanced, timings = asyncio.run(routes.build_context("dark editor theme", profile, "local", "spreading"))
+
+    assert "retrieve_enhanced" not in timings
+    assert results["context_source"] == "raw"
+    assert results["facts"]
+    assert results["path"] and all("via" in step and "activation" in step for step in results["path"])
@@ -0,0 +1,46 @@
+"""
+Stream Verifier tests - judge failures do not fail the response
+"""
+import asyncio
+
+from core.stream_verifier import StreamingVerifier
+
+FACTS = [{"fact_id": "f1", "content": "I like python"}]
+
+
+class FailingLlama:
+    async def verify_response(self, response, facts, user_id=None):
+        raise RuntimeError("ollama down")
+
+
+class FailingCitationVerifier:
+    async def check_claim(self, claim, facts):
+        raise ValueError("encode failed")
+
+
+def verify(text: str, citation_verifier=None) -> dict:
+    async def run():
+        verifier = StreamingVerifier(FailingLlama(), FACTS, citation_verifier=citation_verifier)
+        verifier.feed(text)
+        return await verifier.finish()
+    return asyncio.run(run())
+
+
+def test_failed_llm_judge_marks_span_unverified():
+    summary = verify("You really like python a lot. You like it [Fact: f1]. ok")
+    assert summary["supported"] is True
+    assert summary["status"] == "unverified"
+    assert summary["failed"] == 1
+    assert "could not be verified" in summary["reason"]
+
+
+def test_failed_local_judge_does_not_raise():
+    summary = verify("You like it [Fact: f1]. More text here.", FailingCitationVerifier())
+    assert summary["status"] == "unverified"
+    assert summary["failed"] == 1
+
+
+def test_invalid_citation_still_wins_over_failures():
+    summary = verify("You really like python a lot. You like rust [Fact: f9]. ok")
+    assert summary["supported"] is False
+    assert summary["status"] == "unsupported"